@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post
+from .models import Job, Post
+from .search import get_search_backend
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -8,5 +9,20 @@ class PostAdmin(admin.ModelAdmin):
     list_display_links = ('title',)
     search_fields = ('title',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # ищем по тому же полнотекстовому индексу, что и API
+        if not search_term:
+            return queryset, False
+        return get_search_backend().filter(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_at', 'last_error', 'created_at')
+
+
+admin.site.register(Job, JobAdmin)
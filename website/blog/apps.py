@@ -7,3 +7,6 @@ class BlogConfig(AppConfig):
 
     verbose_name = 'Блог'
     verbose_name_plural = 'Блог'
+
+    def ready(self):
+        from . import metrics, querycheck, signals    # noqa: F401 подключаем обработчики сигналов
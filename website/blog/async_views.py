@@ -0,0 +1,192 @@
+"""
+Асинхронные (ASGI) представления для чтения постов и пользователей: /api/v1/async/...
+
+Ответы совпадают с ответами PostViewSet и UserViewSet: запрос к базе строится
+теми же наборами представлений (фильтры, сортировка, выбор колонок, курсор страниц),
+а выполняется асинхронным ORM (aget, aiterator). Сериализация уже загруженных
+объектов выполняется в пуле потоков и не занимает цикл событий.
+Изменение данных - только через синхронный API.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from .cache import etag_matches, lookup_response, store_response
+from .conditional import post_etag
+from .permissions import AsyncIsAuthorOrReadOnly, AsyncIsStaffOrReadOnly
+from .renderers import FastJSONRenderer
+from .serializers import expanded_fields
+from .throttling import LocalThrottleStore, ReadThrottle, get_store
+from .views import PostViewSet, UserViewSet
+
+
+class AsyncReadView(View):
+    """
+    Базовое асинхронное представление только для чтения.
+
+    Подклассы задают набор представлений viewset_class, действие action
+    и реализуют get_data(viewset) - данные ответа.
+    """
+    http_method_names = ['get', 'head', 'options']
+    viewset_class = None
+    action = None
+    permission_classes = ()
+    cache_resource = None
+    renderer = FastJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        # обертка DRF нужна только для query_params и контекста сериализаторов,
+        # пользователь на чтение не загружается
+        self.api_request = Request(request, authenticators=())
+        try:
+            if request.method.lower() in self.http_method_names:
+                await self.check_permissions()
+                await self.check_throttles()
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.error_response(exc)
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    async def check_permissions(self):
+        for permission in self.get_permissions():
+            if not await permission.has_permission(self.request, self):
+                raise exceptions.PermissionDenied()
+
+    async def check_throttles(self):
+        # пользователь не загружается, поэтому ключ ограничения - IP клиента
+        throttle = ReadThrottle()
+        if isinstance(get_store(), LocalThrottleStore):
+            allowed = throttle.allow_request(self.api_request, self)
+        else:
+            allowed = await sync_to_async(throttle.allow_request, thread_sensitive=False)(self.api_request, self)
+        if not allowed:
+            raise exceptions.Throttled(throttle.wait())
+
+    async def check_object_permissions(self, obj):
+        for permission in self.get_permissions():
+            if not await permission.has_object_permission(self.request, self, obj):
+                raise exceptions.PermissionDenied()
+
+    def get_viewset(self, **kwargs):
+        return self.viewset_class(request=self.api_request, args=(), kwargs=kwargs,
+                                  action=self.action, format_kwarg=None)
+
+    async def get(self, request, **kwargs):
+        viewset = self.get_viewset(**kwargs)
+        if self.cache_resource is None:
+            return self.render(await self.get_data(viewset))
+
+        # тот же кэш ответов и ETag, что у CachedResponseMixin
+        key, cached = await sync_to_async(lookup_response)(self.cache_resource, self.api_request)
+        if cached is None:
+            data = await self.get_data(viewset)
+            etag = await sync_to_async(store_response)(key, data, self.get_etag(data))
+            cache_status = 'MISS'
+        else:
+            data, etag = cached
+            cache_status = 'HIT'
+
+        if etag_matches(self.api_request, etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.render(data)
+        response['ETag'] = etag
+        response['X-Cache'] = cache_status
+        return response
+
+    async def get_data(self, viewset):
+        raise NotImplementedError
+
+    def get_etag(self, data):
+        return None     # хэш данных
+
+    @staticmethod
+    async def serialize(func):
+        # объекты и связанные с ними записи уже загружены (select_related),
+        # сериализация не обращается к базе, поэтому ей не нужен поток с соединением
+        return await sync_to_async(func, thread_sensitive=False)()
+
+    async def get_object(self, viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        try:
+            obj = await queryset.aget(pk=viewset.kwargs['pk'])
+        except ObjectDoesNotExist:
+            raise exceptions.NotFound()
+        await self.check_object_permissions(obj)
+        return obj
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type=self.renderer.media_type)
+
+    def error_response(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status_code=exc.status_code)
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = '%d' % exc.wait     # как в обработчике исключений DRF
+        return response
+
+
+class AsyncPostListView(AsyncReadView):
+    viewset_class = PostViewSet
+    action = 'list'
+    permission_classes = (AsyncIsAuthorOrReadOnly,)
+    cache_resource = 'posts'
+
+    async def get_data(self, viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        compiled = viewset.get_compiled_serializer()
+        if compiled is not None:
+            queryset = viewset.compiled_queryset(queryset, compiled)
+        page = await viewset.paginator.apaginate_queryset(queryset, self.api_request, viewset)
+        if compiled is not None:
+            # строки .values() преобразуются быстро, отдельный поток не нужен
+            return viewset.get_paginated_response(compiled.to_representation(page)).data
+        return await self.serialize(
+            lambda: viewset.get_paginated_response(viewset.get_serializer(page, many=True).data).data
+        )
+
+
+class AsyncPostDetailView(AsyncReadView):
+    viewset_class = PostViewSet
+    action = 'retrieve'
+    permission_classes = (AsyncIsAuthorOrReadOnly,)
+    cache_resource = 'posts'
+
+    async def get_data(self, viewset):
+        self.post = await self.get_object(viewset)
+        return await self.serialize(lambda: viewset.get_serializer(self.post).data)
+
+    def get_etag(self, data):
+        # тот же ETag версии поста, что у PostViewSet.retrieve
+        expanded = 'author' in expanded_fields(self.api_request)
+        return post_etag(self.post.pk, self.post.updated_at, data if expanded else None)
+
+
+class AsyncUserListView(AsyncReadView):
+    viewset_class = UserViewSet
+    action = 'list'
+    permission_classes = (AsyncIsStaffOrReadOnly,)
+
+    async def get_data(self, viewset):
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        compiled = viewset.get_compiled_serializer()
+        if compiled is not None:
+            rows = [row async for row in viewset.compiled_queryset(queryset, compiled).aiterator()]
+            return compiled.to_representation(rows)
+        users = [user async for user in queryset.aiterator()]
+        return await self.serialize(lambda: viewset.get_serializer(users, many=True).data)
+
+
+class AsyncUserDetailView(AsyncReadView):
+    viewset_class = UserViewSet
+    action = 'retrieve'
+    permission_classes = (AsyncIsStaffOrReadOnly,)
+
+    async def get_data(self, viewset):
+        user = await self.get_object(viewset)
+        return await self.serialize(lambda: viewset.get_serializer(user).data)
@@ -0,0 +1,151 @@
+"""
+Аутентификация по токену с кэшем.
+
+TokenAuthentication на каждый запрос читает из базы токен вместе с пользователем.
+CachedTokenAuthentication держит пару (пользователь, токен) в кэше процесса
+(LocalLRUCache, BLOG_TOKEN_CACHE_LOCAL_TIMEOUT, BLOG_TOKEN_CACHE_MAX_ENTRIES), а если задан
+BLOG_TOKEN_CACHE_ALIAS - еще и в общем для всех процессов кэше Django (BLOG_TOKEN_CACHE_TIMEOUT).
+
+Записи удаляются сразу при удалении токена (в том числе при выходе через dj-rest-auth)
+и при изменении пользователя, например блокировке (blog.signals). Чтобы удаление заметили
+и другие процессы, в общем кэше хранится номер поколения: процесс, увидевший новое
+поколение, очищает свой локальный кэш. Без общего кэша другие процессы замечают удаление
+не позже чем через BLOG_TOKEN_CACHE_LOCAL_TIMEOUT секунд.
+
+Поколение запоминается до чтения токена из базы: если токен удалили, пока шло чтение,
+прочитанная пара в кэш не попадает.
+"""
+import copy
+import hashlib
+import itertools
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import CacheStats, LocalLRUCache
+
+local_stats = CacheStats()
+shared_stats = CacheStats()
+
+GENERATION_KEY = 'blog:token:generation'
+
+
+class TokenCache:
+    def __init__(self, max_entries, timeout, local_timeout=None):
+        self.local = LocalLRUCache(max_entries, local_timeout or timeout)
+        self.timeout = timeout
+        self.generation = None
+        # поколение процесса: меняется при каждом удалении записей, см. current_generation
+        self._local_generations = itertools.count()
+        self.local_generation = next(self._local_generations)
+
+    @property
+    def shared(self):
+        alias = settings.BLOG_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def make_key(token_key):
+        # сам токен в ключ не кладем, чтобы не светить его в общем кэше
+        return 'blog:token:' + hashlib.sha256(token_key.encode()).hexdigest()
+
+    def get(self, token_key):
+        key = self.make_key(token_key)
+        shared = self.shared
+        if shared is not None:
+            self._sync_generation(shared)
+
+        value = self.local.get(key)
+        if value is not None:
+            local_stats.hit()
+            return value
+        local_stats.miss()
+
+        if shared is not None:
+            value = shared.get(key)
+            if value is not None:
+                shared_stats.hit()
+                self.local.set(key, value)
+                return value
+            shared_stats.miss()
+        return None
+
+    def current_generation(self):
+        """ Поколение процесса и общего кэша; запоминается до чтения токена из базы для set(). """
+        shared = self.shared
+        return self.local_generation, shared.get(GENERATION_KEY) if shared is not None else None
+
+    def set(self, token_key, value, generation):
+        """
+        Кэширует пару, прочитанную из базы, если с current_generation() до записи ничего
+        не удалялось. Поколение проверяется и после записи: удаление могло пройти между
+        проверкой и записью, тогда запись убирается.
+        """
+        if generation != self.current_generation():
+            return
+        key = self.make_key(token_key)
+        self.local.set(key, value)
+        shared = self.shared
+        if shared is not None:
+            shared.set(key, value, timeout=self.timeout)
+        if generation != self.current_generation():
+            self.local.delete(key)
+            if shared is not None:
+                shared.delete(key)
+
+    def invalidate(self, token_keys):
+        keys = [self.make_key(token_key) for token_key in token_keys]
+        if not keys:
+            return
+        # сначала новое поколение, потом удаление: запись, сделанная set() в промежутке,
+        # либо удалится здесь, либо set() сам заметит новое поколение
+        self.local_generation = next(self._local_generations)
+        shared = self.shared
+        if shared is not None:
+            try:
+                shared.incr(GENERATION_KEY)
+            except ValueError:
+                shared.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        for key in keys:
+            self.local.delete(key)
+        if shared is not None:
+            shared.delete_many(keys)
+
+    def _sync_generation(self, shared):
+        generation = shared.get(GENERATION_KEY)
+        if generation != self.generation:
+            self.local.clear()
+            self.generation = generation
+
+    def clear(self):
+        self.local.clear()
+        self.generation = None
+
+
+@lru_cache(maxsize=None)
+def get_token_cache():
+    return TokenCache(settings.BLOG_TOKEN_CACHE_MAX_ENTRIES, settings.BLOG_TOKEN_CACHE_TIMEOUT,
+                      settings.BLOG_TOKEN_CACHE_LOCAL_TIMEOUT)
+
+
+def token_cache_stats():
+    return {'local': local_stats.as_dict(), 'shared': shared_stats.as_dict(), 'size': len(get_token_cache().local)}
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кэшем токенов, см. описание модуля.
+    """
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cached = cache.get(key)
+        if cached is None:
+            generation = cache.current_generation()
+            cached = super().authenticate_credentials(key)   # неактивный пользователь - исключение
+            cache.set(key, cached, generation)
+        user, token = cached
+        # закэшированный объект общий для всех запросов процесса, запросу отдаем копию
+        return copy.copy(user), token
@@ -0,0 +1,89 @@
+"""
+SQLite, настроенный на одновременные запросы (ENGINE = 'blog.backends.sqlite3').
+
+Стандартный бэкенд Django 4.1 начинает транзакцию с BEGIN (DEFERRED): блокировка записи
+берется только на первой изменяющей команде, и если ее уже держит другое соединение,
+SQLite сразу отвечает "database is locked", не дожидаясь busy_timeout. Этот бэкенд:
+
+- выполняет PRAGMA из OPTIONS['init_command'] при открытии соединения
+  (journal_mode=WAL, synchronous=NORMAL, mmap_size, cache_size, busy_timeout);
+- начинает транзакции с BEGIN OPTIONS['transaction_mode'] (IMMEDIATE): блокировка записи
+  берется сразу, и ожидание конкурентов подчиняется busy_timeout;
+- с OPTIONS['write_queue'] пишущие транзакции одного процесса выстраиваются в очередь
+  на блокировке в памяти, а не опрашивают файл базы в busy handler SQLite.
+
+Названия init_command и transaction_mode совпадают с опциями Django 5.1,
+после обновления Django достаточно вернуть стандартный ENGINE.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+
+def _write_queue(name):
+    with _write_queues_lock:
+        return _write_queues.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _holds_write_queue = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # собственные опции бэкенда не передаем в sqlite3.connect()
+        self.init_command = kwargs.pop('init_command', None)
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        self.write_queue = kwargs.pop('write_queue', False)
+        if self.transaction_mode is not None:
+            self.transaction_mode = self.transaction_mode.upper()
+            if self.transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(f"transaction_mode должен быть одним из {', '.join(TRANSACTION_MODES)}")
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.write_queue:
+            # ждем не дольше, чем ждал бы busy handler SQLite, дальше решает BEGIN
+            timeout = self.settings_dict['OPTIONS'].get('timeout', 5)
+            self._holds_write_queue = _write_queue(self.settings_dict['NAME']).acquire(timeout=timeout)
+        try:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}' if self.transaction_mode else 'BEGIN')
+        except Exception:
+            self._release_write_queue()
+            raise
+
+    def _release_write_queue(self):
+        if self._holds_write_queue:
+            self._holds_write_queue = False
+            _write_queue(self.settings_dict['NAME']).release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_queue()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_queue()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_queue()
@@ -0,0 +1,115 @@
+"""
+Общие функции для команд-бенчмарков (blog/management/commands/bench_*).
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .models import Post
+
+WORDS = (
+    'django', 'блог', 'запрос', 'индекс', 'база', 'данных', 'python', 'сервер', 'кэш', 'страница',
+    'пользователь', 'пост', 'api', 'ответ', 'время', 'память', 'поиск', 'поток', 'процесс', 'очередь',
+    'и', 'в', 'на', 'с', 'по', 'для', 'не', 'что', 'это', 'как',
+)
+
+
+def random_text(rng, length):
+    """ Текст примерно заданной длины из случайных слов. """
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def body_length(rng, mean=1500):
+    """ Длина текста поста: логнормальное распределение, как у реальных блогов. """
+    return max(20, min(int(rng.lognormvariate(0, 0.8) * mean), 20 * mean))
+
+
+@contextmanager
+def manual_timestamps(model=Post):
+    """ Отключает auto_now/auto_now_add, чтобы задавать даты при наполнении базы. """
+    fields = [field for field in model._meta.concrete_fields if hasattr(field, 'auto_now')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_users(count, prefix='bench_user', password=None):
+    User = get_user_model()
+    start = User.objects.count()
+    hashed = make_password(password)    # один хэш на всех, иначе наполнение займет минуты
+    User.objects.bulk_create(
+        [User(username=f'{prefix}_{start + i}', password=hashed) for i in range(count)],
+        batch_size=1000,
+    )
+    return list(User.objects.filter(username__startswith=f'{prefix}_').order_by('-pk')[:count])
+
+
+def seed_posts(count, authors, body_size=None, rng=None, batch_size=5000, span=timedelta(days=365),
+               body_mean=1500):
+    """
+    Добавляет count постов bulk_create'ом пачками по batch_size.
+    Даты создания равномерно распределены за span до текущего момента.
+    body_size - фиксированная длина текста, по умолчанию случайная (body_length со средним body_mean).
+    Сигналы Post при этом не вызываются: кэш, поиск и счетчики не обновляются.
+    """
+    rng = rng or random.Random(0)
+    now = timezone.now()
+    step = span / max(count, 1)
+    with manual_timestamps():
+        for offset in range(0, count, batch_size):
+            posts = []
+            for i in range(offset, min(offset + batch_size, count)):
+                created_at = now - span + step * i
+                posts.append(Post(
+                    author=rng.choice(authors),
+                    title=random_text(rng, rng.randint(10, 100)).capitalize(),
+                    body=random_text(rng, body_size or body_length(rng, body_mean)),
+                    created_at=created_at,
+                    updated_at=created_at + timedelta(seconds=rng.randint(0, 86400 * 30)),
+                ))
+            Post.objects.bulk_create(posts)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(samples):
+    """ Сводка по замерам в секундах, результат в миллисекундах. """
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
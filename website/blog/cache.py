@@ -0,0 +1,220 @@
+"""
+Кэш ответов API с версионными ключами.
+
+Для каждого ресурса (например 'posts') в кэше хранится счетчик версии,
+он входит в ключ каждого закэшированного ответа. Любое изменение ресурса
+увеличивает счетчик, и все старые ответы перестают находиться по ключу,
+а затем вытесняются бэкендом кэша (LocMemCache вытесняет давно не читанные).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import mark_written, replica_may_be_stale
+
+
+class CacheStats:
+    """
+    Счетчики попаданий и промахов кэша в пределах процесса.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
+
+response_stats = CacheStats()
+
+
+class LocalLRUCache:
+    """
+    Кэш в памяти процесса: не больше max_entries записей, каждая живет timeout секунд.
+    При переполнении вытесняется давно не читанная запись.
+    """
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_cache():
+    return caches[settings.BLOG_CACHE_ALIAS]
+
+
+def _version_key(resource):
+    return f'blog:{resource}:version'
+
+
+def get_version(resource):
+    cache = get_cache()
+    version = cache.get(_version_key(resource))
+    if version is None:
+        # если счетчик вытеснен, начинаем с текущего времени,
+        # чтобы не совпасть ни с одной из прежних версий
+        cache.add(_version_key(resource), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(resource))
+    return version
+
+
+def _bump(resource):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(resource))
+    except ValueError:
+        cache.add(_version_key(resource), time.time_ns(), timeout=None)
+
+
+def bump_version(resource):
+    """
+    Делает недействительными все закэшированные ответы ресурса.
+
+    Версия увеличивается сразу и еще раз после фиксации транзакции:
+    иначе параллельный запрос мог бы до COMMIT закэшировать старые данные
+    уже под новой версией. Старые данные могут прийти и с отстающей реплики,
+    поэтому ресурс еще и отмечается как недавно измененный (blog.routers).
+    """
+    _bump(resource)
+    transaction.on_commit(lambda: _committed(resource))
+
+
+def _committed(resource):
+    _bump(resource)
+    mark_written(resource)
+
+
+def response_cache_key(resource, request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = request.build_absolute_uri(request.path)
+    digest = hashlib.md5(f'{url}?{query}'.encode()).hexdigest()
+    return f'blog:{resource}:{get_version(resource)}:{digest}'
+
+
+def make_etag(data):
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+    return quote_etag(hashlib.md5(content.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def lookup_response(resource, request):
+    """ Ключ ответа в кэше и закэшированная пара (data, etag) или None. """
+    key = response_cache_key(resource, request)
+    cached = get_cache().get(key)
+    if cached is None:
+        response_stats.miss()
+    else:
+        response_stats.hit()
+    return key, cached
+
+
+def store_response(key, data, etag=None):
+    """ Кэширует данные ответа вместе с ETag (по умолчанию - хэш данных), возвращает ETag. """
+    etag = etag or make_etag(data)
+    get_cache().set(key, (data, etag))
+    return etag
+
+
+class CachedResponseMixin:
+    """
+    Кэширует успешные ответы list и retrieve набора представлений.
+
+    Ключ строится из адреса, параметров запроса и версии ресурса cache_resource,
+    поддерживается условный GET по ETag (If-None-Match -> 304). Если обработчик
+    сам задал ETag ответа (версия поста, blog.conditional), кэшируется он.
+    """
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key, cached = lookup_response(self.cache_resource, request)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if replica_may_be_stale(self.cache_resource):
+                # не кэшируем: реплика могла еще не получить последние изменения
+                etag = response.get('ETag') or make_etag(response.data)
+                cache_status = 'BYPASS'
+            else:
+                etag = store_response(key, response.data, response.get('ETag'))
+                cache_status = 'MISS'
+        else:
+            data, etag = cached
+            response = Response(data)
+            cache_status = 'HIT'
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        response['X-Cache'] = cache_status
+        return response
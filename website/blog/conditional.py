@@ -0,0 +1,67 @@
+"""
+Условные запросы к посту по его версии (оптимистичная блокировка).
+
+ETag поста строится из id и updated_at: "<id>-<updated_at в микросекундах>".
+GET с If-None-Match получает 304, если пост не менялся. PUT, PATCH и DELETE
+с If-Match выполняются, только если пост не изменился с тех пор, как клиент
+его прочитал, иначе - 412. Версия проверяется в условии того же UPDATE/DELETE
+(WHERE ... AND updated_at = ?), без отдельного чтения и блокировки.
+Запросы без If-Match выполняются как раньше.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Пост изменился после того, как вы его получили. Получите его заново.'
+    default_code = 'precondition_failed'
+
+
+def post_etag(pk, updated_at, data=None):
+    """
+    ETag поста. Если в ответ встроены данные других моделей (?expand=author),
+    передается и data: тогда ETag меняется и при их изменении.
+    """
+    version = f'{pk}-{(updated_at - EPOCH) // MICROSECOND}'
+    if data is not None:
+        content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+        version += '-' + hashlib.md5(content.encode()).hexdigest()[:12]
+    return quote_etag(version)
+
+
+def if_match_versions(request, pk):
+    """
+    Значения updated_at поста pk из заголовка If-Match.
+
+    None - заголовка нет или If-Match: *, версию проверять не нужно.
+    Пустой список - ни один из ETag не подходит к посту, запрос не выполняется.
+    """
+    header = request.headers.get('If-Match')
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if '*' in etags:
+        return None
+
+    versions = []
+    for etag in etags:
+        if etag.startswith('W/'):   # для If-Match сравнение строгое
+            continue
+        parts = etag.strip('"').split('-')
+        if len(parts) >= 2 and parts[0] == str(pk) and parts[1].isdigit():
+            try:
+                versions.append(EPOCH + int(parts[1]) * MICROSECOND)
+            except (ValueError, OverflowError):
+                # цифры вроде '²' или версия за пределами datetime: такой ETag ни к чему не подходит
+                continue
+    return versions
@@ -0,0 +1,62 @@
+"""
+Общий для процессов одного сервера кэш на файлах с атомарными add и incr.
+
+В FileBasedCache Django incr - это get и set: два процесса gunicorn, увеличивающие счетчик
+одновременно, теряют одно из увеличений, а add может записать значение поверх чужого.
+LockedFileBasedCache выполняет add и incr под блокировкой файла lock в каталоге кэша,
+поэтому подходит для счетчиков частоты запросов (blog.throttling) и версий кэша ответов.
+incr заменяет файл записи целиком (чтение без блокировки видит старое или новое значение)
+и не перебирает каталог, как set при проверке MAX_ENTRIES.
+"""
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class LockedFileBasedCache(FileBasedCache):
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        # файл без суффикса .djcache: clear() и проверка MAX_ENTRIES его не трогают
+        with open(os.path.join(self._dir, 'lock'), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked():
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            if expiry is not None and expiry < time.time():
+                self._delete(fname)
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+            try:
+                with open(fd, 'wb') as f:
+                    f.write(pickle.dumps(expiry, self.pickle_protocol))
+                    f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+                os.replace(tmp_path, fname)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return value
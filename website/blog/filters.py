@@ -0,0 +1,81 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import ValidationError
+
+
+def parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = timezone.datetime(day.year, day.month, day.day)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+# наибольший id BigAutoField; больше не принимает SQLite (OverflowError при запросе)
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """ Id записи из строки запроса: целое число от 1 до MAX_ID, иначе ValueError. """
+    pk = int(value) if value.isdigit() else 0  # int() - ValueError и для цифр вроде '²'
+    if not 1 <= pk <= MAX_ID:
+        raise ValueError(value)
+    return pk
+
+
+class PostFilterBackend(filters.BaseFilterBackend):
+    """
+    Фильтры списка постов: ?author=<id>, ?created_after=, ?created_before= (ISO 8601).
+    Каждый фильтр обслуживается индексом из Post.Meta.indexes.
+    """
+    params = {
+        'author': 'Id автора поста.',
+        'created_after': 'Посты, созданные не раньше указанного момента (ISO 8601).',
+        'created_before': 'Посты, созданные раньше указанного момента (ISO 8601).',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        errors = {}
+        lookups = {}
+
+        author = request.query_params.get('author')
+        if author is not None:
+            try:
+                lookups['author_id'] = parse_id(author)
+            except ValueError:
+                errors['author'] = ['Ожидается целое число.']
+
+        for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                lookups[lookup] = parse_moment(value)
+            except ValueError:
+                errors[param] = ['Неверный формат даты и времени.']
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups)
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed to use `get_schema_fields()`'
+        assert coreschema is not None, 'coreschema must be installed to use `get_schema_fields()`'
+        return [
+            coreapi.Field(name=name, required=False, location='query',
+                          schema=coreschema.String(title=name, description=description))
+            for name, description in self.params.items()
+        ]
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': name, 'required': False, 'in': 'query',
+             'description': description, 'schema': {'type': 'string'}}
+            for name, description in self.params.items()
+        ]
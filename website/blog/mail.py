@@ -0,0 +1,76 @@
+"""
+Отправка писем через очередь фоновых задач (blog.tasks).
+
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend' только ставит письмо в очередь,
+поэтому регистрация (письмо подтверждения django-allauth) и сброс пароля не ждут
+SMTP-сервер. Задача send_email отправляет письмо бэкендом BLOG_EMAIL_BACKEND,
+при ошибке соединения задание повторяется с задержкой.
+"""
+import base64
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+
+def message_to_dict(message):
+    """ Письмо в виде значения JSON для аргумента задачи. """
+    attachments = []
+    for filename, content, mimetype in message.attachments:
+        if isinstance(content, bytes):
+            attachments.append([filename, base64.b64encode(content).decode(), mimetype, True])
+        else:
+            attachments.append([filename, content, mimetype, False])
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+        'content_subtype': message.content_subtype,
+        'mixed_subtype': message.mixed_subtype,
+    }
+
+
+def message_from_dict(data):
+    message = EmailMultiAlternatives(
+        subject=data['subject'], body=data['body'], from_email=data['from_email'], to=data['to'],
+        cc=data['cc'], bcc=data['bcc'], reply_to=data['reply_to'], headers=data['headers'],
+        alternatives=[tuple(alternative) for alternative in data['alternatives']],
+    )
+    for filename, content, mimetype, is_bytes in data['attachments']:
+        message.attach(filename, base64.b64decode(content) if is_bytes else content, mimetype)
+    message.content_subtype = data['content_subtype']
+    message.mixed_subtype = data['mixed_subtype']
+    return message
+
+
+@task
+def send_email(data):
+    # ошибку не глушим: задание повторится
+    get_connection(settings.BLOG_EMAIL_BACKEND).send_messages([message_from_dict(data)])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """ Бэкенд почты Django, который ставит каждое письмо в очередь задачей send_email. """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            if any(isinstance(attachment, MIMEBase) for attachment in message.attachments):
+                # готовые MIME-вложения в JSON не переводим, такое письмо уходит сразу
+                get_connection(settings.BLOG_EMAIL_BACKEND, fail_silently=self.fail_silently).send_messages([message])
+            else:
+                send_email.delay(message_to_dict(message))
+            count += 1
+        return count
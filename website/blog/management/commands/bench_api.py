@@ -0,0 +1,221 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from blog.bench import random_text, summarize
+from blog.models import Post
+
+# сценарии чтения и записи с относительными весами, доля записи задается --write-ratio
+READS = {
+    'posts-list': 40,       # GET /api/v1/
+    'posts-detail': 40,     # GET /api/v1/<id>/
+    'users-list': 10,       # GET /api/v1/users/
+    'auth-user': 8,         # GET /api/v1/dj-rest-auth/user/ с токеном
+    'login': 2,             # POST /api/v1/dj-rest-auth/login/, проверка пароля
+}
+WRITES = {
+    'post-create': 1,       # POST /api/v1/
+    'post-update': 1,       # PATCH /api/v1/<id>/ своего поста
+}
+
+
+class QueryCounter:
+    """ Число SQL-запросов в потоке, обертка для connection.execute_wrapper. """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест API на данных seed_blog: список и страница поста, список пользователей, '
+            'вход и данные пользователя, создание и изменение постов в заданной пропорции. '
+            'Для каждого числа одновременных клиентов выводит запросов в секунду, задержки p50/p95/p99 '
+            'и число SQL-запросов на запрос по каждому сценарию. Запросы обрабатываются Django в этом же '
+            'процессе, без сетевого сервера; созданные посты удаляются по окончании. Ответ не 2xx '
+            'останавливает замер: такие запросы не должны попадать в пропускную способность. '
+            'Результат с --output сохраняется в JSON для сравнения между коммитами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Запросов в каждом замере')
+        parser.add_argument('--concurrency', default='1,8,32', help='Число одновременных клиентов через запятую')
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='Доля запросов на запись, от 0 до 1')
+        parser.add_argument('--page-size', type=int, default=20, help='Размер страницы списков')
+        parser.add_argument('--prefix', default='seed_user', help='Пользователи seed_blog')
+        parser.add_argument('--password', default='bench_password', help='Их пароль (для входа)')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+        parser.add_argument('--cache', action='store_true',
+                            help='Не отключать кэш ответов (по умолчанию меряем обращение к базе)')
+        parser.add_argument('--output', help='Сохранить результат в файл JSON')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        users = list(get_user_model().objects.filter(username__startswith=f'{options["prefix"]}_')[:1000])
+        pks = list(Post.objects.values_list('pk', flat=True)[:10000])
+        if not users or not pks:
+            raise CommandError('Нет данных: сначала выполните python manage.py seed_blog')
+
+        overrides = {
+            'DEBUG': False, 'ALLOWED_HOSTS': ['testserver'],
+            # все клиенты замера приходят с одного адреса testserver: ограничение частоты отключаем
+            'REST_FRAMEWORK': {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+        }
+        if not options['cache']:
+            overrides['CACHES'] = {
+                **settings.CACHES,
+                settings.BLOG_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            }
+
+        existing_tokens = set(Token.objects.filter(user__in=users).values_list('user_id', flat=True))
+        tokens = {user.pk: Token.objects.get_or_create(user=user)[0].key for user in users}
+        created = []
+        results = []
+        try:
+            with override_settings(**overrides):
+                for concurrency in sorted(int(value) for value in options['concurrency'].split(',')):
+                    results.append(self.run(concurrency, users, pks, tokens, created, options))
+                    if not options['json']:
+                        self.print_result(results[-1])
+        finally:
+            Post.objects.filter(pk__in=created).delete()
+            Token.objects.filter(user__in=users).exclude(user_id__in=existing_tokens).delete()
+
+        report = {
+            'revision': git_revision(),
+            'database': connections['default'].vendor,
+            'posts': len(pks), 'users': len(users),
+            'options': {name: options[name] for name in ('requests', 'write_ratio', 'page_size', 'cache', 'seed')},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def plan(self, count, options):
+        """ Последовательность сценариев замера: одинаковая при одинаковом --seed. """
+        rng = random.Random(options['seed'])
+        weights = {name: weight * (1 - options['write_ratio']) / sum(READS.values())
+                   for name, weight in READS.items()}
+        weights.update({name: weight * options['write_ratio'] / sum(WRITES.values())
+                        for name, weight in WRITES.items()})
+        return rng.choices(list(weights), list(weights.values()), k=count)
+
+    def run(self, concurrency, users, pks, tokens, created, options):
+        queue = iter(enumerate(self.plan(options['requests'], options)))
+        lock = threading.Lock()
+        failed = threading.Event()
+        page = {'page_size': options['page_size']}
+
+        def collect(own_posts):
+            with lock:
+                created.extend(own_posts)
+
+        def worker(number):
+            rng = random.Random(options['seed'] * 1000 + number)
+            user = users[number % len(users)]
+            token = {'HTTP_AUTHORIZATION': f'Token {tokens[user.pk]}'}
+            client = Client()
+            own_posts = []
+            samples = defaultdict(list)
+            queries = defaultdict(int)
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                stack.callback(connections.close_all)
+                stack.callback(collect, own_posts)
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(counter))
+                while True:
+                    with lock:
+                        i, name = next(queue, (None, None))
+                    if name is None or failed.is_set():
+                        break
+                    if name == 'post-update' and not own_posts:
+                        name = 'post-create'
+                    before = counter.count
+                    start = time.perf_counter()
+                    if name == 'posts-list':
+                        response = client.get('/api/v1/', page)
+                    elif name == 'posts-detail':
+                        response = client.get(f'/api/v1/{rng.choice(pks)}/')
+                    elif name == 'users-list':
+                        response = client.get('/api/v1/users/', page)
+                    elif name == 'auth-user':
+                        response = client.get('/api/v1/dj-rest-auth/user/', **token)
+                    elif name == 'login':
+                        # отдельный клиент: сессия после входа иначе подменила бы пользователя токена
+                        response = Client().post('/api/v1/dj-rest-auth/login/', {
+                            'username': rng.choice(users).username, 'password': options['password']})
+                    elif name == 'post-create':
+                        response = client.post('/api/v1/', {
+                            'author': user.pk, 'title': f'Bench {i}', 'body': random_text(rng, 1500),
+                        }, **token)
+                        if response.status_code == 201:
+                            own_posts.append(response.data['id'])
+                    else:
+                        response = client.patch(f'/api/v1/{rng.choice(own_posts)}/', {'title': f'Bench {i}'},
+                                                content_type='application/json', **token)
+                    samples[name].append(time.perf_counter() - start)
+                    queries[name] += counter.count - before
+                    if not 200 <= response.status_code < 300:
+                        failed.set()    # остальные клиенты тоже останавливаются
+                        raise CommandError(f'{name}: ответ {response.status_code} '
+                                           f'{response.content[:200].decode(errors="replace")}')
+            return samples, queries
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            parts = list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        scenarios = {}
+        for name in list(READS) + list(WRITES):
+            samples = [sample for part in parts for sample in part[0][name]]
+            if not samples:
+                continue
+            scenarios[name] = {
+                'rps': round(len(samples) / elapsed, 1),
+                'queries_per_request': round(sum(part[1][name] for part in parts) / len(samples), 2),
+                **summarize(samples),
+            }
+        samples = [sample for part in parts for values in part[0].values() for sample in values]
+        return {
+            'concurrency': concurrency,
+            'rps': round(len(samples) / elapsed, 1),
+            'queries_per_request': round(sum(sum(part[1].values()) for part in parts) / len(samples), 2),
+            **summarize(samples),
+            'scenarios': scenarios,
+        }
+
+    def print_result(self, result):
+        self.stdout.write(f'x{result["concurrency"]}: {result["rps"]} запр/с, p50 {result["p50_ms"]} мс, '
+                          f'p95 {result["p95_ms"]} мс, p99 {result["p99_ms"]} мс, '
+                          f'{result["queries_per_request"]} SQL/запр')
+        for name, scenario in result['scenarios'].items():
+            self.stdout.write(f'  {name:>13}: {scenario["count"]} запр, p50 {scenario["p50_ms"]} мс, '
+                              f'p95 {scenario["p95_ms"]} мс, p99 {scenario["p99_ms"]} мс, '
+                              f'{scenario["queries_per_request"]} SQL/запр')
@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import router
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from blog.bench import seed_posts, seed_users, summarize
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочное сравнение синхронного (WSGI, /api/v1/) и асинхронного (ASGI, /api/v1/async/) '
+            'чтения: запросов в секунду и задержки при разном числе одновременных клиентов. '
+            'Запросы обрабатываются Django в этом же процессе, без сетевого сервера. '
+            'Синхронные клиенты работают в потоках со своими соединениями с базой, поэтому данные '
+            'записываются в базу по-настоящему и удаляются по окончании.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000, help='Число постов')
+        parser.add_argument('--authors', type=int, default=20, help='Число авторов')
+        parser.add_argument('--requests', type=int, default=400, help='Запросов в каждом замере')
+        parser.add_argument('--concurrency', default='1,10,50',
+                            help='Число одновременных клиентов через запятую')
+        parser.add_argument('--cache', action='store_true',
+                            help='Не отключать кэш ответов (по умолчанию меряем обращение к базе)')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        overrides = {'DEBUG': False, 'ALLOWED_HOSTS': ['testserver']}
+        if not options['cache']:
+            overrides['CACHES'] = {
+                **settings.CACHES,
+                settings.BLOG_CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            }
+
+        with override_settings(**overrides):
+            authors = seed_users(options['authors'], prefix='bench_async')
+            try:
+                seed_posts(options['posts'], authors, body_size=1000)
+                pks = list(Post.objects.filter(author__in=authors).values_list('pk', flat=True)[:options['requests']])
+                results = self.run(pks, options)
+            finally:
+                # посты удаляем одним запросом, без сигналов (поиск и счетчики их не видели)
+                Post.objects.filter(author__in=authors)._raw_delete(router.db_for_write(Post))
+                get_user_model().objects.filter(pk__in=[author.pk for author in authors]).delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def scenarios(pks):
+        return [
+            ('posts', lambda prefix, i: f'{prefix}'),
+            ('post', lambda prefix, i: f'{prefix}{pks[i % len(pks)]}/'),
+            ('users+stats', lambda prefix, i: f'{prefix}users/?include=stats'),
+        ]
+
+    def run(self, pks, options):
+        results = []
+        for concurrency in sorted(int(value) for value in options['concurrency'].split(',')):
+            for name, make_path in self.scenarios(pks):
+                for mode, prefix, runner in (('wsgi', '/api/v1/', self.run_wsgi),
+                                             ('asgi', '/api/v1/async/', self.run_asgi)):
+                    paths = [make_path(prefix, i) for i in range(options['requests'])]
+                    samples, elapsed = runner(paths, concurrency)
+                    results.append({
+                        'scenario': name, 'mode': mode, 'concurrency': concurrency,
+                        'rps': round(len(samples) / elapsed, 1), **summarize(samples),
+                    })
+                    if not options['json']:
+                        self.print_result(results[-1])
+        return results
+
+    @staticmethod
+    def run_wsgi(paths, concurrency):
+        queue = iter(paths)
+        lock = threading.Lock()
+
+        def worker():
+            client = Client()
+            samples = []
+            while True:
+                with lock:
+                    path = next(queue, None)
+                if path is None:
+                    return samples
+                start = time.perf_counter()
+                response = client.get(path)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, (path, response.status_code)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            futures = [pool.submit(worker) for _ in range(concurrency)]
+            samples = list(itertools.chain.from_iterable(future.result() for future in futures))
+        return samples, time.perf_counter() - start
+
+    @staticmethod
+    def run_asgi(paths, concurrency):
+        queue = iter(paths)
+
+        async def worker():
+            client = AsyncClient()
+            samples = []
+            for path in queue:
+                start = time.perf_counter()
+                response = await client.get(path)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, (path, response.status_code)
+            return samples
+
+        async def main():
+            return await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        start = time.perf_counter()
+        samples = list(itertools.chain.from_iterable(asyncio.run(main())))
+        return samples, time.perf_counter() - start
+
+    def print_result(self, result):
+        self.stdout.write(f'{result["scenario"]:>12} {result["mode"]} x{result["concurrency"]}: '
+                          f'{result["rps"]} запр/с, p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс')
@@ -0,0 +1,118 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from blog.bench import seed_posts, seed_users, summarize
+
+
+class QueryTimer:
+    """ Суммарное время SQL-запросов, обертка для connection.execute_wrapper. """
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += time.perf_counter() - start
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]    # (id, parent, notused, detail)
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+class Command(BaseCommand):
+    help = ('Планы запросов (EXPLAIN) и время ответа списка постов с фильтрами и сортировками '
+            'на разном числе постов. Данные создаются внутри транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000',
+                            help='Число постов через запятую (по возрастанию)')
+        parser.add_argument('--authors', type=int, default=100, help='Число авторов')
+        parser.add_argument('--body-size', type=int, default=200, help='Длина текста поста')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого запроса')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        rng = random.Random(0)
+        results = []
+
+        # повторы замера не должны упираться в ограничение частоты запросов
+        no_throttle = override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+        with transaction.atomic(), no_throttle:
+            authors = seed_users(options['authors'], prefix='bench_filters')
+            seeded = 0
+            for size in sizes:
+                seed_posts(size - seeded, authors, body_size=options['body_size'], rng=rng)
+                seeded = size
+                results.append({'posts': size, 'scenarios': self.run_scenarios(authors[0], options['repeat'])})
+                if not options['json']:
+                    self.print_report(results[-1])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def scenarios(author):
+        middle = (timezone.now() - timedelta(days=182)).isoformat()
+        recent = (timezone.now() - timedelta(days=7)).isoformat()
+        return [
+            ('default', {}),
+            ('author', {'author': author.id}),
+            ('created_after', {'created_after': recent}),
+            ('created_before', {'created_before': middle}),
+            ('author+created_before', {'author': author.id, 'created_before': middle}),
+            ('ordering=created_at', {'ordering': 'created_at'}),
+            ('ordering=-updated_at', {'ordering': '-updated_at'}),
+            ('ordering=updated_at', {'ordering': 'updated_at'}),
+            ('ordering=title', {'ordering': 'title'}),
+        ]
+
+    def run_scenarios(self, author, repeat):
+        client = Client(HTTP_HOST='localhost')
+        cache = caches[settings.BLOG_CACHE_ALIAS]
+        report = []
+        for name, params in self.scenarios(author):
+            samples, sql_samples = [], []
+            for _ in range(repeat):
+                cache.clear()   # меряем обращение к базе, а не кэш ответов
+                timer = QueryTimer()
+                with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(timer):
+                    start = time.perf_counter()
+                    response = client.get('/api/v1/', params)
+                    samples.append(time.perf_counter() - start)
+                if not 200 <= response.status_code < 300:
+                    raise CommandError(f'{name}: ответ {response.status_code} '
+                                       f'{response.content[:200].decode(errors="replace")}')
+                sql_samples.append(timer.total)
+            page_query = [query['sql'] for query in queries if 'FROM "blog_post"' in query['sql']][-1]
+            report.append({
+                'name': name, 'params': params, 'plan': explain(page_query),
+                **summarize(samples), 'sql_p50_ms': summarize(sql_samples)['p50_ms'],
+            })
+        return report
+
+    def print_report(self, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{result["posts"]} постов'))
+        for scenario in result['scenarios']:
+            self.stdout.write(f'  {scenario["name"]}: p50 {scenario["p50_ms"]} мс, p95 {scenario["p95_ms"]} мс, '
+                              f'SQL p50 {scenario["sql_p50_ms"]} мс')
+            for line in scenario['plan']:
+                self.stdout.write(f'      {line}')
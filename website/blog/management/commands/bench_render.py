@@ -0,0 +1,86 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog import parsers, renderers
+from blog.bench import measure, seed_posts, seed_users, summarize
+from blog.models import Post
+from blog.serializers import PostListSerializer, PostSerializer
+
+ENGINES = {
+    'json': (JSONRenderer(), JSONParser()),
+    'orjson': (renderers.FastJSONRenderer(), parsers.FastJSONParser()),
+}
+
+
+class Command(BaseCommand):
+    help = ('Время сериализации и получения JSON для страницы постов: стандартные JSONRenderer '
+            'и JSONParser (json) против FastJSONRenderer и FastJSONParser (orjson). Посты загружаются '
+            'из базы один раз, меряются только сериализатор, рендерер и разбор ответа. '
+            'Данные создаются внутри транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Постов на странице')
+        parser.add_argument('--body-size', type=int, default=None,
+                            help='Длина текста поста (по умолчанию случайная, в среднем 1500)')
+        parser.add_argument('--repeat', type=int, default=30, help='Повторов каждого замера')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None and not options['json']:
+            self.stdout.write(self.style.WARNING('orjson не установлен: оба варианта используют json'))
+
+        results = []
+        with transaction.atomic():
+            authors = seed_users(20, prefix='bench_render')
+            seed_posts(options['posts'], authors, body_size=options['body_size'])
+            posts = list(Post.objects.select_related('author').order_by('-created_at', '-id')[:options['posts']])
+            for name, serializer_class, params in self.scenarios():
+                results.append(self.run(name, serializer_class, params, posts, options['repeat']))
+                if not options['json']:
+                    self.print_result(results[-1])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps({'orjson': renderers.orjson is not None, 'posts': options['posts'],
+                                          'results': results}, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def scenarios():
+        return [
+            ('list', PostListSerializer, {}),
+            ('list expand=author', PostListSerializer, {'expand': 'author'}),
+            ('full body', PostSerializer, {'fields': 'id,author,title,body,created_at'}),
+        ]
+
+    def run(self, name, serializer_class, params, posts, repeat):
+        request = Request(APIRequestFactory().get('/api/v1/', params))
+        context = {'request': request}
+        # excerpt в списке вырезает база, здесь - сериализатор, как без annotate
+        serialize = measure(lambda: serializer_class(posts, many=True, context=context).data, repeat)
+        data = serializer_class(posts, many=True, context=context).data
+
+        engines = {}
+        for engine, (renderer, parser) in ENGINES.items():
+            content = renderer.render(data)
+            render = measure(lambda: renderer.render(data), repeat)
+            parse = measure(lambda: parser.parse(io.BytesIO(content)), repeat)
+            engines[engine] = {'bytes': len(content), 'render': summarize(render), 'parse': summarize(parse),
+                               'serialize_render_p50_ms': round(summarize(serialize)['p50_ms']
+                                                                + summarize(render)['p50_ms'], 3)}
+        return {'scenario': name, 'serialize': summarize(serialize), 'engines': engines}
+
+    def print_result(self, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{result["scenario"]}: сериализация p50 {result["serialize"]["p50_ms"]} мс'))
+        for engine, values in result['engines'].items():
+            self.stdout.write(f'  {engine:>6}: рендер p50 {values["render"]["p50_ms"]} мс, '
+                              f'разбор p50 {values["parse"]["p50_ms"]} мс, '
+                              f'сериализация+рендер {values["serialize_render_p50_ms"]} мс, '
+                              f'{values["bytes"]} байт')
@@ -0,0 +1,79 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Substr
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.bench import measure, seed_posts, seed_users, summarize
+from blog.compiled import compile_serializer
+from blog.models import Post
+from blog.serializers import PostListSerializer, UserSerializer
+
+
+class Command(BaseCommand):
+    help = ('Стоимость сериализации одной строки списка: сериализатор DRF по объектам модели '
+            'против сгенерированной функции blog.compiled по строкам .values(). Отдельно меряется '
+            'только сериализация и чтение из базы вместе с сериализацией. '
+            'Данные создаются внутри транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Строк в списке')
+        parser.add_argument('--repeat', type=int, default=30, help='Повторов каждого замера')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        results = []
+        with transaction.atomic():
+            authors = seed_users(max(rows, 20), prefix='bench_serializers')
+            seed_posts(rows, authors[:20])
+            for name, serializer, queryset in self.scenarios(rows):
+                results.append(self.run(name, serializer, queryset, rows, options['repeat']))
+                if not options['json']:
+                    self.print_result(results[-1])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def scenarios(rows):
+        posts = Post.objects.annotate(excerpt=Substr('body', 1, settings.BLOG_EXCERPT_LENGTH)).order_by('-id')
+        expand = {'request': Request(APIRequestFactory().get('/', {'expand': 'author'}))}
+        return [
+            ('posts', PostListSerializer(), posts.defer('body', 'updated_at')[:rows]),
+            ('posts expand=author', PostListSerializer(context=expand),
+             posts.select_related('author').only('id', 'title', 'created_at', 'author__username')[:rows]),
+            ('users', UserSerializer(), get_user_model().objects.order_by('id').only('id', 'username')[:rows]),
+        ]
+
+    @staticmethod
+    def run(name, serializer, queryset, rows, repeat):
+        compiled = compile_serializer(serializer)
+        values = compiled.columns
+        objects = list(queryset)
+        value_rows = list(queryset.values(*values))
+
+        def drf(items):
+            return type(serializer)(items, many=True, context=serializer.context).data
+
+        timings = {
+            'drf': measure(lambda: drf(objects), repeat),
+            'compiled': measure(lambda: compiled.to_representation(value_rows), repeat),
+            'drf+query': measure(lambda: drf(list(queryset.all())), repeat),
+            'compiled+query': measure(lambda: compiled.to_representation(queryset.values(*values)), repeat),
+        }
+        result = {'scenario': name, 'rows': len(objects)}
+        for key, samples in timings.items():
+            summary = summarize(samples)
+            result[key] = {**summary, 'per_row_us': round(summary['p50_ms'] * 1000 / len(objects), 2)}
+        return result
+
+    def print_result(self, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{result["scenario"]} ({result["rows"]} строк)'))
+        for key in ('drf', 'compiled', 'drf+query', 'compiled+query'):
+            self.stdout.write(f'  {key:>15}: {result[key]["per_row_us"]} мкс/строку, p50 {result[key]["p50_ms"]} мс')
@@ -0,0 +1,149 @@
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.bench import summarize
+from blog.models import Post
+
+from .bench_api import git_revision
+
+
+def wait_for_port(process, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'Сервер завершился с кодом {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Сервер не начал принимать соединения за {timeout} секунд')
+
+
+def client(port, paths, duration, seed):
+    """
+    Один клиент: запросы подряд в течение duration секунд, каждый в новом соединении.
+    Возвращает задержки и описание первой ошибки (ответ не 2xx или сбой соединения) -
+    на ней клиент останавливается.
+    """
+    rng = random.Random(seed)
+    samples = []
+    deadline = time.perf_counter() + duration
+    while (start := time.perf_counter()) < deadline:
+        path = rng.choice(paths)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request('GET', path, headers={'Accept': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if not 200 <= response.status < 300:
+                return samples, f'GET {path}: ответ {response.status}'
+        except OSError as exc:
+            return samples, f'GET {path}: {exc}'
+        finally:
+            connection.close()
+        samples.append(time.perf_counter() - start)
+    return samples, None
+
+
+class Command(BaseCommand):
+    help = ('Масштабирование python manage.py serve по числу процессов: для каждого значения --workers '
+            'запускает сервер с настройками website.settings_production на данных seed_blog и нагружает '
+            'его --clients клиентами (отдельные процессы) --duration секунд: список постов и страницы постов. '
+            'Выводит запросов в секунду, задержки p50/p95/p99 и ускорение относительно первого замера. '
+            'Ограничение частоты запросов на время замера отключается, кэш ответов - если не задан --cache. '
+            'Ответ не 2xx останавливает замер.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4', help='Число процессов сервера через запятую')
+        parser.add_argument('--threads', type=int, default=1, help='Потоков в процессе сервера')
+        parser.add_argument('--clients', type=int, default=16, help='Одновременных клиентов')
+        parser.add_argument('--duration', type=float, default=10, help='Секунд на замер')
+        parser.add_argument('--port', type=int, default=8765, help='Порт сервера на 127.0.0.1')
+        parser.add_argument('--cache', action='store_true', help='Не отключать кэш ответов')
+        parser.add_argument('--output', help='Сохранить результат в файл JSON')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        pks = list(Post.objects.values_list('pk', flat=True)[:10000])
+        if not pks:
+            raise CommandError('Нет данных: сначала выполните python manage.py seed_blog')
+        rng = random.Random(0)
+        paths = ['/api/v1/'] + [f'/api/v1/{pk}/' for pk in rng.sample(pks, min(len(pks), 1000))]
+        connections.close_all()     # клиенты - отдельные процессы, база им не нужна
+
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'website.settings_production',
+            # клиенты замера приходят с одного адреса: ограничение частоты отключаем для всех областей
+            'BLOG_THROTTLE_READ_RATE': '',
+            'BLOG_THROTTLE_WRITE_RATE': '',
+            'BLOG_THROTTLE_AUTH_RATE': '',
+        }
+        if not options['cache']:
+            env['BLOG_CACHE_BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
+
+        results = []
+        for workers in sorted(int(value) for value in options['workers'].split(',')):
+            results.append(self.run(workers, paths, env, options))
+            if results[0]['rps']:
+                results[-1]['speedup'] = round(results[-1]['rps'] / results[0]['rps'], 2)
+            if not options['json']:
+                self.print_result(results[-1])
+
+        report = {
+            'revision': git_revision(),
+            'cpu_count': os.cpu_count(),
+            'options': {name: options[name] for name in ('threads', 'clients', 'duration', 'cache')},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+    def run(self, workers, paths, env, options):
+        port = options['port']
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'serve', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(workers), '--threads', str(options['threads']), '--max-requests', '0']
+        process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(process, port)
+            # прогрев: каждый процесс сервера загружает свои соединения и кэши
+            parts = [client(port, paths, 1, seed=-1)]
+            start = time.perf_counter()
+            with ProcessPoolExecutor(options['clients']) as pool:
+                parts += list(pool.map(client, [port] * options['clients'], [paths] * options['clients'],
+                                      [options['duration']] * options['clients'], range(options['clients'])))
+            elapsed = time.perf_counter() - start
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+        errors = [error for _, error in parts if error]
+        if errors:
+            raise CommandError(f'{workers} процессов: {errors[0]} (ошибок у клиентов: {len(errors)})')
+        samples = [sample for part in parts[1:] for sample in part[0]]
+        return {
+            'workers': workers,
+            'rps': round(len(samples) / elapsed, 1),
+            **summarize(samples),
+        }
+
+    def print_result(self, result):
+        speedup = f', ускорение x{result["speedup"]}' if 'speedup' in result else ''
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{result["workers"]} процессов'))
+        self.stdout.write(f'  {result["rps"]} запросов/с{speedup}, '
+                          f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, p99 {result["p99_ms"]} мс')
@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from blog.bench import random_text, seed_users, summarize
+
+MODES = {
+    'default': {'BLOG_DB_SQLITE_TUNED': '0'},
+    'tuned': {'BLOG_DB_SQLITE_TUNED': '1'},
+    'tuned-no-queue': {'BLOG_DB_SQLITE_TUNED': '1', 'BLOG_DB_SQLITE_WRITE_QUEUE': '0'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Одновременная запись в SQLite: создание постов через API (POST /api/v1/) и их изменение '
+            '(PATCH /api/v1/bulk/ - транзакция сначала читает, потом пишет) в нескольких потоках '
+            'вместе с читающими потоками. Сравнивает стандартный бэкенд SQLite и настроенный '
+            '(BLOG_DB_SQLITE_TUNED=1): записей в секунду, долю ошибок "database is locked" и задержки. '
+            'Каждый режим запускается в отдельном процессе с новой базой во временном каталоге.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Число пишущих потоков')
+        parser.add_argument('--readers', type=int, default=2, help='Число читающих потоков')
+        parser.add_argument('--requests', type=int, default=100, help='Запросов на каждый пишущий поток')
+        parser.add_argument('--update-ratio', type=float, default=0.5,
+                            help='Доля запросов на изменение среди пишущих')
+        parser.add_argument('--modes', default=','.join(MODES), help='Режимы через запятую: ' + ', '.join(MODES))
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+        parser.add_argument('--worker', action='store_true', help='Служебный: замер в текущем процессе')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        results = []
+        for mode in options['modes'].split(','):
+            with tempfile.TemporaryDirectory() as directory:
+                env = {**os.environ, **MODES[mode], 'BLOG_DB_NAME': os.path.join(directory, 'bench.sqlite3')}
+                env.pop('BLOG_DB_REPLICAS', None)
+                output = subprocess.run(
+                    [sys.executable, sys.argv[0], 'bench_sqlite_writes', '--worker',
+                     '--writers', str(options['writers']), '--readers', str(options['readers']),
+                     '--requests', str(options['requests']), '--update-ratio', str(options['update_ratio'])],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+            results.append({'mode': mode, **json.loads(output.strip().splitlines()[-1])})
+            if not options['json']:
+                self.print_result(results[-1])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def run(self, options):
+        call_command('migrate', verbosity=0)
+        author = seed_users(1, prefix='bench_sqlite', password='password')[0]
+        client_kwargs = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=author).key}'}
+        done = threading.Event()
+        counts = {'ok': 0, 'locked': 0, 'errors': 0, 'reads': 0}
+        lock = threading.Lock()
+
+        def count(name):
+            with lock:
+                counts[name] += 1
+
+        def writer(number):
+            client = Client()
+            rng = random.Random(number)
+            created = []
+            samples = []
+            try:
+                for i in range(options['requests']):
+                    title = f'Post {number}-{i}'
+                    if created and rng.random() < options['update_ratio']:
+                        request = ('patch', '/api/v1/bulk/', [{'id': rng.choice(created), 'title': title}], 200)
+                    else:
+                        data = {'author': author.pk, 'title': title, 'body': random_text(rng, 1000)}
+                        request = ('post', '/api/v1/', data, 201)
+                    method, path, data, expected = request
+                    start = time.perf_counter()
+                    try:
+                        response = getattr(client, method)(path, data, content_type='application/json',
+                                                           **client_kwargs)
+                    except OperationalError as exc:
+                        count('locked' if 'locked' in str(exc) else 'errors')
+                    else:
+                        count('ok' if response.status_code == expected else 'errors')
+                        if method == 'post' and response.status_code == 201:
+                            created.append(response.data['id'])
+                    samples.append(time.perf_counter() - start)
+            finally:
+                connections.close_all()
+            return samples
+
+        def reader():
+            client = Client()
+            try:
+                while not done.is_set():
+                    try:
+                        client.get('/api/v1/', {'page_size': 20})
+                        count('reads')
+                    except OperationalError:
+                        count('errors')
+            finally:
+                connections.close_all()
+
+        # без кэша ответов, чтобы читающие потоки действительно обращались к базе
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'], CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'blog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }):
+            with ThreadPoolExecutor(options['writers'] + options['readers']) as pool:
+                readers = [pool.submit(reader) for _ in range(options['readers'])]
+                start = time.perf_counter()
+                writers = [pool.submit(writer, number) for number in range(options['writers'])]
+                samples = [sample for future in writers for sample in future.result()]
+                elapsed = time.perf_counter() - start
+                done.set()
+                for future in readers:
+                    future.result()
+
+        total = options['writers'] * options['requests']
+        return {
+            'writes_per_s': round(counts['ok'] / elapsed, 1),
+            'reads_per_s': round(counts['reads'] / elapsed, 1),
+            'locked_rate': round(counts['locked'] / total, 4),
+            'ok': counts['ok'], 'locked': counts['locked'], 'errors': counts['errors'],
+            **summarize(samples),
+        }
+
+    def print_result(self, result):
+        self.stdout.write(f'{result["mode"]:>15}: {result["writes_per_s"]} записей/с, '
+                          f'{result["reads_per_s"]} чтений/с, locked {result["locked_rate"]:.1%}, '
+                          f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс')
@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик (BLOG_DB_REPLICAS) - для локальной '
+            'проверки чтения с реплик. Настоящие реплики получают данные репликацией базы.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite')
+        if not settings.BLOG_DB_REPLICAS:
+            raise CommandError('Реплики не заданы, см. BLOG_DB_REPLICAS')
+
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.BLOG_DB_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)   # целостная копия, даже если в базу сейчас пишут
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {settings.DATABASES[alias]["NAME"]}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
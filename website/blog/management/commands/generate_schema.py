@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.schema import SCHEMA_FILES, generate_schema, read_schema, schema_fingerprint, write_schema
+
+
+class Command(BaseCommand):
+    help = ('Строит схему OpenAPI (openapi.json и openapi.yaml) для /swagger/ и /redoc/ и сохраняет ее '
+            'в BLOG_SCHEMA_DIR. Выполняется при сборке образа; без нее схема строится при первом запросе '
+            'каждого процесса. Существующая схема перестраивается, только если изменились маршруты, '
+            'представления или сериализаторы (--force - всегда).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Каталог для файлов схемы (по умолчанию BLOG_SCHEMA_DIR)')
+        parser.add_argument('--force', action='store_true', help='Перестроить, даже если схема актуальна')
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить, что сохраненная схема актуальна (код выхода 1, если нет)')
+
+    def handle(self, *args, **options):
+        directory = Path(options['output'] or settings.BLOG_SCHEMA_DIR)
+        fingerprint = schema_fingerprint()
+        current = read_schema(directory, fingerprint) is not None
+
+        if options['check']:
+            if not current:
+                raise CommandError(f'Схема в {directory} устарела: выполните python manage.py generate_schema')
+            self.stdout.write(f'Схема в {directory} актуальна')
+            return
+        if current and not options['force']:
+            self.stdout.write(f'Схема в {directory} актуальна')
+            return
+
+        write_schema(directory, generate_schema(), fingerprint)
+        self.stdout.write(self.style.SUCCESS(f'Схема сохранена: {", ".join(str(directory / name) for name in SCHEMA_FILES)}'))
@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CHILD = 'from blog.startup import main; main()'
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+class Command(BaseCommand):
+    help = ('Время запуска процесса Django: для каждого модуля настроек запускает --repeat новых '
+            'интерпретаторов и меряет django.setup() (импорт и ready() каждого приложения), загрузку '
+            'маршрутов и создание приложения WSGI, RSS и число загруженных модулей. Выводит медианный '
+            'запуск; --importtime N добавляет N самых долгих импортов верхнего уровня (python -X importtime). '
+            'Например: python manage.py profile_startup --profiles website.settings_production,website.settings_api')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=None,
+                            help='Модули настроек через запятую (по умолчанию текущий)')
+        parser.add_argument('--repeat', type=int, default=5, help='Запусков каждого профиля')
+        parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                            help='Показать N самых долгих импортов верхнего уровня')
+        parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+
+    def handle(self, *args, **options):
+        profiles = (options['profiles'] or settings.SETTINGS_MODULE).split(',')
+        results = []
+        for profile in map(str.strip, profiles):
+            runs = [self.run(profile) for _ in range(max(options['repeat'], 1))]
+            runs.sort(key=lambda run: run['total_ms'])
+            result = runs[len(runs) // 2]
+            result['runs'] = [round(run['total_ms'], 1) for run in runs]
+            if options['importtime']:
+                result['imports'] = self.importtime(profile, options['importtime'])
+            results.append(result)
+            if not options['json']:
+                self.print_result(result)
+
+        if len(results) > 1 and not options['json']:
+            self.print_comparison(results)
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def child(self, profile, *flags):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        process = subprocess.run([sys.executable, *flags, '-c', CHILD], cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(f'Запуск с {profile} завершился ошибкой:\n{process.stderr}')
+        return process
+
+    def run(self, profile):
+        return json.loads(self.child(profile).stdout)
+
+    def importtime(self, profile, count):
+        """ Самые долгие импорты верхнего уровня (без вложенных), cumulative в мс. """
+        imports = []
+        for line in self.child(profile, '-X', 'importtime').stderr.splitlines():
+            match = IMPORTTIME.match(line)
+            if match and not match.group(3):
+                imports.append({'module': match.group(4), 'ms': round(int(match.group(2)) / 1000, 1)})
+        imports.sort(key=lambda item: item['ms'], reverse=True)
+        return imports[:count]
+
+    def print_result(self, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(result['settings']))
+        self.stdout.write(f'  запуск {result["total_ms"]:.1f} мс (медиана из {len(result["runs"])}, '
+                          f'разброс {result["runs"][0]}-{result["runs"][-1]} мс), '
+                          f'RSS {result["rss_kb"] / 1024:.1f} МиБ, модулей {result["modules"]}')
+        self.stdout.write(f'  django.setup() {result["setup_ms"]:.1f} мс, маршруты {result["urls_ms"]:.1f} мс, '
+                          f'WSGI {result["wsgi_ms"]:.1f} мс')
+        apps = sorted(result['apps'].items(), key=lambda item: item[1]['import_ms'] + item[1]['ready_ms'],
+                      reverse=True)
+        for label, app in apps:
+            self.stdout.write(f'  {app["name"]:>30}: импорт {app["import_ms"]:6.1f} мс, '
+                              f'ready() {app["ready_ms"]:6.1f} мс')
+        for item in result.get('imports', []):
+            self.stdout.write(f'  {"import " + item["module"]:>37}: {item["ms"]:6.1f} мс')
+
+    def print_comparison(self, results):
+        base = results[0]
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Относительно {base["settings"]}'))
+        for result in results[1:]:
+            self.stdout.write(
+                f'  {result["settings"]}: запуск {result["total_ms"] - base["total_ms"]:+.1f} мс '
+                f'({result["total_ms"] / base["total_ms"] - 1:+.0%}), '
+                f'RSS {(result["rss_kb"] - base["rss_kb"]) / 1024:+.1f} МиБ '
+                f'({result["rss_kb"] / base["rss_kb"] - 1:+.0%}), '
+                f'модулей {result["modules"] - base["modules"]:+d}'
+            )
+        self.stdout.write(f'  медианы: {", ".join(str(round(statistics.median(r["runs"]), 1)) for r in results)}')
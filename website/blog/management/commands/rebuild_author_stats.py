@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog import stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов авторов (число постов, дата последнего поста)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Строк в одном INSERT')
+
+    def handle(self, *args, **options):
+        count = stats.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Счетчики пересчитаны для {count} авторов'))
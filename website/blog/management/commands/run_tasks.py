@@ -0,0 +1,85 @@
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.tasks import DatabaseBackend
+
+
+class Command(BaseCommand):
+    help = ('Обработчик очереди фоновых задач (blog.tasks, BLOG_TASKS_BACKEND=database): забирает готовые '
+            'задания из таблицы и выполняет их в --concurrency потоках. Можно запустить несколько '
+            'обработчиков, каждое задание выполнит только один. SIGTERM и Ctrl+C дожидаются текущих заданий. '
+            'Например: python manage.py run_tasks --concurrency 8')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.BLOG_TASKS_CONCURRENCY,
+                            help='Потоков, выполняющих задания')
+        parser.add_argument('--poll', type=float, default=settings.BLOG_TASKS_POLL_INTERVAL,
+                            help='Пауза между опросами пустой очереди, секунды')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задания и завершиться')
+
+    def handle(self, *args, **options):
+        self.backend = DatabaseBackend()
+        self.stopping = threading.Event()
+        self.results = []
+        concurrency = max(options['concurrency'], 1)
+        handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            if concurrency == 1:
+                self.run_serial(options)
+            else:
+                self.run_pool(concurrency, options)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено заданий: {self.results.count(True)}, с ошибкой: {self.results.count(False)}'))
+
+    def run_serial(self, options):
+        # с одним потоком задания выполняются в главном, без пула
+        while not self.stopping.is_set():
+            jobs = self.backend.claim(1)
+            if jobs:
+                self.results.append(self.backend.run(jobs[0]))
+            elif options['once']:
+                break
+            else:
+                self.stopping.wait(options['poll'])
+
+    def run_pool(self, concurrency, options):
+        """
+        Задание забирается, как только освобождается поток: долгое задание (например,
+        письмо через медленный SMTP) занимает один поток, остальные продолжают работать.
+        """
+        running = set()
+        with ThreadPoolExecutor(concurrency, thread_name_prefix='task') as pool:
+            while not self.stopping.is_set():
+                free = concurrency - len(running)
+                jobs = self.backend.claim(free) if free else []
+                running |= {pool.submit(self.run_in_thread, job) for job in jobs}
+                if not running:
+                    if options['once']:
+                        break
+                    self.stopping.wait(options['poll'])
+                    continue
+                # все потоки заняты - ждем первого освободившегося, иначе еще и новых заданий
+                finished, running = wait(running, timeout=None if len(running) == concurrency else options['poll'],
+                                         return_when=FIRST_COMPLETED)
+                self.results.extend(future.result() for future in finished)
+            # остановка: новые задания не забираем, текущие дожидаемся
+            self.results.extend(future.result() for future in running)
+
+    def run_in_thread(self, job):
+        try:
+            return self.backend.run(job)
+        finally:
+            # у каждого потока свое соединение с базой, закрываем его, как после запроса (CONN_MAX_AGE)
+            close_old_connections()
+
+    def stop(self, signum, frame):
+        self.stopping.set()
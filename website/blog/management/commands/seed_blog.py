@@ -0,0 +1,46 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+from blog import stats
+from blog.bench import seed_posts, seed_users
+from blog.cache import bump_version
+from blog.models import Post
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу пользователями и постами для нагрузочного тестирования (bench_api). '
+            'Длина текста постов случайная, как у реальных блогов (в среднем --body-mean символов), '
+            'при одинаковом --seed данные одинаковые. Пароль всех пользователей - --password. '
+            'После наполнения пересчитываются счетчики авторов и поисковый индекс.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Число пользователей')
+        parser.add_argument('--posts', type=int, default=10000, help='Число постов')
+        parser.add_argument('--body-mean', type=int, default=1500, help='Средняя длина текста поста')
+        parser.add_argument('--password', default='bench_password', help='Пароль пользователей')
+        parser.add_argument('--prefix', default='seed_user', help='Начало имени пользователей')
+        parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+        parser.add_argument('--clear', action='store_true',
+                            help='Сначала удалить пользователей с этим --prefix и их посты')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        prefix = options['prefix']
+        with transaction.atomic():
+            if options['clear']:
+                seeded = User.objects.filter(username__startswith=f'{prefix}_')
+                # без сигналов на каждый пост: счетчики и индекс ниже пересчитываются целиком
+                Post.objects.filter(author__in=seeded)._raw_delete(router.db_for_write(Post))
+                seeded.delete()
+            authors = seed_users(options['users'], prefix=prefix, password=options['password'])
+            rng = random.Random(options['seed'])
+            seed_posts(options['posts'], authors, rng=rng, body_mean=options['body_mean'])
+        stats.rebuild()
+        get_search_backend().rebuild()
+        bump_version('posts')   # закэшированные списки постов больше не актуальны
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено пользователей: {len(authors)}, постов: {options["posts"]} (пароль {options["password"]})'))
@@ -0,0 +1,134 @@
+import json
+import multiprocessing
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler, StaticFilesHandler
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.db import connections
+from gunicorn.app.base import BaseApplication
+
+from blog.metrics import clear_dir, retire
+
+
+def post_fork(server, worker):
+    # соединения с базой, открытые в главном процессе до fork, не должны достаться нескольким процессам
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    # измерения процесса, перезапущенного после --max-requests, переходят в общий снимок завершившихся
+    retire()
+
+
+class Application(BaseApplication):
+    """ Gunicorn с приложением Django этого процесса (настройки уже загружены manage.py). """
+
+    def __init__(self, options, asgi=False, static=False):
+        self.options = options
+        self.asgi = asgi
+        self.static = static
+        super().__init__()
+
+    def load_config(self):
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self):
+        if self.asgi:
+            application = get_asgi_application()
+            if self.static:
+                application = ASGIStaticFilesHandler(application)
+        else:
+            application = get_internal_wsgi_application()
+            if self.static:
+                application = StaticFilesHandler(application)
+        if apps.is_installed('drf_yasg'):
+            # схема API для /swagger/: при --preload строится или читается один раз до fork
+            from blog.schema import get_schema_store
+            get_schema_store().load()
+        connections.close_all()
+        return application
+
+
+class Command(BaseCommand):
+    help = ('Сервер приложения для продакшена (gunicorn) вместо runserver: несколько процессов, '
+            'приложение загружается до fork (--no-preload - в каждом процессе), процессы перезапускаются '
+            'после --max-requests запросов. Плавный перезапуск процессов - сигнал HUP главному процессу '
+            '(kill -HUP $(cat <--pid>)); новый код без --no-preload подхватывается только новым главным '
+            'процессом: сигнал USR2, затем TERM старому. Запускайте с --settings=website.settings_production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000', help='Адрес и порт (или unix:путь)')
+        parser.add_argument('--workers', type=int, default=settings.BLOG_SERVE_WORKERS,
+                            help='Число процессов, 0 - 2 * число ядер + 1 (BLOG_SERVE_WORKERS)')
+        parser.add_argument('--threads', type=int, default=settings.BLOG_SERVE_THREADS,
+                            help='Потоков в процессе, больше 1 - процессы gthread (BLOG_SERVE_THREADS)')
+        parser.add_argument('--asgi', action='store_true',
+                            help='website.asgi в процессах uvicorn (нужен пакет uvicorn) вместо website.wsgi')
+        parser.add_argument('--max-requests', type=int, default=settings.BLOG_SERVE_MAX_REQUESTS,
+                            help='Перезапуск процесса после стольких запросов, 0 - без перезапуска')
+        parser.add_argument('--timeout', type=int, default=settings.BLOG_SERVE_TIMEOUT,
+                            help='Процесс, не ответивший столько секунд, перезапускается')
+        parser.add_argument('--graceful-timeout', type=int, default=30,
+                            help='Секунд на завершение текущих запросов при остановке и перезапуске')
+        parser.add_argument('--no-preload', action='store_false', dest='preload',
+                            help='Загружать приложение в каждом процессе (HUP тогда подхватывает новый код)')
+        parser.add_argument('--static', action='store_true',
+                            help='Отдавать статические файлы (админка, swagger) самим приложением, '
+                                 'если перед ним нет веб-сервера')
+        parser.add_argument('--pid', help='Файл с PID главного процесса')
+        parser.add_argument('--access-log', action='store_true', help='Журнал запросов в stdout')
+        parser.add_argument('--print-config', action='store_true',
+                            help='Вывести настройки gunicorn в JSON и выйти, не запуская сервер')
+
+    def handle(self, *args, **options):
+        config = self.gunicorn_options(options)
+        if options['print_config']:
+            self.stdout.write(json.dumps(config, indent=2))
+            return
+        if options['asgi']:
+            try:
+                import uvicorn.workers  # noqa: F401
+            except ImportError:
+                raise CommandError('Для --asgi нужен пакет uvicorn: pip install uvicorn')
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG включен: запустите с --settings=website.settings_production'))
+        if config['workers'] > 1 and not settings.BLOG_METRICS_DIR:
+            self.stderr.write(self.style.WARNING(
+                'BLOG_METRICS_DIR не задан: /metrics отдаст метрики одного процесса из нескольких'))
+        clear_dir()
+
+        hooks = {'post_fork': post_fork, 'worker_exit': worker_exit}
+        Application({**config, **hooks}, asgi=options['asgi'], static=options['static']).run()
+
+    @staticmethod
+    def gunicorn_options(options):
+        workers = options['workers'] or multiprocessing.cpu_count() * 2 + 1
+        if options['asgi']:
+            worker_class = 'uvicorn.workers.UvicornWorker'
+        elif options['threads'] > 1:
+            worker_class = 'gthread'
+        else:
+            worker_class = 'sync'
+        config = {
+            'bind': [options['bind']],
+            'workers': workers,
+            'worker_class': worker_class,
+            'threads': options['threads'],
+            'preload_app': options['preload'],
+            'max_requests': options['max_requests'],
+            # процессы перезапускаются не одновременно
+            'max_requests_jitter': options['max_requests'] // 10,
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'proc_name': 'blog',
+            'accesslog': '-' if options['access_log'] else None,
+            'errorlog': '-',
+        }
+        if options['pid']:
+            config['pidfile'] = options['pid']
+        return config
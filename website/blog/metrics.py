@@ -0,0 +1,406 @@
+"""
+Метрики производительности запросов: время ответа, число и время SQL-запросов,
+время сериализации и размер ответа по каждому маршруту (posts-list, posts-detail,
+users-list, rest_login и т.д.).
+
+MetricsMiddleware собирает их для доли запросов BLOG_METRICS_SAMPLE_RATE,
+остальные запросы проходят без измерений. Собранное доступно в формате Prometheus
+по адресу /metrics (MetricsView) и в заголовке Server-Timing ответа.
+
+Гистограммы и счетчики хранятся в памяти процесса. При нескольких процессах gunicorn
+нужен каталог BLOG_METRICS_DIR: каждый процесс не чаще раза в BLOG_METRICS_FLUSH_INTERVAL
+секунд записывает туда свой снимок, а /metrics складывает снимки всех процессов, включая
+завершившиеся (счетчики не убывают): завершающийся процесс переносит свой снимок в общий
+снимок завершившихся процессов, так что файлов в каталоге не больше, чем процессов.
+Без каталога /metrics отдает метрики одного процесса.
+"""
+import asyncio
+import bisect
+import hmac
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.core.files import locks
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from .authentication import local_stats, shared_stats
+from .cache import response_stats
+
+_current = ContextVar('blog_request_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """ Гистограмма Prometheus с метками, накопительные бакеты считаются при выводе. """
+    def __init__(self, name, help_text, buckets, labels=('route', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(counts), total, count]
+                    for labels, (counts, total, count) in self._series.items()]
+
+    def render(self, series=None):
+        """ Строки Prometheus по своим сериям или по series в формате snapshot() (сумма процессов). """
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        if series is None:
+            series = self.snapshot()
+        for label_values, counts, total, count in sorted(series):
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram('blog_http_request_duration_seconds', 'Время ответа.', LATENCY_BUCKETS)
+db_queries = Histogram('blog_http_request_db_queries', 'Число SQL-запросов на запрос.', QUERY_BUCKETS)
+db_duration = Histogram('blog_http_request_db_seconds', 'Время SQL-запросов на запрос.', LATENCY_BUCKETS)
+serialize_duration = Histogram('blog_http_request_serialize_seconds', 'Время сериализаторов DRF на запрос.',
+                               LATENCY_BUCKETS)
+response_size = Histogram('blog_http_response_size_bytes', 'Размер тела ответа (без потоковых ответов).',
+                          SIZE_BUCKETS)
+HISTOGRAMS = (request_duration, db_queries, db_duration, serialize_duration, response_size)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'phases', 'active')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        self.active = set()
+
+
+@contextmanager
+def phase(name):
+    """ Засекает время этапа обработки запроса (например 'serialize'), вложенные вызовы не суммируются. """
+    current = _current.get()
+    if current is None or name in current.active:
+        yield
+        return
+    current.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.phases[name] = current.phases.get(name, 0.0) + time.perf_counter() - start
+        current.active.discard(name)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """ Считает SQL-запросы измеряемого запроса, подключается к каждому соединению с базой. """
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.queries += 1
+        current.db_time += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Измеряет запрос и записывает результат в гистограммы. Ставится первым в MIDDLEWARE,
+    чтобы время ответа включало остальные промежуточные слои.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current = self.stop(token)
+        return self.record(request, response, current, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current = self.stop(token)
+        return self.record(request, response, current, time.perf_counter() - start)
+
+    @staticmethod
+    def sampled():
+        rate = settings.BLOG_METRICS_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def start():
+        return _current.set(RequestMetrics()), time.perf_counter()
+
+    @staticmethod
+    def stop(token):
+        current = _current.get()
+        _current.reset(token)
+        return current
+
+    @staticmethod
+    def record(request, response, current, duration):
+        labels = (route_name(request), request.method if request.method in METHODS else 'OTHER')
+        serialize = current.phases.get('serialize', 0.0)
+        request_duration.observe(labels, duration)
+        db_queries.observe(labels, current.queries)
+        db_duration.observe(labels, current.db_time)
+        serialize_duration.observe(labels, serialize)
+        if not response.streaming:
+            response_size.observe(labels, len(response.content))
+        flush()
+
+        if settings.BLOG_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={current.db_time * 1000:.2f};desc="{current.queries} queries"',
+                f'serialize;dur={serialize * 1000:.2f}',
+                f'total;dur={duration * 1000:.2f}',
+            ])
+        return response
+
+
+CACHE_STATS = (('responses', response_stats), ('tokens_local', local_stats), ('tokens_shared', shared_stats))
+
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+_timer = None
+_process_file = (None, None)
+_retired = False
+
+EXITED_FILE = 'exited.json'
+
+
+def snapshot():
+    """ Метрики процесса в виде значения JSON. """
+    return {
+        'histograms': {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS},
+        'caches': {name: [stats.hits, stats.misses] for name, stats in CACHE_STATS},
+    }
+
+
+def merge(snapshots):
+    """ Сумма снимков snapshot() нескольких процессов в одном снимке. """
+    histograms, cache_counts = {}, {}
+    for item in snapshots:
+        for name, series in item['histograms'].items():
+            merged = histograms.setdefault(name, {})
+            for labels, counts, total, count in series:
+                current = merged.get(tuple(labels))
+                if current is None:
+                    merged[tuple(labels)] = [list(counts), total, count]
+                else:
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+                    current[2] += count
+        for name, (hits, misses) in item['caches'].items():
+            current = cache_counts.setdefault(name, [0, 0])
+            current[0] += hits
+            current[1] += misses
+    return {
+        'histograms': {name: [[list(labels), *values] for labels, values in merged.items()]
+                       for name, merged in histograms.items()},
+        'caches': cache_counts,
+    }
+
+
+@contextmanager
+def locked_dir(directory):
+    """ Блокировка каталога снимков между процессами: перенос снимка в EXITED_FILE и чтение для /metrics. """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(directory) / 'lock', 'ab') as lock:
+        locks.lock(lock, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(lock)
+
+
+def write_json(path, value):
+    # запись во временный файл и переименование: /metrics не прочитает недописанный снимок
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(value, file)
+    os.replace(tmp, path)
+
+
+def process_file(directory):
+    """ Файл снимка процесса: свой у каждого процесса, в том числе с тем же PID после перезапуска. """
+    global _process_file
+    pid, path = _process_file
+    if pid != os.getpid():
+        pid = os.getpid()
+        path = f'{pid}-{uuid.uuid4().hex}.json'
+        _process_file = pid, path
+    return Path(directory) / path
+
+
+def flush(force=False):
+    """
+    Записывает снимок процесса в BLOG_METRICS_DIR не чаще раза в BLOG_METRICS_FLUSH_INTERVAL секунд;
+    измерения, пропущенные из-за интервала, записывает таймер в конце интервала.
+    """
+    global _last_flush, _timer
+    directory = settings.BLOG_METRICS_DIR
+    if not directory:
+        return
+    with _flush_lock:
+        if _retired:
+            return
+        wait = _last_flush + settings.BLOG_METRICS_FLUSH_INTERVAL - time.monotonic()
+        if not force and wait > 0:
+            if _timer is None or not _timer.is_alive():
+                _timer = threading.Timer(wait, flush, kwargs={'force': True})
+                _timer.daemon = True
+                _timer.start()
+            return
+        _last_flush, _timer = time.monotonic(), None
+        path = process_file(directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(path, snapshot())
+
+
+def retire():
+    """
+    Завершение процесса (gunicorn worker_exit): снимок процесса прибавляется к EXITED_FILE,
+    а файл процесса удаляется, поэтому перезапуски после --max-requests не множат файлы.
+    """
+    global _retired
+    directory = settings.BLOG_METRICS_DIR
+    if not directory:
+        return
+    with _flush_lock, locked_dir(directory):
+        _retired = True
+        exited = Path(directory) / EXITED_FILE
+        snapshots = [snapshot()]
+        if exited.exists():
+            snapshots.append(json.loads(exited.read_text()))
+        write_json(exited, merge(snapshots))
+        process_file(directory).unlink(missing_ok=True)
+
+
+def clear_dir():
+    """ Удаляет снимки прошлого запуска сервера (python manage.py serve, до запуска процессов). """
+    directory = settings.BLOG_METRICS_DIR
+    if directory and Path(directory).is_dir():
+        for path in Path(directory).glob('*.json'):
+            path.unlink(missing_ok=True)
+
+
+def collect():
+    """ Снимки всех процессов из BLOG_METRICS_DIR или снимок текущего процесса. """
+    directory = settings.BLOG_METRICS_DIR
+    if not directory:
+        return [snapshot()]
+    flush(force=True)
+    snapshots = []
+    # под блокировкой: снимок завершающегося процесса не попадет в сумму дважды
+    with locked_dir(directory):
+        for path in Path(directory).glob('*.json'):
+            snapshots.append(json.loads(path.read_text()))
+    return snapshots
+
+
+def render_metrics():
+    merged = merge(collect())
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render(merged['histograms'].get(histogram.name, []))
+    # те же счетчики, что в api/v1/cache-stats/, но по всем процессам
+    lines += ['# HELP blog_cache_requests_total Обращения к кэшам.', '# TYPE blog_cache_requests_total counter']
+    for cache_name, stats in CACHE_STATS:
+        hits, misses = merged['caches'].get(cache_name, [0, 0])
+        lines.append(f'blog_cache_requests_total{{cache="{cache_name}",result="hit"}} {hits}')
+        lines.append(f'blog_cache_requests_total{{cache="{cache_name}",result="miss"}} {misses}')
+    return '\n'.join(lines) + '\n'
+
+
+class HasMetricsToken(permissions.BasePermission):
+    """ Доступ по заголовку Authorization: Bearer <BLOG_METRICS_TOKEN> - для сборщика Prometheus. """
+    def has_permission(self, request, view):
+        token = settings.BLOG_METRICS_TOKEN
+        if not token:
+            return False
+        # сравнение за постоянное время: по времени ответа токен не подобрать
+        return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+
+
+class MetricsView(APIView):
+    """
+    Метрики в текстовом формате Prometheus (всех процессов, если задан BLOG_METRICS_DIR):
+    администраторам или по BLOG_METRICS_TOKEN.
+    """
+    permission_classes = (HasMetricsToken | permissions.IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
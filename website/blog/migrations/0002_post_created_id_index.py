@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='blog_post_created_id_idx'),
+        ),
+    ]
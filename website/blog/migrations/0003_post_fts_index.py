@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    # полнотекстовый индекс blog.search.SQLiteFTS5Backend, для других баз не нужен
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute("INSERT INTO blog_post_fts (rowid, title, body) SELECT id, title, body FROM blog_post")
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
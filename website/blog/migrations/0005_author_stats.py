@@ -0,0 +1,42 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    # счетчики для уже существующих постов, дальше их поддерживает blog.stats
+    Post = apps.get_model('blog', 'Post')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    rows = Post.objects.using(schema_editor.connection.alias).values('author_id').annotate(
+        post_count=models.Count('id'), last_post_at=models.Max('created_at')).order_by()
+    AuthorStats.objects.using(schema_editor.connection.alias).bulk_create(
+        [AuthorStats(user_id=row['author_id'], post_count=row['post_count'], last_post_at=row['last_post_at'])
+         for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0004_post_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
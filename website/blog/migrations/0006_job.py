@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_author_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Задача')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='Аргументы')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='Именованные аргументы')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('failed', 'Ошибка')], default='queued', max_length=7, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=1, verbose_name='Максимум попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Выполнить после')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Фоновое задание',
+                'verbose_name_plural': 'Фоновые задания',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_at'], name='blog_job_status_run_at_idx'),
+        ),
+    ]
@@ -1,5 +1,61 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import sql
+from django.utils import timezone
+
+
+class PostQuerySet(models.QuerySet):
+    """
+    Изменение и удаление с возвратом затронутых строк (UPDATE/DELETE ... RETURNING)
+    одним запросом. Если база не поддерживает RETURNING, строки читаются отдельным запросом.
+    """
+    def update_returning(self, **values):
+        self._for_write = True
+        connection = connections[self.db]
+        if not connection.features.can_return_columns_from_insert:
+            with transaction.atomic(using=self.db):
+                pks = list(self.select_for_update().values_list('pk', flat=True))
+                self.model._base_manager.using(self.db).filter(pk__in=pks).update(**values)
+                return list(self.model._base_manager.using(self.db).filter(pk__in=pks))
+
+        query = self.query.chain(sql.UpdateQuery)
+        query.add_update_values(values)
+        return self._returning(connection, *query.get_compiler(self.db).as_sql())
+
+    def delete_returning(self):
+        self._for_write = True
+        connection = connections[self.db]
+        if not connection.features.can_return_columns_from_insert:
+            with transaction.atomic(using=self.db):
+                rows = list(self.select_for_update())
+                self.model._base_manager.using(self.db).filter(pk__in=[row.pk for row in rows])._raw_delete(self.db)
+                return rows
+
+        query = self.query.chain(sql.DeleteQuery)
+        return self._returning(connection, *query.get_compiler(self.db).as_sql())
+
+    def _returning(self, connection, statement, params):
+        fields = self.model._meta.concrete_fields
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f'{statement} RETURNING {columns}', params)
+            rows = cursor.fetchall()
+
+        # те же преобразования значений из базы, что и при обычном SELECT
+        converters = []
+        for field in fields:
+            column = field.get_col(self.model._meta.db_table)
+            converters.append((column, connection.ops.get_db_converters(column) + column.get_db_converters(connection)))
+        attnames = [field.attname for field in fields]
+        instances = []
+        for row in rows:
+            values = []
+            for value, (column, functions) in zip(row, converters):
+                for function in functions:
+                    value = function(value, column, connection)
+                values.append(value)
+            instances.append(self.model.from_db(self.db, attnames, values))
+        return instances
 
 
 class Post(models.Model):
@@ -8,8 +64,79 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
-    author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Автор поста')
+    # отдельный индекс по author_id не нужен, его заменяет составной (author, created_at, id)
+    author = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, verbose_name='Автор поста')
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # ключ постраничного вывода (blog.pagination.KeysetPagination)
+            models.Index(fields=['-created_at', '-id'], name='blog_post_created_id_idx'),
+            # фильтры и сортировки PostViewSet (blog.filters)
+            models.Index(fields=['author', '-created_at', '-id'], name='blog_post_author_created_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='blog_post_updated_id_idx'),
+            models.Index(fields=['title', 'id'], name='blog_post_title_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # автор на момент загрузки: при смене автора поправим счетчики обоих (blog.stats)
+        instance._loaded_author_id = instance.__dict__.get('author_id')
+        return instance
 
     def __str__(self):
         return str(self.title) + " - " + str(self.author)
 
+
+class AuthorStats(models.Model):
+    """
+    Счетчики постов автора, поддерживаются при создании и удалении постов (blog.stats),
+    чтобы не считать COUNT(*) по постам на каждого пользователя.
+    Пересчитываются командой rebuild_author_stats.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='post_stats', verbose_name='Автор')
+    post_count = models.PositiveIntegerField(default=0, verbose_name='Число постов')
+    last_post_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата последнего поста')
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.user}: {self.post_count}'
+
+
+class Job(models.Model):
+    """
+    Задание очереди фоновых задач (blog.tasks): какую задачу вызвать и с какими аргументами.
+    Выполненные задания удаляются, упавшие после всех попыток остаются со статусом failed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'В очереди'), (RUNNING, 'Выполняется'), (FAILED, 'Ошибка')]
+
+    name = models.CharField(max_length=255, verbose_name='Задача')
+    args = models.JSONField(default=list, blank=True, verbose_name='Аргументы')
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name='Именованные аргументы')
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED, verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(default=1, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Выполнить после')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='Взято в работу')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
+    class Meta:
+        verbose_name = 'Фоновое задание'
+        verbose_name_plural = 'Фоновые задания'
+        indexes = [
+            # выборка обработчиком очереди: готовые к запуску задания по времени
+            models.Index(fields=['status', 'run_at'], name='blog_job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,154 @@
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+from .filters import parse_id
+
+# позиция в выборке: значение поля сортировки и id последней (первой) записи страницы
+Cursor = namedtuple('Cursor', ['reverse', 'value', 'pk'])
+
+
+def _reverse_field(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Постраничный вывод по ключу (keyset) на паре (поле сортировки, id).
+
+    Следующая страница выбирается условием "строго после последней записи"
+    вместо OFFSET, поэтому запрос обслуживается составным индексом
+    и не замедляется на дальних страницах.
+    Курсор непрозрачен для клиента: base64 от значения поля и id.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = settings.BLOG_PAGE_SIZE
+        self.max_page_size = settings.BLOG_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ Асинхронный вариант paginate_queryset для blog.async_views. """
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([item async for item in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """ Запрос одной страницы (без выполнения), None - если постраничный вывод выключен. """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_key_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request, queryset.model)
+
+        field = self.ordering[0]
+        descending = field.startswith('-')
+        ordering = self.ordering
+        if self.cursor is not None and self.cursor.reverse:
+            descending = not descending
+            ordering = tuple(_reverse_field(f) for f in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(field.lstrip('-'), descending, self.cursor))
+
+        # берем на одну запись больше, чтобы узнать, есть ли что-то за страницей
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """ Страница из результатов page_queryset. """
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.cursor is not None and self.cursor.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next, self.has_previous = has_following, self.cursor is not None
+
+        return self.page
+
+    def get_key_ordering(self, request, queryset, view):
+        """ Сортировка всегда дополняется id, чтобы ключ был уникальным. """
+        ordering = self.get_ordering(request, queryset, view)
+        field = ordering[0]
+        tie_breaker = '-id' if field.startswith('-') else 'id'
+        if field.lstrip('-') in ('id', 'pk'):
+            return (field,)
+        return (field, tie_breaker)
+
+    @staticmethod
+    def _after(field, descending, cursor):
+        lookup = 'lt' if descending else 'gt'
+        if field in ('id', 'pk'):
+            return Q(**{f'pk__{lookup}': cursor.pk})
+        return (
+            Q(**{f'{field}__{lookup}': cursor.value}) |
+            Q(**{field: cursor.value, f'pk__{lookup}': cursor.pk})
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            return self.encode_cursor(self._cursor_for(self.page[-1], reverse=False))
+        return self.encode_cursor(self.cursor._replace(reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            return self.encode_cursor(self._cursor_for(self.page[0], reverse=True))
+        return self.encode_cursor(self.cursor._replace(reverse=True))
+
+    def _cursor_for(self, item, reverse):
+        field = self.ordering[0].lstrip('-')
+        if isinstance(item, dict):
+            return Cursor(reverse, item[field], item['id'])
+        return Cursor(reverse, getattr(item, field), item.pk)
+
+    def decode_cursor(self, request, model=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        field = model._meta.get_field(self.ordering[0].lstrip('-'))
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            pk = parse_id(tokens['i'][0])  # id вне диапазона поля упал бы только в запросе
+            value = field.to_python(tokens['p'][0])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(reverse, value, pk)
+
+    def encode_cursor(self, cursor):
+        value = cursor.value.isoformat() if hasattr(cursor.value, 'isoformat') else str(cursor.value)
+        tokens = {'p': value, 'i': str(cursor.pk)}
+        if cursor.reverse:
+            tokens['r'] = '1'
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
@@ -0,0 +1,47 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:     # без orjson работает стандартный JSONParser
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser на orjson (тело в UTF-8). Без пакета orjson или в другой кодировке - обычный JSONParser.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Разбирает поток NDJSON (по одному JSON-объекту в строке) в список объектов.
+    Тело читается построчно, пустые строки пропускаются.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f'Строка {number}: {exc}')
+        return items
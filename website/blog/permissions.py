@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from rest_framework import permissions
 
 
@@ -15,7 +16,7 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return bool(
             request.method in permissions.SAFE_METHODS or
-            obj.author == request.user
+            obj.author_id == request.user.pk    # без загрузки автора из базы
         )
 
 
@@ -34,3 +35,58 @@ class IsStaffOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS or
             request.user and request.user.is_staff
         )
+
+
+def _load_user(request):
+    request.user.is_authenticated   # AuthenticationMiddleware загружает пользователя лениво
+    return request.user
+
+
+async def aget_user(request):
+    """
+    Пользователь запроса для асинхронных представлений:
+    сессия и пользователь читаются из базы в синхронном потоке.
+    """
+    return await sync_to_async(_load_user)(request)
+
+
+class AsyncPermission:
+    """
+    Проверка прав для асинхронных представлений (blog.async_views), интерфейс как у BasePermission.
+    """
+    async def has_permission(self, request, view):
+        return True
+
+    async def has_object_permission(self, request, view, obj):
+        return True
+
+
+class AsyncIsAuthorOrReadOnly(AsyncPermission):
+    """
+    Асинхронный вариант IsAuthorOrReadOnly. На чтение пользователь не загружается.
+    """
+    async def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        user = await aget_user(request)
+        return bool(user and user.is_authenticated)
+
+    async def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        user = await aget_user(request)
+        return obj.author_id == user.pk
+
+
+class AsyncIsStaffOrReadOnly(AsyncPermission):
+    """
+    Асинхронный вариант IsStaffOrReadOnly.
+    """
+    async def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        user = await aget_user(request)
+        return bool(user and user.is_staff)
+
+    async def has_object_permission(self, request, view, obj):
+        return await self.has_permission(request, view)
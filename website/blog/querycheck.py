@@ -0,0 +1,192 @@
+"""
+Поиск N+1 и медленных SQL-запросов.
+
+QueryInspector записывает запросы к базе внутри блока with: текст запроса приводится
+к отпечатку (значения, параметры и списки IN заменяются на ?), одинаковые отпечатки
+считаются. Если один отпечаток повторился не меньше BLOG_QUERYCHECK_REPEAT_THRESHOLD раз
+(типичный N+1: связанный объект загружается на каждую строку) или запрос шел дольше
+BLOG_QUERYCHECK_SLOW_MS, inspector.problems() вернет замечание с местом вызова:
+представление, поле сериализатора и строка кода проекта.
+
+На сервере разработки (DEBUG и BLOG_QUERYCHECK) каждый запрос проверяет QueryCheckMiddleware
+и пишет замечания в лог 'blog.querycheck'. В тестах - blog.tests.utils.QueryCountMixin.
+"""
+import asyncio
+import logging
+import re
+import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework.fields import Field
+from rest_framework.views import APIView
+
+logger = logging.getLogger('blog.querycheck')
+
+_current = ContextVar('blog_query_inspector', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN \((?:\?, )*\?\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+PROJECT_DIR = str(settings.BASE_DIR)
+
+
+def fingerprint(sql):
+    """ Запрос без конкретных значений: одинаковые по смыслу запросы дают одинаковый отпечаток. """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAMETER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _location():
+    """ Откуда выполнен запрос: представление, поле сериализатора и строка кода проекта. """
+    view = serializer_field = code = None
+    frame = sys._getframe(2)
+    while frame is not None and not (view and serializer_field and code):
+        owner = frame.f_locals.get('self')
+        owner_class = type(owner)   # isinstance обратился бы к __class__ и загрузил бы ленивый объект (request.user)
+        name = frame.f_code.co_name
+        filename = frame.f_code.co_filename
+        # обертки execute (эта и blog.metrics) и сами тесты местом вызова не считаем
+        if code is None and filename.startswith(PROJECT_DIR) and name != 'execute_wrapper' \
+                and '/tests/' not in filename:
+            code = f'{Path(filename).relative_to(PROJECT_DIR)}:{frame.f_lineno} in {name}'
+        if serializer_field is None and issubclass(owner_class, Field) and owner.field_name \
+                and name in ('get_attribute', 'to_representation'):
+            # самое внутреннее поле: например author в PostSerializer
+            serializer_field = f'{type(owner.parent).__name__}.{owner.field_name}'
+        if view is None and issubclass(owner_class, APIView):
+            view = f'{owner_class.__name__}.{getattr(owner, "action", None) or name}'
+        frame = frame.f_back
+    return ' > '.join(part for part in (view, serializer_field, code) if part) or 'unknown'
+
+
+@dataclass
+class QueryGroup:
+    fingerprint: str
+    sql: str                    # первый запрос группы целиком
+    location: str               # где он выполнен
+    count: int = 0
+    duration: float = 0.0
+    slowest: float = 0.0
+
+
+@dataclass
+class Problem:
+    kind: str                   # 'repeated' или 'slow'
+    group: QueryGroup
+    details: str = ''
+
+    def __str__(self):
+        return f'{self.kind}: {self.details} at {self.group.location}\n    {self.group.sql}'
+
+
+class QueryInspector:
+    """
+    Записывает запросы ко всем базам в блоке with, см. описание модуля.
+    """
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        self.repeat_threshold = repeat_threshold or settings.BLOG_QUERYCHECK_REPEAT_THRESHOLD
+        self.slow_ms = slow_ms if slow_ms is not None else settings.BLOG_QUERYCHECK_SLOW_MS
+        self.groups = OrderedDict()
+        self.count = 0
+
+    def __enter__(self):
+        for connection in connections.all():
+            install_execute_wrapper(None, connection)   # соединения, открытые до подключения сигнала
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    def record(self, sql, duration):
+        self.count += 1
+        key = fingerprint(sql)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = QueryGroup(key, sql, _location())
+        group.count += 1
+        group.duration += duration
+        group.slowest = max(group.slowest, duration)
+
+    def problems(self):
+        problems = []
+        for group in self.groups.values():
+            if group.count >= self.repeat_threshold:
+                problems.append(Problem('repeated', group, f'{group.count} identical queries'))
+            if group.slowest * 1000 >= self.slow_ms:
+                problems.append(Problem('slow', group, f'{group.slowest * 1000:.1f} ms'))
+        return problems
+
+    def report(self):
+        return '\n'.join(str(problem) for problem in self.problems())
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    inspector = _current.get()
+    if inspector is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        inspector.record(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class QueryCheckMiddleware:
+    """
+    Проверяет запросы к базе каждого HTTP-запроса на сервере разработки (DEBUG и BLOG_QUERYCHECK).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.enabled():
+            return self.get_response(request)
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        self.log(request, inspector)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled():
+            return await self.get_response(request)
+        with QueryInspector() as inspector:
+            response = await self.get_response(request)
+        self.log(request, inspector)
+        return response
+
+    @staticmethod
+    def enabled():
+        return settings.DEBUG and settings.BLOG_QUERYCHECK
+
+    @staticmethod
+    def log(request, inspector):
+        for problem in inspector.problems():
+            logger.warning('%s %s: %s', request.method, request.path, problem)
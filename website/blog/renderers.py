@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import math
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:     # без orjson работает стандартный JSONRenderer
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def has_nonfinite(data):
+    """ Есть ли в данных NaN или бесконечность (orjson пишет их как null). """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson. Даты, время и UUID orjson записывает сам (в том же виде,
+    что поля сериализаторов DRF), подклассы dict и list (ReturnDict, ReturnList,
+    OrderedDict) - без копирования. Остальные типы (Decimal, ленивые строки и т.д.)
+    преобразует стандартный JSONEncoder DRF. Без пакета orjson - обычный JSONRenderer.
+
+    Чего orjson не умеет так же, как JSONRenderer, отдается JSONRenderer: ключи не строки
+    ({1: 'a'} - {"1": "a"}), целые больше 64 бит и NaN/бесконечность, которые JSONRenderer
+    в строгом режиме (STRICT_JSON) не пропускает, а orjson записал бы как null.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2   # другого отступа orjson не умеет
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=option)
+        except TypeError:   # orjson.JSONEncodeError тоже
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.strict and b'null' in ret and has_nonfinite(data):
+            return super().render(data, accepted_media_type, renderer_context)     # ValueError, как у DRF
+        # как JSONRenderer: U+2028 и U+2029 экранируем, иначе ответ нельзя вставить в JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Рендерер для построчной выгрузки: stream() превращает поток пачек строк
+    (списков словарей) в поток байтов, не собирая весь ответ в памяти.
+    """
+    charset = 'utf-8'
+
+    def stream(self, chunks):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(self.stream([rows]))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, chunks):
+        for rows in chunks:
+            yield ''.join(
+                json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows
+            ).encode(self.charset)
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, chunks):
+        writer = None
+        buffer = io.StringIO()
+        for rows in chunks:
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(buffer, fieldnames=list(row), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(row)
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
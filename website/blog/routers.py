@@ -0,0 +1,98 @@
+"""
+Чтение с реплик базы данных.
+
+Реплики (BLOG_DB_REPLICAS) используются только для безопасных запросов (GET, HEAD, OPTIONS)
+к наборам представлений с ReplicaReadMixin - PostViewSet и UserViewSet. Запись,
+аутентификация, сессии и админка всегда работают с основной базой.
+
+Реплики отстают от основной базы. Чтобы пользователь сразу видел свои изменения,
+после успешного изменяющего запроса его чтение на BLOG_DB_REPLICA_LAG секунд
+закрепляется за основной базой (read-your-writes). По той же причине в это время
+не кэшируются ответы, прочитанные с реплики (blog.cache.CachedResponseMixin).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import permissions
+
+_read_replica = ContextVar('blog_read_replica', default=False)
+
+
+def choose_replica():
+    return random.choice(settings.BLOG_DB_REPLICAS)
+
+
+def reading_from_replica():
+    """ Читают ли запросы к базе в текущем контексте с реплики. """
+    return _read_replica.get() and bool(settings.BLOG_DB_REPLICAS)
+
+
+def _pin_key(user):
+    return f'blog:replica:pin:{user.pk}'
+
+
+def _written_key(resource):
+    return f'blog:replica:written:{resource}'
+
+
+def pin_primary(user):
+    """ Закрепляет чтение пользователя за основной базой на время отставания реплик. """
+    if settings.BLOG_DB_REPLICAS and user and user.is_authenticated:
+        caches[settings.BLOG_CACHE_ALIAS].set(_pin_key(user), True, timeout=settings.BLOG_DB_REPLICA_LAG)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and caches[settings.BLOG_CACHE_ALIAS].get(_pin_key(user)))
+
+
+def mark_written(resource):
+    """ Отмечает изменение ресурса: реплики могут еще отдавать старые данные. """
+    if settings.BLOG_DB_REPLICAS:
+        caches[settings.BLOG_CACHE_ALIAS].set(_written_key(resource), True, timeout=settings.BLOG_DB_REPLICA_LAG)
+
+
+def replica_may_be_stale(resource):
+    return reading_from_replica() and bool(caches[settings.BLOG_CACHE_ALIAS].get(_written_key(resource)))
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись - в основную базу, чтение - с реплики, если его разрешил ReplicaReadMixin.
+    """
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return choose_replica()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # явно, иначе объект, прочитанный с реплики, сохранялся бы в нее же
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True     # на репликах те же данные
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема реплик приходит из основной базы вместе с данными
+        return db not in settings.BLOG_DB_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы к набору представлений читают с реплик, см. описание модуля.
+    Аутентификация и проверка прав выполняются до переключения, по основной базе.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if settings.BLOG_DB_REPLICAS and request.method in permissions.SAFE_METHODS and not is_pinned(request.user):
+            self._replica_token = _read_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = self.__dict__.pop('_replica_token', None)
+        if token is not None:
+            _read_replica.reset(token)
+        if request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            pin_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
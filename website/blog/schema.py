@@ -0,0 +1,225 @@
+"""
+Готовая схема OpenAPI для /swagger/ и /redoc/.
+
+drf_yasg строит схему, обходя все представления и сериализаторы, на каждый запрос
+?format=openapi, swagger.json или swagger.yaml. Здесь схема (JSON и YAML) строится один раз
+командой python manage.py generate_schema (или при первом запросе) и хранится в файлах
+BLOG_SCHEMA_DIR, а отдается как статический файл с ETag.
+
+Рядом с файлами хранится отпечаток того, из чего схема строится: маршрутов, исходного кода
+представлений, их сериализаторов и всего кода приложений проекта, к которым они относятся
+(модели, фильтры, постраничный вывод), версий пакетов и настроек DRF и drf_yasg. Если отпечаток
+процесса не совпадает с сохраненным (изменились маршруты или сериализаторы), схема
+строится заново и перезаписывается.
+"""
+import hashlib
+import importlib.metadata
+import inspect
+import logging
+import os
+import sys
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLResolver, get_resolver
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.renderers import _SpecRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+
+from .cache import etag_matches
+
+logger = logging.getLogger(__name__)
+
+# файл схемы -> кодек drf_yasg; форматы запроса openapi и .json отдаются из одного файла
+SCHEMA_FILES = {'openapi.json': OpenAPICodecJson, 'openapi.yaml': OpenAPICodecYaml}
+FORMAT_FILES = {'openapi': 'openapi.json', '.json': 'openapi.json', '.yaml': 'openapi.yaml'}
+FINGERPRINT_FILE = 'fingerprint'
+PACKAGES = ('Django', 'djangorestframework', 'drf-yasg', 'dj-rest-auth', 'django-allauth')
+
+
+def _walk(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+# каталоги приложения, код которых в схему не попадает
+SKIP_DIRS = {'tests', 'migrations', 'management', '__pycache__'}
+
+
+def _schema_modules(view):
+    """ Модуль представления и модули классов, из которых drf_yasg строит его схему. """
+    module = sys.modules.get(view.__module__)
+    modules = {module}
+    for value in vars(module).values():
+        if inspect.isclass(value) and issubclass(value, serializers.BaseSerializer):
+            modules.add(sys.modules.get(value.__module__))
+    queryset = getattr(view, 'queryset', None)
+    classes = [
+        getattr(view, 'serializer_class', None),
+        getattr(view, 'filterset_class', None),
+        getattr(view, 'pagination_class', None),
+        queryset.model if queryset is not None else None,
+        *getattr(view, 'filter_backends', ()),
+    ]
+    for cls in filter(None, classes):
+        modules.add(sys.modules.get(cls.__module__))
+    return modules
+
+
+def _app_files(modules, base_dir):
+    """
+    Файлы кода приложений проекта, к которым относятся modules: модели, фильтры и прочее,
+    что представление может использовать косвенно (например, verbose_name полей).
+    """
+    files = set()
+    app_configs = {apps.get_containing_app_config(module.__name__) for module in modules if module}
+    for app_config in app_configs:
+        if app_config is None or not Path(app_config.path).resolve().is_relative_to(base_dir):
+            continue
+        for path in Path(app_config.path).rglob('*.py'):
+            if not SKIP_DIRS & set(path.relative_to(app_config.path).parts[:-1]):
+                files.add(path.resolve())
+    return files
+
+
+@lru_cache(maxsize=None)
+def schema_fingerprint():
+    """ Отпечаток всего, от чего зависит схема; считается один раз на процесс. """
+    digest = hashlib.sha256()
+    resolver = get_resolver()
+    modules = {sys.modules.get(resolver.urlconf_name) if isinstance(resolver.urlconf_name, str) else None}
+    for route, callback in sorted(_walk(resolver.url_patterns), key=lambda item: item[0]):
+        view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None) or callback
+        digest.update(f'{route} {view.__module__}.{view.__qualname__}\n'.encode())
+        modules |= _schema_modules(view)
+
+    # код проекта - по содержимому файлов, сторонние пакеты - по версиям
+    base_dir = Path(settings.BASE_DIR).resolve()
+    files = {Path(module.__file__).resolve() for module in modules if getattr(module, '__file__', None)}
+    files |= _app_files(modules, base_dir)
+    for path in sorted(file for file in files if file.is_relative_to(base_dir)):
+        digest.update(path.read_bytes())
+    for package in PACKAGES:
+        try:
+            digest.update(f'{package}=={importlib.metadata.version(package)}\n'.encode())
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    for name in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+                 'DEFAULT_PAGINATION_CLASS', 'DEFAULT_VERSIONING_CLASS'):
+        digest.update(repr(getattr(api_settings, name)).encode())
+    digest.update(repr(sorted(getattr(settings, 'SWAGGER_SETTINGS', {}).items())).encode())
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """ Содержимое файлов схемы: все маршруты, без привязки к адресу сервера. """
+    # url='' - без host и schemes: swagger и redoc обращаются к серверу, с которого открыты
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(swagger_settings.DEFAULT_INFO, url='')
+    # представления строят queryset по запросу, как при открытии /swagger/ анонимным пользователем
+    request = Request(APIRequestFactory().get('/swagger.json'))
+    request.user = AnonymousUser()
+    schema = generator.get_schema(request=request, public=True)
+    return {name: codec([]).encode(schema) for name, codec in SCHEMA_FILES.items()}
+
+
+def _write(path, content):
+    # файл заменяется целиком: другие процессы не прочитают его наполовину записанным
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+        file.write(content)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def write_schema(directory, files, fingerprint):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in files.items():
+        _write(directory / name, content)
+    # отпечаток пишется последним: с ним файлы схемы уже полные
+    _write(directory / FINGERPRINT_FILE, fingerprint.encode())
+
+
+def read_schema(directory, fingerprint):
+    """ Файлы схемы из directory или None, если их нет или они построены для другого отпечатка. """
+    try:
+        if (directory / FINGERPRINT_FILE).read_text() != fingerprint:
+            return None
+        return {name: (directory / name).read_bytes() for name in SCHEMA_FILES}
+    except OSError:
+        return None
+
+
+class SchemaStore:
+    """ Файлы схемы процесса с их ETag; при несовпадении отпечатка схема строится заново. """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._files = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._files is None:
+                fingerprint = schema_fingerprint()
+                files = read_schema(self.directory, fingerprint)
+                if files is None:
+                    files = generate_schema()
+                    try:
+                        write_schema(self.directory, files, fingerprint)
+                    except OSError as exc:
+                        logger.warning('Схема API не сохранена в %s: %s', self.directory, exc)
+                self._files = {name: (content, '"%s"' % hashlib.sha256(content).hexdigest()[:32])
+                               for name, content in files.items()}
+        return self._files
+
+    def get(self, format):
+        """ (содержимое, ETag) схемы в формате рендерера drf_yasg: openapi, .json или .yaml. """
+        return self.load()[FORMAT_FILES[format]]
+
+
+_store = None
+
+
+def get_schema_store():
+    global _store
+    if _store is None or _store.directory != Path(settings.BLOG_SCHEMA_DIR):
+        _store = SchemaStore(settings.BLOG_SCHEMA_DIR)
+    return _store
+
+
+def get_precomputed_schema_view(**kwargs):
+    """
+    get_schema_view drf_yasg, отдающий схему из файлов SchemaStore. Параметры те же,
+    схема всегда публичная (все маршруты, независимо от пользователя).
+    """
+    base = get_schema_view(public=True, **kwargs)
+
+    class PrecomputedSchemaView(base):
+        def get(self, request, version='', format=None):
+            renderer = request.accepted_renderer
+            if not isinstance(renderer, _SpecRenderer):
+                # страница swagger или redoc: схема для нее строится без маршрутов
+                return super().get(request, version, format)
+            content, etag = get_schema_store().get(renderer.format)
+            if etag_matches(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(content, content_type=f'{renderer.media_type}; charset=utf-8')
+            response['ETag'] = etag
+            response['Cache-Control'] = 'no-cache'
+            return response
+
+    return PrecomputedSchemaView
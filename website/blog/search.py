@@ -0,0 +1,195 @@
+"""
+Полнотекстовый поиск по заголовку и тексту постов.
+
+Индекс поддерживается инкрементально обработчиками сигналов Post (blog.signals)
+через очередь фоновых задач (blog.tasks, задачи index_posts и remove_from_index),
+бэкенд выбирается настройкой BLOG_SEARCH_BACKEND, по умолчанию - по типу базы:
+для SQLite это виртуальная таблица FTS5, для остальных - простой поиск по icontains.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .tasks import task
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+class BaseSearchBackend:
+    """
+    Интерфейс бэкенда поиска.
+    """
+    def index(self, posts):
+        """ Добавляет или обновляет посты в индексе. """
+        raise NotImplementedError
+
+    def remove(self, pks):
+        """ Удаляет посты из индекса. """
+        raise NotImplementedError
+
+    def rebuild(self):
+        """ Строит индекс заново по всем постам. """
+        raise NotImplementedError
+
+    def search(self, query, limit=None):
+        """ Возвращает id найденных постов, самые релевантные первыми. """
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """
+        Посты queryset, подходящие под запрос, без ранжирования (поиск в админке).
+        По умолчанию - не больше BLOG_SEARCH_MAX_RESULTS самых релевантных: список id
+        уходит в запрос параметрами, а их число в SQLite ограничено.
+        """
+        return queryset.filter(pk__in=self.search(query, limit=settings.BLOG_SEARCH_MAX_RESULTS))
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Поиск без индекса (icontains), для баз без полнотекстового поиска.
+    Совпадения в заголовке идут первыми.
+    """
+    def index(self, posts):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def rebuild(self):
+        pass
+
+    @staticmethod
+    def conditions(terms):
+        """ Условия (все слова в заголовке, все слова в тексте). """
+        in_title = Q()
+        in_body = Q()
+        for term in terms:
+            in_title &= Q(title__icontains=term)
+            in_body &= Q(body__icontains=term)
+        return in_title, in_body
+
+    def filter(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        in_title, in_body = self.conditions(terms)
+        return queryset.filter(in_title | in_body)
+
+    def search(self, query, limit=None):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        in_title, in_body = self.conditions(terms)
+        queryset = Post.objects.filter(in_title | in_body).annotate(
+            rank=Case(When(in_title, then=Value(1)), default=Value(0), output_field=IntegerField())
+        ).order_by('-rank', '-created_at').values_list('pk', flat=True)
+        if limit is not None:
+            queryset = queryset[:limit]
+        return list(queryset)
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Индекс в виртуальной таблице SQLite FTS5 (создается миграцией 0003),
+    rowid записи индекса совпадает с id поста. Ранжирование - bm25,
+    совпадение в заголовке весит больше совпадения в тексте.
+    """
+    table = 'blog_post_fts'
+    title_weight = 10.0
+    body_weight = 1.0
+
+    def _connection(self, write=False):
+        alias = router.db_for_write(Post) if write else router.db_for_read(Post)
+        return connections[alias or 'default']
+
+    def index(self, posts):
+        posts = list(posts)
+        if not posts:
+            return
+        self.remove([post.pk for post in posts])
+        with self._connection(write=True).cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, body) VALUES (%s, %s, %s)',
+                [(post.pk, post.title, post.body) for post in posts],
+            )
+
+    def remove(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(pks))})', pks
+            )
+
+    def rebuild(self):
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(f'INSERT INTO {self.table} (rowid, title, body) SELECT id, title, body FROM blog_post')
+
+    @staticmethod
+    def match_expression(query):
+        # каждое слово берем в кавычки, чтобы пользовательский ввод не разбирался
+        # как синтаксис FTS5, последнее слово ищем по префиксу
+        terms = ['"%s"' % term.replace('"', '""') for term in search_terms(query)]
+        if terms:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def filter(self, queryset, query):
+        # подзапрос к индексу, а не список id: совпадений может быть сколько угодно
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [expression]))
+
+    def search(self, query, limit=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        sql = (f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+               f'ORDER BY bm25({self.table}, %s, %s)')
+        params = [expression, self.title_weight, self.body_weight]
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with self._connection().cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    backend = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    vendor = connections[router.db_for_write(Post) or 'default'].vendor
+    return BACKENDS.get(vendor, SimpleSearchBackend)()
+
+
+@task
+def index_posts(pks):
+    """ Обновляет посты в индексе; посты читаются заново, удаленные к этому времени убираются из индекса. """
+    posts = list(Post.objects.filter(pk__in=pks).only('id', 'title', 'body'))
+    backend = get_search_backend()
+    backend.index(posts)
+    backend.remove(set(pks) - {post.pk for post in posts})
+
+
+@task
+def remove_from_index(pks):
+    get_search_backend().remove(pks)
@@ -1,16 +1,179 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import permissions, serializers
 
-from .models import Post
+from . import metrics
+from .models import AuthorStats, Post
 
 
-class PostSerializer(serializers.ModelSerializer):
+def _query_param_set(request, name):
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def expanded_fields(request):
+    """
+    Поля, которые клиент попросил развернуть: ?expand=author
+    """
+    return _query_param_set(request, 'expand') or set()
+
+
+def included_fields(request):
+    """
+    Дополнительные данные, которые клиент попросил добавить: ?include=stats
+    """
+    return _query_param_set(request, 'include') or set()
+
+
+class DynamicFieldsMixin:
+    """
+    Оставляет в ответе только поля из ?fields=id,title,created_at.
+
+    Без параметра отдаются поля default_fields (если заданы) или все поля Meta.fields.
+    """
+    default_fields = None
+
+    @classmethod
+    def selected_fields(cls, request):
+        fields = _query_param_set(request, 'fields')
+        if fields is None:
+            fields = cls.default_fields or cls.Meta.fields
+        return set(fields) & set(cls.Meta.fields)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field_names = self.selected_fields(self.context.get('request'))
+        for name in set(self.fields) - field_names:
+            self.fields.pop(name)
+
+
+class TimedDataMixin:
+    """
+    Время получения данных сериализатора попадает в метрики запроса (blog.metrics).
+    """
+    @property
+    def data(self):
+        with metrics.phase('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Связанный объект по pk. Если объекты загружены заранее (prefetched),
+    берет объект оттуда, а не запрашивает каждый отдельно.
+    """
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None and isinstance(data, int) and data in self.prefetched:
+            return self.prefetched[data]
+        return super().to_internal_value(data)
+
+
+class BulkPostListSerializer(TimedListSerializer):
+    """
+    Массовое создание и изменение постов одним INSERT/UPDATE на пачку.
+    """
+    def to_internal_value(self, data):
+        # авторов всех объектов загружаем одним запросом
+        field = self.child.fields.get('author')
+        if isinstance(data, list) and isinstance(field, PrefetchedPrimaryKeyRelatedField):
+            pks = {item['author'] for item in data if isinstance(item, dict) and isinstance(item.get('author'), int)}
+            field.prefetched = field.get_queryset().in_bulk(pks)
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        return self.child.Meta.model.objects.bulk_create(
+            [self.child.Meta.model(**attrs) for attrs in validated_data],
+            batch_size=settings.BLOG_BULK_BATCH_SIZE,
+        )
+
+    def update(self, instances, validated_data):
+        fields = {'updated_at'}
+        now = timezone.now()
+        for instance, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            instance.updated_at = now   # bulk_update не заполняет auto_now
+            fields.update(attrs)
+        self.child.Meta.model.objects.bulk_update(instances, fields, batch_size=settings.BLOG_BULK_BATCH_SIZE)
+        return instances
+
+
+class AuthorStatsSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
-        model = Post
-        fields = ('id', 'author', 'title', 'body', 'created_at',)
+        model = AuthorStats
+        fields = ('post_count', 'last_post_at',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()    # в случае своей модели пользователя, вернет ее
         fields = ('id', 'username',)
+        list_serializer_class = TimedListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'stats' in included_fields(self.context.get('request')):
+            self.fields['stats'] = serializers.SerializerMethodField()
+
+    def get_stats(self, obj):
+        # UserViewSet загружает счетчики через select_related('post_stats')
+        try:
+            stats = obj.post_stats
+        except AuthorStats.DoesNotExist:
+            stats = AuthorStats(user=obj)   # у автора еще не было постов
+        return AuthorStatsSerializer(stats).data
+
+
+class PostSerializer(TimedDataMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    class Meta:
+        model = Post
+        fields = ('id', 'author', 'title', 'body', 'created_at',)
+        list_serializer_class = BulkPostListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # вместо id автора отдаем его целиком, чтобы клиенту не запрашивать /users/<id>/ на каждый пост
+        if 'author' in self.fields and 'author' in expanded_fields(self.context.get('request')):
+            self.fields['author'] = UserSerializer(read_only=True)
+
+
+class PostListSerializer(PostSerializer):
+    """
+    Список постов: вместо полного текста отдаем начало поста (excerpt).
+    Полный текст можно запросить явно: ?fields=id,title,body
+    """
+    excerpt = serializers.SerializerMethodField()
+
+    default_fields = ('id', 'author', 'title', 'excerpt', 'created_at',)
+    compiled_sources = {'excerpt': 'excerpt'}   # колонка, которую добавляет PostViewSet.get_queryset
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ('excerpt',)
+
+    def get_excerpt(self, obj):
+        # PostViewSet вырезает начало текста прямо в SQL, см. get_queryset
+        excerpt = getattr(obj, 'excerpt', None)
+        if excerpt is None:
+            excerpt = obj.body[:settings.BLOG_EXCERPT_LENGTH]
+        return excerpt
+
+
+class PostExportSerializer(PostSerializer):
+    """
+    Выгрузка постов: добавляем updated_at, по нему клиент забирает только изменения (?updated_since=).
+    """
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ('updated_at',)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import stats
+from .authentication import get_token_cache
+from .cache import bump_version
+from .models import Post
+from .search import get_search_backend, index_posts, remove_from_index
+from .tasks import runs_immediately
+
+
+def posts_saved(posts, created=False, reindex=True):
+    """
+    Побочные эффекты сохранения постов: сброс кэша ответов, счетчики авторов
+    и обновление поискового индекса. Вызывается и напрямую из массовых операций
+    (bulk_create, bulk_update, update), которые сигналов не посылают.
+    Индекс обновляется фоновой задачей (blog.tasks), кэш и счетчики - сразу,
+    в транзакции запроса: следующий запрос клиента уже должен их видеть.
+    """
+    bump_version('posts')
+    if created:
+        stats.posts_created(posts)
+    else:
+        stats.posts_moved(posts)
+    if reindex:
+        if runs_immediately():
+            # без очереди индексируем уже загруженные посты, не перечитывая их
+            get_search_backend().index(posts)
+        else:
+            index_posts.delay([post.pk for post in posts])
+
+
+def posts_deleted(posts):
+    """ Побочные эффекты удаления постов, см. posts_saved. """
+    bump_version('posts')
+    stats.posts_deleted(posts)
+    remove_from_index.delay([post.pk for post in posts])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    posts_saved([instance], created=created,
+                reindex=update_fields is None or bool({'title', 'body'} & set(update_fields)))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    posts_deleted([instance])
+
+
+@receiver(post_init, sender=get_user_model())
+def user_loaded(sender, instance, **kwargs):
+    # имя на момент загрузки (None, если поле отложено): сравним с ним при сохранении
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # имя автора встраивается в посты при ?expand=author: кэш постов сбрасываем, только если
+    # имя изменилось, а не при регистрации, входе, смене пароля и т.п.
+    if update_fields is None or 'username' in update_fields:
+        username = instance.__dict__.get('username')
+        if not created and username is not None and username != instance._loaded_username:
+            bump_version('posts')
+        instance._loaded_username = username
+    # в кэше токенов лежит копия пользователя: блокировка или смена прав должны действовать сразу
+    if not created and (update_fields is None or set(update_fields) - {'last_login'}):
+        get_token_cache().invalidate(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # выход через dj-rest-auth удаляет токен
+    get_token_cache().invalidate([instance.key])
@@ -0,0 +1,101 @@
+"""
+Замер запуска процесса Django для команды profile_startup.
+
+measure() выполняется в отдельном, только что запущенном интерпретаторе
+(python -c "from blog.startup import main; main()") с нужным DJANGO_SETTINGS_MODULE:
+django.setup() с временем импорта и ready() каждого приложения, загрузка маршрутов
+и создание приложения WSGI (промежуточные слои), затем RSS и число загруженных модулей.
+Результат печатается в stdout в JSON.
+"""
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def rss_kb():
+    """ Текущий RSS процесса в КиБ (на Linux - из /proc, иначе пиковый из getrusage). """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+
+
+def measure():
+    start = time.perf_counter()
+    modules_before = len(sys.modules)
+    rss_before = rss_kb()
+
+    import django
+    from django.apps.config import AppConfig
+
+    apps = {}
+    create = AppConfig.create.__func__
+    import_models = AppConfig.import_models
+
+    def timed_ready(app_config, ready):
+        def wrapper():
+            ready_start = time.perf_counter()
+            try:
+                return ready()
+            finally:
+                apps[app_config.label]['ready_ms'] = (time.perf_counter() - ready_start) * 1000
+        return wrapper
+
+    def timed_create(cls, entry):
+        create_start = time.perf_counter()
+        app_config = create(cls, entry)
+        apps[app_config.label] = {'name': app_config.name,
+                                  'import_ms': (time.perf_counter() - create_start) * 1000, 'ready_ms': 0.0}
+        app_config.ready = timed_ready(app_config, app_config.ready)
+        return app_config
+
+    def timed_import_models(app_config):
+        models_start = time.perf_counter()
+        try:
+            return import_models(app_config)
+        finally:
+            apps[app_config.label]['import_ms'] += (time.perf_counter() - models_start) * 1000
+
+    AppConfig.create = classmethod(timed_create)
+    AppConfig.import_models = timed_import_models
+    setup_start = time.perf_counter()
+    try:
+        django.setup(set_prefix=False)
+    finally:
+        AppConfig.create = classmethod(create)
+        AppConfig.import_models = import_models
+    setup_ms = (time.perf_counter() - setup_start) * 1000
+
+    from django.urls import get_resolver
+    urls_start = time.perf_counter()
+    get_resolver().url_patterns
+    urls_ms = (time.perf_counter() - urls_start) * 1000
+
+    from django.core.wsgi import get_wsgi_application
+    wsgi_start = time.perf_counter()
+    get_wsgi_application()
+    wsgi_ms = (time.perf_counter() - wsgi_start) * 1000
+
+    from django.conf import settings
+    return {
+        'settings': settings.SETTINGS_MODULE,
+        'total_ms': (time.perf_counter() - start) * 1000,
+        'setup_ms': setup_ms,
+        'urls_ms': urls_ms,
+        'wsgi_ms': wsgi_ms,
+        'modules': len(sys.modules) - modules_before,
+        'rss_kb': rss_kb(),
+        'rss_delta_kb': rss_kb() - rss_before,
+        'apps': apps,
+    }
+
+
+def main():
+    sys.stdout.write(json.dumps(measure()))
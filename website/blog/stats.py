@@ -0,0 +1,89 @@
+"""
+Денормализованные счетчики постов автора (AuthorStats).
+
+Обновляются из побочных эффектов сохранения и удаления постов (blog.signals)
+в той же транзакции, что и сами посты: счетчик меняется выражением F(),
+поэтому параллельные запросы не теряют приращения.
+Если счетчики все же разошлись с постами, их пересчитывает rebuild().
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Post
+
+
+def _by_author(posts, author_attr='author_id'):
+    """ {id автора: (число постов, самая поздняя дата создания)} """
+    groups = defaultdict(list)
+    for post in posts:
+        groups[getattr(post, author_attr)].append(post.created_at)
+    return {author_id: (len(dates), max(dates)) for author_id, dates in groups.items()}
+
+
+def _add(author_id, count, latest):
+    updated = AuthorStats.objects.filter(user_id=author_id).update(
+        post_count=F('post_count') + count,
+        last_post_at=Greatest(Coalesce('last_post_at', Value(latest)), Value(latest)),
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(user_id=author_id, post_count=count, last_post_at=latest)
+    except IntegrityError:
+        # строку успел создать параллельный запрос
+        _add(author_id, count, latest)
+
+
+def _subtract(author_id, count, latest):
+    AuthorStats.objects.filter(user_id=author_id).update(
+        post_count=Greatest(F('post_count') - count, Value(0)),
+    )
+    # дату последнего поста пересчитываем, только если удален последний пост
+    # (индекс (author, created_at) отдает ее одним шагом)
+    AuthorStats.objects.filter(user_id=author_id, last_post_at__lte=latest).update(
+        last_post_at=Subquery(
+            Post.objects.filter(author_id=OuterRef('user_id')).order_by('-created_at').values('created_at')[:1]
+        ),
+    )
+
+
+def posts_created(posts):
+    for author_id, (count, latest) in _by_author(posts).items():
+        _add(author_id, count, latest)
+    for post in posts:
+        post._loaded_author_id = post.author_id
+
+
+def posts_deleted(posts):
+    for author_id, (count, latest) in _by_author(posts).items():
+        _subtract(author_id, count, latest)
+
+
+def posts_moved(posts):
+    """ Переносит посты, у которых сменился автор, в счетчики нового автора. """
+    moved = [post for post in posts
+             if getattr(post, '_loaded_author_id', None) not in (None, post.author_id)]
+    if not moved:
+        return
+    for author_id, (count, latest) in _by_author(moved, author_attr='_loaded_author_id').items():
+        _subtract(author_id, count, latest)
+    posts_created(moved)
+
+
+def rebuild(batch_size=1000):
+    """ Пересчитывает счетчики всех авторов одним агрегирующим запросом. """
+    rows = Post.objects.values('author_id').annotate(
+        post_count=Count('id'), last_post_at=Max('created_at')
+    ).order_by()
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        stats = AuthorStats.objects.bulk_create(
+            [AuthorStats(user_id=row['author_id'], post_count=row['post_count'], last_post_at=row['last_post_at'])
+             for row in rows.iterator()],
+            batch_size=batch_size,
+        )
+    return len(stats)
@@ -0,0 +1,188 @@
+"""
+Фоновые задачи: медленные побочные эффекты запроса (отправка писем, обновление
+поискового индекса) выполняются вне запроса.
+
+Задача объявляется декоратором @task, task.delay(*args, **kwargs) ставит ее в очередь
+бэкенда BLOG_TASKS_BACKEND, а прямой вызов task(...) выполняет сразу:
+- immediate - выполняет задачу сразу в том же процессе (разработка, поведение без очереди);
+- database - сохраняет задание (blog.models.Job) в текущей транзакции: если транзакция
+  запроса откатится, задания не будет. Задания выполняет python manage.py run_tasks,
+  таких обработчиков может работать несколько - задание забирает условный UPDATE;
+- memory - складывает задания в список процесса, их выполняет run_pending() (тесты).
+
+Аргументы задач - значения JSON. Упавшее задание повторяется через
+BLOG_TASKS_RETRY_DELAY * 2^(попытка - 1) секунд, после max_attempts попыток остается
+в таблице со статусом failed и текстом ошибки.
+"""
+import functools
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    def __init__(self, func, max_attempts=None):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return get_backend().enqueue(self, list(args), kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+
+def task(func=None, *, max_attempts=None):
+    """ @task или @task(max_attempts=N); по умолчанию попыток BLOG_TASKS_MAX_ATTEMPTS. """
+    if func is None:
+        return functools.partial(task, max_attempts=max_attempts)
+    return Task(func, max_attempts)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.BLOG_TASKS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def new_job(task, args, kwargs):
+    return Job(name=task.name, args=args, kwargs=kwargs,
+               max_attempts=task.max_attempts or settings.BLOG_TASKS_MAX_ATTEMPTS)
+
+
+def execute(job):
+    """ Выполняет задание (attempts уже увеличен); возвращает текст ошибки или None. """
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задание %s (%s) завершилось ошибкой, попытка %d из %d',
+                         job.pk, job.name, job.attempts, job.max_attempts)
+        return traceback.format_exc()
+    return None
+
+
+def reschedule(job, error, now):
+    """ Повтор упавшего задания с задержкой или статус failed, если попытки кончились. """
+    job.last_error = error
+    job.locked_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = Job.FAILED
+    else:
+        job.status = Job.QUEUED
+        job.run_at = now + retry_delay(job.attempts)
+
+
+class ImmediateBackend:
+
+    def enqueue(self, task, args, kwargs):
+        task(*args, **kwargs)
+
+
+class MemoryBackend:
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, task, args, kwargs):
+        job = new_job(task, args, kwargs)
+        self.jobs.append(job)
+        return job
+
+    def run_pending(self, now=None):
+        """ Выполняет задания, время которых пришло (и поставленные ими); возвращает их число. """
+        count = 0
+        while True:
+            current = now or timezone.now()
+            due = [job for job in self.jobs if job.status == Job.QUEUED and job.run_at <= current]
+            if not due:
+                return count
+            for job in due:
+                job.attempts += 1
+                error = execute(job)
+                if error is None:
+                    self.jobs.remove(job)
+                else:
+                    reschedule(job, error, current)
+                count += 1
+
+    def clear(self):
+        self.jobs.clear()
+
+
+class DatabaseBackend:
+
+    def enqueue(self, task, args, kwargs):
+        job = new_job(task, args, kwargs)
+        job.save()
+        return job
+
+    def claim(self, limit):
+        """
+        Забирает в работу до limit готовых заданий: в очереди с наступившим run_at или
+        выполняющихся дольше BLOG_TASKS_TIMEOUT (обработчик, взявший их, завершился).
+        Задание забирает условный UPDATE по (id, status, attempts): из нескольких
+        обработчиков его получит только один.
+        """
+        now = timezone.now()
+        stale = Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.BLOG_TASKS_TIMEOUT))
+        # зависшее задание без оставшихся попыток больше не запускаем
+        Job.objects.filter(stale, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, locked_at=None, last_error='Превышено время выполнения (BLOG_TASKS_TIMEOUT)')
+
+        claimed = []
+        candidates = Job.objects.filter(Q(status=Job.QUEUED, run_at__lte=now) | stale).order_by('run_at', 'id')
+        for job in candidates[:limit * 2]:
+            updated = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts).update(
+                status=Job.RUNNING, attempts=F('attempts') + 1, locked_at=now)
+            if updated:
+                job.status, job.attempts, job.locked_at = Job.RUNNING, job.attempts + 1, now
+                claimed.append(job)
+                if len(claimed) == limit:
+                    break
+        return claimed
+
+    def run(self, job):
+        """ Выполняет забранное задание: удачное удаляется, упавшее ставится на повтор. """
+        error = execute(job)
+        if error is None:
+            Job.objects.filter(pk=job.pk).delete()
+        else:
+            reschedule(job, error, timezone.now())
+            job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error'])
+        return error is None
+
+
+BACKENDS = {
+    'immediate': ImmediateBackend,
+    'memory': MemoryBackend,
+    'database': DatabaseBackend,
+}
+
+_backends = {}
+
+
+def get_backend():
+    """ Бэкенд BLOG_TASKS_BACKEND: имя из BACKENDS или путь к классу. """
+    name = settings.BLOG_TASKS_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        backend = BACKENDS[name]() if name in BACKENDS else import_string(name)()
+        backend = _backends.setdefault(name, backend)
+    return backend
+
+
+def runs_immediately():
+    """ Задачи выполняются сразу, в вызывающем коде (бэкенд immediate). """
+    return isinstance(get_backend(), ImmediateBackend)
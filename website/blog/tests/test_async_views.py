@@ -0,0 +1,103 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, AsyncClient, Client
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.posts = [Post.objects.create(author=cls.test_user, title=f'Post {i}', body='Body content...')
+                     for i in range(5)]
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        self.async_client = AsyncClient()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    async def assertSameAsSync(self, path, **params):
+        """ Асинхронный ответ совпадает с ответом синхронного API (кроме адресов ссылок). """
+        response = await self.async_client.get(f'/api/v1/async/{path}', params)
+        expected = await self.sync_get(f'/api/v1/{path}', params)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content.replace(b'/api/v1/async/', b'/api/v1/'), expected.content)
+        return response
+
+    async def sync_get(self, path, params):
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        return await sync_to_async(self.client.get)(path, params, HTTP_ACCEPT='application/json')
+
+
+class AsyncPostViewsTestCase(Settings):  # python manage.py test blog.tests.test_async_views.AsyncPostViewsTestCase
+
+    async def test_list(self):
+        response = await self.assertSameAsSync('')
+        self.assertEqual(len(json.loads(response.content)['results']), 5)
+
+    async def test_list_params(self):
+        await self.assertSameAsSync('', fields='id,title', expand='author', ordering='title')
+        await self.assertSameAsSync('', author=self.test_user2.id)
+
+    async def test_list_invalid_filter(self):
+        response = await self.assertSameAsSync('', author='x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_pages(self):
+        response = await self.async_client.get('/api/v1/async/', {'page_size': 2})
+        ids = []
+        while True:
+            data = json.loads(response.content)
+            ids += [post['id'] for post in data['results']]
+            if not data['next']:
+                break
+            self.assertIn('/api/v1/async/', data['next'])
+            response = await self.async_client.get(data['next'])
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    async def test_detail(self):
+        await self.assertSameAsSync(f'{self.posts[0].id}/')
+        await self.assertSameAsSync(f'{self.posts[0].id}/', expand='author')
+
+    async def test_detail_not_found(self):
+        response = await self.assertSameAsSync('999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_cache_and_etag(self):
+        response = await self.async_client.get('/api/v1/async/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = await self.async_client.get('/api/v1/async/', **{'If-None-Match': response['ETag']})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_read_only(self):
+        response = await self.async_client.post('/api/v1/async/', {'title': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsyncUserViewsTestCase(Settings):  # python manage.py test blog.tests.test_async_views.AsyncUserViewsTestCase
+
+    async def test_list(self):
+        await self.assertSameAsSync('users/')
+        await self.assertSameAsSync('users/', include='stats')
+
+    async def test_detail(self):
+        await self.assertSameAsSync(f'users/{self.test_user.id}/')
+        response = await self.assertSameAsSync('users/999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from blog.authentication import CachedTokenAuthentication, TokenCache, get_token_cache, local_stats
+from blog.cache import LocalLRUCache
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        get_token_cache().clear()
+        self.token = Token.objects.create(user=self.test_user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def assertRejected(self, response):
+        # первый класс аутентификации - сессии, поэтому DRF отвечает 403, а не 401
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['detail'].code, 'authentication_failed')
+
+    def token_queries(self, path='/api/v1/users/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **self.headers)
+        return response, [query['sql'] for query in queries if 'authtoken_token' in query['sql']]
+
+
+class CachedTokenAuthenticationTestCase(Settings):  # python manage.py test blog.tests.test_authentication
+
+    def test_second_request_skips_database(self):
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+        hits = local_stats.hits
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+        self.assertEqual(local_stats.hits, hits + 1)
+
+    def test_invalid_token(self):
+        self.assertRejected(self.client.get('/api/v1/users/', HTTP_AUTHORIZATION='Token wrong'))
+
+    def test_token_delete(self):
+        self.token_queries()
+        Token.objects.filter(pk=self.token.pk).delete()
+        response, _ = self.token_queries()
+        self.assertRejected(response)
+
+    def test_logout(self):
+        self.token_queries()
+        response = self.client.post('/api/v1/dj-rest-auth/logout/', **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response, _ = self.token_queries()
+        self.assertRejected(response)
+
+    def test_deactivation(self):
+        self.token_queries()
+        user = get_user_model().objects.get(pk=self.test_user.pk)
+        user.is_active = False
+        user.save()
+        response, _ = self.token_queries()
+        self.assertRejected(response)
+
+    def test_login_does_not_invalidate(self):
+        self.token_queries()
+        self.client.login(username='test_user', password='abc123')    # обновляет только last_login
+        self.client.logout()
+        _, queries = self.token_queries()
+        self.assertEqual(queries, [])
+
+    def test_cached_user_is_copied(self):
+        self.token_queries()
+        user, _ = get_token_cache().get(self.token.key)
+        self.assertEqual(user.pk, self.test_user.pk)
+        with mock.patch('blog.authentication.TokenAuthentication.authenticate_credentials') as db_lookup:
+            request_user, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        db_lookup.assert_not_called()
+        self.assertIsNot(request_user, user)
+
+    def test_invalidated_during_lookup(self):
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def lookup_then_logout(auth, key):
+            # выход в другом потоке, пока этот читает токен из базы
+            result = lookup(auth, key)
+            get_token_cache().invalidate([key])
+            return result
+
+        with mock.patch('blog.authentication.TokenAuthentication.authenticate_credentials', lookup_then_logout):
+            CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        # без удаления пара кэшируется
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+
+    def test_local_timeout(self):
+        self.assertEqual(get_token_cache().local.timeout, settings.BLOG_TOKEN_CACHE_LOCAL_TIMEOUT)
+        self.assertEqual(TokenCache(max_entries=10, timeout=60, local_timeout=5).local.timeout, 5)
+
+    def test_stats_view(self):
+        response = self.client.get('/api/v1/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = get_user_model().objects.create_user(username='admin', password='abc123', is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get('/api/v1/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('hit_rate', response.data['tokens']['local'])
+        self.assertIn('hit_rate', response.data['responses'])
+
+
+@override_settings(BLOG_TOKEN_CACHE_ALIAS='default')
+class SharedTokenCacheTestCase(Settings):  # python manage.py test blog.tests.test_authentication.SharedTokenCacheTestCase
+
+    def setUp(self) -> None:
+        super().setUp()
+        caches['default'].clear()
+
+    def test_other_process_sees_shared_entry(self):
+        self.token_queries()
+        other = TokenCache(max_entries=10, timeout=60)     # кэш другого процесса
+        user, token = other.get(self.token.key)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_invalidation_clears_other_process(self):
+        self.token_queries()
+        other = TokenCache(max_entries=10, timeout=60)
+        self.assertIsNotNone(other.get(self.token.key))
+
+        Token.objects.filter(pk=self.token.pk).delete()
+        self.assertIsNone(other.get(self.token.key))
+        self.assertEqual(len(other.local), 0)
+
+    def test_invalidated_in_other_process_during_lookup(self):
+        other = TokenCache(max_entries=10, timeout=60)
+        generation = get_token_cache().current_generation()
+        value = TokenAuthentication().authenticate_credentials(self.token.key)
+        other.invalidate([self.token.key])
+        get_token_cache().set(self.token.key, value, generation)
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        self.assertIsNone(caches['default'].get(TokenCache.make_key(self.token.key)))
+
+
+class LocalLRUCacheTestCase(TestCase):  # python manage.py test blog.tests.test_authentication.LocalLRUCacheTestCase
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalLRUCache(max_entries=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_expires(self):
+        cache = LocalLRUCache(max_entries=2, timeout=60)
+        cache.set('a', 1)
+        with mock.patch('blog.cache.time.monotonic', return_value=10 ** 12):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
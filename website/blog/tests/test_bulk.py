@@ -0,0 +1,138 @@
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import Post
+from blog.search import get_search_backend
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.own_post = Post.objects.create(author=cls.test_user, title='Own', body='Body content...')
+        cls.other_post = Post.objects.create(author=cls.test_user2, title='Other', body='Body content...')
+
+        cls.client = Client()
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.test_user)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class BulkCreateTestCase(Settings):  # python manage.py test blog.tests.test_bulk.BulkCreateTestCase
+
+    def posts(self, count):
+        return [{'author': self.test_user.id, 'title': f'Bulk {i}', 'body': 'bulk body'} for i in range(count)]
+
+    def test_queries_do_not_grow(self):
+        # сессия, пользователь, SAVEPOINT, авторы, INSERT, счетчик автора,
+        # поисковый индекс (DELETE + INSERT), RELEASE
+        for count in (5, 50):
+            with self.subTest(count=count), self.assertNumQueries(9):
+                self.auth_client.post('/api/v1/bulk/', data=self.posts(count), content_type='application/json')
+
+    def test_create_json(self):
+        response = self.auth_client.post('/api/v1/bulk/', data=self.posts(50), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 50)
+        self.assertEqual(Post.objects.filter(title__startswith='Bulk').count(), 50)
+        self.assertIsNotNone(response.data[0]['id'])
+        self.assertIsNotNone(response.data[0]['created_at'])
+
+    def test_create_ndjson(self):
+        body = '\n'.join(json.dumps(post) for post in self.posts(3)) + '\n\n'
+        response = self.auth_client.post('/api/v1/bulk/', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.filter(title__startswith='Bulk').count(), 3)
+
+    def test_ndjson_parse_error(self):
+        response = self.auth_client.post('/api/v1/bulk/', data='{"title": 1}\n{oops', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Строка 2', response.data['detail'])
+
+    def test_per_item_errors_nothing_written(self):
+        posts = self.posts(3)
+        del posts[1]['title']
+        response = self.auth_client.post('/api/v1/bulk/', data=posts, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertFalse(Post.objects.filter(title__startswith='Bulk').exists())
+
+    def test_unauth(self):
+        response = self.client.post('/api/v1/bulk/', data=self.posts(1), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_not_a_list(self):
+        response = self.auth_client.post('/api/v1/bulk/', data=self.posts(1)[0], content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BLOG_BULK_MAX_ITEMS=2)
+    def test_too_many(self):
+        response = self.auth_client.post('/api/v1/bulk/', data=self.posts(3), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cache_and_search_updated(self):
+        self.client.get('/api/v1/')
+        self.auth_client.post('/api/v1/bulk/', data=self.posts(2), content_type='application/json')
+        self.assertEqual(len(self.client.get('/api/v1/').data['results']), 4)
+        self.assertEqual(len(get_search_backend().search('bulk')), 2)
+
+
+class BulkUpdateDeleteTestCase(Settings):  # python manage.py test blog.tests.test_bulk.BulkUpdateDeleteTestCase
+
+    def test_update(self):
+        post = Post.objects.create(author=self.test_user, title='Second', body='...')
+        response = self.auth_client.patch('/api/v1/bulk/', content_type='application/json', data=[
+            {'id': self.own_post.id, 'title': 'Own mod'}, {'id': post.id, 'body': 'searchable'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Post.objects.get(pk=self.own_post.id).title, 'Own mod')
+        self.assertEqual(Post.objects.get(pk=post.id).body, 'searchable')
+        self.assertGreater(Post.objects.get(pk=post.id).updated_at, post.updated_at)
+        self.assertEqual(get_search_backend().search('searchable'), [post.id])
+
+    def test_update_not_author(self):
+        response = self.auth_client.patch('/api/v1/bulk/', content_type='application/json', data=[
+            {'id': self.own_post.id, 'title': 'Own mod'}, {'id': self.other_post.id, 'title': 'Other mod'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.get(pk=self.own_post.id).title, 'Own')
+
+    def test_update_errors(self):
+        response = self.auth_client.patch('/api/v1/bulk/', content_type='application/json', data=[
+            {'title': 'No id'}, {'id': 100, 'title': 'Missing'}, {'id': self.own_post.id, 'title': 'x' * 200},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1])
+
+        response = self.auth_client.patch('/api/v1/bulk/', content_type='application/json', data=[
+            {'id': self.own_post.id, 'title': 'x' * 200},
+        ])
+        self.assertEqual(response.data['errors'][0]['errors'].keys(), {'title'})
+
+    def test_delete(self):
+        response = self.auth_client.delete('/api/v1/bulk/', data=[self.own_post.id], content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=self.own_post.id).exists())
+
+    def test_delete_not_author(self):
+        response = self.auth_client.delete('/api/v1/bulk/', data=[self.own_post.id, {'id': self.other_post.id}],
+                                           content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Post.objects.filter(pk=self.own_post.id).exists())
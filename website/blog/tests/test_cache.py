@@ -0,0 +1,141 @@
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.cache import response_stats
+from blog.filecache import LockedFileBasedCache
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_post = Post.objects.create(author=cls.test_user, title='Post title', body='Body content...')
+
+        cls.client = Client()
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.test_user)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class CachedResponseTestCase(Settings):  # python manage.py test blog.tests.test_cache
+
+    def test_second_request_is_hit(self):
+        hits = response_stats.hits
+        first = self.client.get('/api/v1/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(response_stats.hits, hits + 1)
+
+    def test_query_params_in_key(self):
+        self.client.get('/api/v1/')
+        response = self.client.get('/api/v1/', {'page_size': 1})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_if_none_match(self):
+        etag = self.client.get(f'/api/v1/{self.test_post.id}/')['ETag']
+        response = self.client.get(f'/api/v1/{self.test_post.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_invalidated_on_update(self):
+        etag = self.client.get(f'/api/v1/{self.test_post.id}/')['ETag']
+        self.auth_client.patch(f'/api/v1/{self.test_post.id}/', data={'title': 'New title'},
+                               content_type='application/json')
+        response = self.client.get(f'/api/v1/{self.test_post.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'New title')
+
+    def test_invalidated_on_create_and_delete(self):
+        self.client.get('/api/v1/')
+        post = Post.objects.create(author=self.test_user, title='Another', body='...')
+        response = self.client.get('/api/v1/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        post.delete()
+        response = self.client.get('/api/v1/')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_user_save_keeps_posts_cached(self):
+        self.client.get('/api/v1/')
+        get_user_model().objects.create_user(username='new_user', password='abc123')
+        user = get_user_model().objects.get(pk=self.test_user.pk)
+        user.set_password('new_password')
+        user.save()
+        user.first_name = 'Имя'
+        user.save()
+        self.assertEqual(self.client.get('/api/v1/')['X-Cache'], 'HIT')
+
+    def test_invalidated_on_username_change(self):
+        self.client.get('/api/v1/', {'expand': 'author'})
+        user = get_user_model().objects.get(pk=self.test_user.pk)
+        user.username = 'renamed_user'
+        user.save(update_fields=['username'])
+        response = self.client.get('/api/v1/', {'expand': 'author'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['author']['username'], 'renamed_user')
+        # повторное сохранение с тем же именем кэш не сбрасывает
+        user.save()
+        self.assertEqual(self.client.get('/api/v1/', {'expand': 'author'})['X-Cache'], 'HIT')
+
+    def test_errors_not_cached(self):
+        self.client.get('/api/v1/100/')
+        post = Post.objects.create(author=self.test_user, title='Another', body='...')
+        response = self.client.get(f'/api/v1/{post.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LockedFileBasedCacheTestCase(TestCase):  # python manage.py test blog.tests.test_cache.LockedFileBasedCacheTestCase
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_incr(self):
+        cache = LockedFileBasedCache(self.directory, {})
+        with self.assertRaises(ValueError):
+            cache.incr('counter')
+        self.assertTrue(cache.add('counter', 1, timeout=60))
+        self.assertFalse(cache.add('counter', 5))
+        self.assertEqual(cache.incr('counter', 2), 3)
+        self.assertEqual(cache.get('counter'), 3)
+        cache.set('expired', 1, timeout=-1)
+        with self.assertRaises(ValueError):
+            cache.incr('expired')
+
+    def test_concurrent_incr(self):
+        # у каждого потока свой экземпляр кэша, как у процессов gunicorn
+        LockedFileBasedCache(self.directory, {}).add('counter', 0, timeout=None)
+
+        def worker():
+            cache = LockedFileBasedCache(self.directory, {})
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(LockedFileBasedCache(self.directory, {}).get('counter'), 200)
@@ -0,0 +1,168 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.conditional import post_etag
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.test_post = Post.objects.create(author=cls.test_user, title='Post title', body='Body content...')
+
+        cls.client = Client()
+        cls.auth_client = Client()
+        cls.not_author = Client()
+        cls.auth_client.force_login(cls.test_user)
+        cls.not_author.force_login(cls.test_user2)
+
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def current_etag(self):
+        post = Post.objects.get(pk=1)
+        return post_etag(post.pk, post.updated_at)
+
+    def patch(self, client, title, etag=None, url='/api/v1/1/'):
+        headers = {'HTTP_IF_MATCH': etag} if etag else {}
+        return client.patch(url, data={'title': title}, content_type='application/json', **headers)
+
+
+class ConditionalGetTestCase(Settings):  # python manage.py test blog.tests.test_conditional.ConditionalGetTestCase
+
+    def test_etag_is_post_version(self):
+        response = self.client.get('/api/v1/1/')
+        self.assertEqual(response['ETag'], self.current_etag())
+        # ETag не зависит от выбранных полей и не меняется, пока пост не изменен
+        response = self.client.get('/api/v1/1/', {'fields': 'id,title'})
+        self.assertEqual(response['ETag'], self.current_etag())
+
+    def test_not_modified_from_cache(self):
+        etag = self.client.get('/api/v1/1/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_not_modified_reads_only_version(self):
+        etag = self.client.get('/api/v1/1/')['ETag']
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"body"', queries[0]['sql'])
+
+    def test_modified(self):
+        etag = self.client.get('/api/v1/1/')['ETag']
+        self.patch(self.auth_client, 'Changed')
+        response = self.client.get('/api/v1/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Changed')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_expanded_author(self):
+        etag = self.client.get('/api/v1/1/', {'expand': 'author'})['ETag']
+        self.assertTrue(etag.startswith(self.current_etag()[:-1] + '-'))
+        user = get_user_model().objects.get(pk=self.test_user.pk)
+        user.username = 'renamed'
+        user.save()
+        response = self.client.get('/api/v1/1/', {'expand': 'author'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_async_detail_same_etag(self):
+        response = self.client.get('/api/v1/async/1/')
+        self.assertEqual(response['ETag'], self.current_etag())
+
+
+class IfMatchTestCase(Settings):  # python manage.py test blog.tests.test_conditional.IfMatchTestCase
+
+    def test_matching_version(self):
+        etag = self.client.get('/api/v1/1/')['ETag']
+        response = self.patch(self.auth_client, 'New title', etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], self.current_etag())
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_concurrent_editors(self):
+        etag = self.client.get('/api/v1/1/')['ETag']
+        self.assertEqual(self.patch(self.auth_client, 'First', etag).status_code, status.HTTP_200_OK)
+        response = self.patch(self.auth_client, 'Second', etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response.data['detail'].code, 'precondition_failed')
+        self.assertEqual(Post.objects.get(pk=1).title, 'First')
+
+    def test_version_checked_in_update(self):
+        etag = self.current_etag()
+        with CaptureQueriesContext(connection) as queries:
+            self.patch(self.auth_client, 'New title', etag)
+        sql = [query['sql'] for query in queries]
+        self.assertFalse([query for query in sql if query.startswith('SELECT') and '"blog_post"' in query])
+        self.assertTrue(any(query.startswith('UPDATE "blog_post"') and '"updated_at" IN' in query for query in sql))
+
+    def test_put(self):
+        response = self.auth_client.put('/api/v1/1/', content_type='application/json', HTTP_IF_MATCH='"1-0"',
+                                        data={'author': self.test_user.id, 'title': 'Put', 'body': 'Put body'})
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_delete(self):
+        response = self.auth_client.delete('/api/v1/1/', HTTP_IF_MATCH='"1-0"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Post.objects.filter(pk=1).exists())
+        response = self.auth_client.delete('/api/v1/1/', HTTP_IF_MATCH=self.current_etag())
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_any_of_etags(self):
+        response = self.patch(self.auth_client, 'New title', f'"1-0", W/{self.current_etag()}, {self.current_etag()}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_weak_or_other_post_etag(self):
+        self.assertEqual(self.patch(self.auth_client, 'x', 'W/' + self.current_etag()).status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(self.patch(self.auth_client, 'x', self.current_etag().replace('"1-', '"2-')).status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_invalid_version(self):
+        for etag in ('"1-999999999999999999999999999999"', '"1-²"'):
+            with self.subTest(etag=etag):
+                self.assertEqual(self.patch(self.auth_client, 'x', etag).status_code,
+                                 status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_without_if_match(self):
+        self.assertEqual(self.patch(self.auth_client, 'x').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.patch(self.auth_client, 'y', '*').status_code, status.HTTP_200_OK)
+
+    def test_not_found_and_forbidden_before_precondition(self):
+        self.assertEqual(self.patch(self.not_author, 'x', '"1-0"').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.patch(self.auth_client, 'x', '"999-0"', url='/api/v1/999/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    @override_settings(BLOG_FAST_WRITES=False)
+    def test_regular_path(self):
+        etag = self.current_etag()
+        response = self.patch(self.auth_client, 'First', etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], self.current_etag())
+        self.assertEqual(self.patch(self.auth_client, 'Second', etag).status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(self.auth_client.delete('/api/v1/1/', HTTP_IF_MATCH=etag).status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import Post
+from blog.serializers import PostExportSerializer
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.posts = [Post.objects.create(author=cls.test_user, title=f'Post {i}', body=f'Body, "{i}"\nline')
+                     for i in range(5)]
+        cls.client = Client()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+@override_settings(BLOG_EXPORT_CHUNK_SIZE=2)
+class ExportTestCase(Settings):  # python manage.py test blog.tests.test_export
+
+    @staticmethod
+    def content(response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response = self.client.get('/api/v1/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(rows, list(PostExportSerializer(self.posts, many=True).data))
+
+    def test_csv(self):
+        response = self.client.get('/api/v1/export/', {'format': 'csv'})
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[3]['body'], self.posts[3].body)
+        self.assertEqual(list(rows[0]), list(PostExportSerializer.Meta.fields))
+
+    def test_updated_since(self):
+        Post.objects.filter(pk=self.posts[1].pk).update(title='Changed')
+        Post.objects.get(pk=self.posts[1].pk).save()
+        watermark = self.posts[4].updated_at.isoformat()
+        response = self.client.get('/api/v1/export/', {'updated_since': watermark})
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Changed'])
+
+    def test_invalid_updated_since(self):
+        response = self.client.get('/api/v1/export/', {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('updated_since', json.loads(response.content))
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/v1/export/', {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
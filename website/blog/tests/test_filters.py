@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+
+        cls.now = timezone.now().replace(microsecond=0)
+        cls.posts = []
+        for i, title in enumerate(['b', 'd', 'a', 'c']):
+            post = Post.objects.create(author=cls.test_user if i % 2 else cls.test_user2, title=title, body='...')
+            Post.objects.filter(pk=post.pk).update(created_at=cls.now - timedelta(days=i),
+                                                   updated_at=cls.now - timedelta(days=10 - i))
+            cls.posts.append(post)
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class PostFilterTestCase(Settings):  # python manage.py test blog.tests.test_filters.PostFilterTestCase
+
+    def titles(self, **params):
+        response = self.client.get('/api/v1/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in response.data['results']]
+
+    def test_author(self):
+        self.assertEqual(self.titles(author=self.test_user.id), ['d', 'c'])
+
+    def test_created_range(self):
+        after = (self.now - timedelta(days=2)).isoformat()
+        before = (self.now - timedelta(days=1)).isoformat()
+        self.assertEqual(self.titles(created_after=after), ['b', 'd', 'a'])
+        self.assertEqual(self.titles(created_after=after, created_before=before), ['a'])
+
+    def test_created_after_date(self):
+        self.assertEqual(self.titles(created_after=(self.now + timedelta(days=1)).date().isoformat()), [])
+
+    def test_invalid_params(self):
+        response = self.client.get('/api/v1/', {'author': 'me', 'created_before': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'author', 'created_before'})
+
+    def test_invalid_author_id(self):
+        # '²' - цифра для isdigit(), но не число; слишком большой id не помещается в поле базы
+        for author in ('²', '-1', '999999999999999999999999999999'):
+            for url in ('/api/v1/', '/api/v1/async/'):
+                with self.subTest(author=author, url=url):
+                    response = self.client.get(url, {'author': author})
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertEqual(set(response.json()), {'author'})
+
+
+class PostOrderingTestCase(Settings):  # python manage.py test blog.tests.test_filters.PostOrderingTestCase
+
+    def walk(self, **params):
+        response = self.client.get('/api/v1/', {'page_size': 1, **params})
+        titles = [post['title'] for post in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            titles += [post['title'] for post in response.data['results']]
+        return titles
+
+    def test_default(self):
+        self.assertEqual(self.walk(), ['b', 'd', 'a', 'c'])
+
+    def test_updated_at(self):
+        self.assertEqual(self.walk(ordering='-updated_at'), ['c', 'a', 'd', 'b'])
+        self.assertEqual(self.walk(ordering='updated_at'), ['b', 'd', 'a', 'c'])
+
+    def test_title(self):
+        self.assertEqual(self.walk(ordering='title'), ['a', 'b', 'c', 'd'])
+        self.assertEqual(self.walk(ordering='-title', author=self.test_user2.id), ['b', 'a'])
+
+    def test_title_previous(self):
+        response = self.client.get('/api/v1/', {'page_size': 2, 'ordering': 'title'})
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([post['title'] for post in response.data['results']], ['a', 'b'])
+
+    def test_unknown_field_ignored(self):
+        self.assertEqual(self.walk(ordering='body'), ['b', 'd', 'a', 'c'])
@@ -0,0 +1,187 @@
+import json
+import re
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog import metrics
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.admin = get_user_model().objects.create_superuser(username='admin', password='admin_password')
+        cls.test_post = Post.objects.create(author=cls.test_user, title='Post title', body='Body content...')
+
+        cls.client = Client()
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def scrape(self):
+        response = self.admin_client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    @staticmethod
+    def sample(text, name, **labels):
+        """ Значение серии метрики, метки сравниваются как подстрока. """
+        label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf'^{name}{{{re.escape(label_text)}[^}}]*}} (\S+)$', text, re.MULTILINE)
+        return float(match.group(1)) if match else None
+
+
+class MetricsMiddlewareTestCase(Settings):  # python manage.py test blog.tests.test_metrics.MetricsMiddlewareTestCase
+
+    def test_server_timing(self):
+        response = self.client.get('/api/v1/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'serialize;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_histograms_by_route(self):
+        self.client.get('/api/v1/')
+        self.client.get('/api/v1/')
+        self.client.get('/api/v1/1/')
+        self.client.get('/api/v1/users/')
+        text = self.scrape()
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_count',
+                                     route='posts-list', method='GET'), 2)
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_count',
+                                     route='posts-detail', method='GET'), 1)
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_count',
+                                     route='users-list', method='GET'), 1)
+        # второй запрос списка отдан из кэша: на два запроса один SQL-запрос к постам
+        self.assertGreaterEqual(self.sample(text, 'blog_http_request_db_queries_sum', route='posts-list'), 1)
+        self.assertGreater(self.sample(text, 'blog_http_request_serialize_seconds_sum', route='posts-detail'), 0)
+        self.assertGreater(self.sample(text, 'blog_http_response_size_bytes_sum', route='posts-detail'), 0)
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_bucket',
+                                     route='posts-list', method='GET', le='+Inf'), 2)
+
+    def test_db_queries_counted(self):
+        self.client.get('/api/v1/1/')
+        text = self.scrape()
+        self.assertEqual(self.sample(text, 'blog_http_request_db_queries_sum', route='posts-detail'), 1)
+
+    def test_auth_routes(self):
+        self.client.post('/api/v1/dj-rest-auth/login/', {'username': 'test_user', 'password': 'abc123'})
+        text = self.scrape()
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_count',
+                                     route='rest_login', method='POST'), 1)
+
+    @override_settings(BLOG_METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        response = self.client.get('/api/v1/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertIsNone(self.sample(self.scrape(), 'blog_http_request_duration_seconds_count',
+                                      route='posts-list'))
+
+    @override_settings(BLOG_METRICS_SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        self.assertFalse(self.client.get('/api/v1/').has_header('Server-Timing'))
+
+    def test_cache_counters(self):
+        self.client.get('/api/v1/')
+        self.client.get('/api/v1/')
+        self.assertIn('blog_cache_requests_total{cache="responses",result="hit"}', self.scrape())
+
+
+class MetricsViewTestCase(Settings):  # python manage.py test blog.tests.test_metrics.MetricsViewTestCase
+
+    def test_anonymous_forbidden(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(BLOG_METRICS_TOKEN='scrape-token')
+    def test_bearer_token(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-toke')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MetricsDirTestCase(Settings):  # python manage.py test blog.tests.test_metrics.MetricsDirTestCase
+
+    def setUp(self) -> None:
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        overrides = override_settings(BLOG_METRICS_DIR=directory.name, BLOG_METRICS_FLUSH_INTERVAL=3600)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def other_process(self, count):
+        """ Снимок другого процесса gunicorn с count запросами posts-list. """
+        snapshot = metrics.snapshot()
+        series = [['posts-list', 'GET'], [count] + [0] * len(metrics.LATENCY_BUCKETS), 0.001 * count, count]
+        snapshot['histograms'] = {metrics.request_duration.name: [series]}
+        snapshot['caches'] = {'responses': [count, 0]}
+        (self.directory / f'other-{count}.json').write_text(json.dumps(snapshot))
+
+    def test_processes_summed(self):
+        self.other_process(5)
+        self.other_process(7)
+        self.client.get('/api/v1/')
+        text = self.scrape()
+        self.assertEqual(self.sample(text, 'blog_http_request_duration_seconds_count',
+                                     route='posts-list', method='GET'), 13)
+        self.assertGreaterEqual(self.sample(text, 'blog_cache_requests_total', cache='responses', result='hit'), 12)
+        # снимок своего процесса записан при измерении и обновлен перед выводом
+        own = [path for path in self.directory.glob('*.json') if not path.name.startswith('other')]
+        self.assertEqual(len(own), 1)
+
+    def test_exited_processes_merged(self):
+        # три процесса, перезапущенных после --max-requests, оставляют один файл
+        for _ in range(3):
+            with mock.patch.object(metrics, '_process_file', (None, None)), \
+                    mock.patch.object(metrics, '_retired', False):
+                self.client.get('/api/v1/')
+                metrics.flush(force=True)
+                metrics.retire()
+            for histogram in metrics.HISTOGRAMS:
+                histogram.clear()
+        self.assertEqual([path.name for path in self.directory.glob('*.json')], [metrics.EXITED_FILE])
+        self.assertEqual(self.sample(self.scrape(), 'blog_http_request_duration_seconds_count',
+                                     route='posts-list', method='GET'), 3)
+
+    def test_clear_dir(self):
+        self.other_process(5)
+        metrics.clear_dir()
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+
+class HistogramTestCase(TestCase):  # python manage.py test blog.tests.test_metrics.HistogramTestCase
+
+    def test_cumulative_buckets(self):
+        histogram = metrics.Histogram('test_seconds', 'Тест.', (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(('posts-list', 'GET'), value)
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{route="posts-list",method="GET",le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="posts-list",method="GET",le="1"} 3', lines)
+        self.assertIn('test_seconds_bucket{route="posts-list",method="GET",le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_count{route="posts-list",method="GET"} 4', lines)
@@ -0,0 +1,80 @@
+from base64 import b64encode
+from urllib import parse
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.posts = [Post.objects.create(author=cls.test_user, title=f'Post {i}', body='Body content...')
+                     for i in range(5)]
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()     # ответы API кэшируются между тестами
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class KeysetPaginationTestCase(Settings):  # python manage.py test blog.tests.test_pagination
+
+    @staticmethod
+    def ids(response):
+        return [post['id'] for post in response.data['results']]
+
+    def test_first_page_newest_first(self):
+        response = self.client.get('/api/v1/', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response), [self.posts[4].id, self.posts[3].id])
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_walk_forward_and_back(self):
+        response = self.client.get('/api/v1/', {'page_size': 2})
+        pages = [self.ids(response)]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append(self.ids(response))
+        self.assertEqual(pages, [[p.id for p in reversed(self.posts[3:])],
+                                 [p.id for p in reversed(self.posts[1:3])],
+                                 [self.posts[0].id]])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.ids(response), pages[1])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(self.ids(response), pages[0])
+        self.assertIsNone(response.data['previous'])
+
+    def test_same_created_at_uses_id(self):
+        Post.objects.update(created_at=self.posts[0].created_at)
+        response = self.client.get('/api/v1/', {'page_size': 3})
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.ids(response), [self.posts[1].id, self.posts[0].id])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        # подделанный курсор с id, который не помещается в поле базы
+        querystring = parse.urlencode({'p': self.posts[0].created_at.isoformat(), 'i': 10 ** 30})
+        cursor = b64encode(querystring.encode()).decode()
+        response = self.client.get('/api/v1/', {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(BLOG_MAX_PAGE_SIZE=3)
+    def test_page_size_cap(self):
+        response = self.client.get('/api/v1/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 3)
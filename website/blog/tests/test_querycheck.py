@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+
+from blog.models import Post
+from blog.querycheck import QueryInspector, fingerprint
+from blog.tests.utils import QueryCountMixin, query_budget
+from blog.views import UserViewSet
+
+
+def users_without_stats(self):
+    # как было бы без select_related('post_stats'): счетчики загружаются на каждого пользователя
+    return get_user_model().objects.all()
+
+
+class Settings(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        authors = [get_user_model().objects.create_user(username=f'author_{i}') for i in range(5)]
+        for i, author in enumerate(authors * 2):
+            Post.objects.create(author=author, title=f'Post {i}', body='Body content...')
+
+        cls.client = Client()
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class FingerprintTestCase(TestCase):  # python manage.py test blog.tests.test_querycheck.FingerprintTestCase
+
+    def test_literals_and_parameters(self):
+        self.assertEqual(fingerprint('SELECT * FROM "t" WHERE "t"."id" = 15 AND "t"."name" = \'it\'\'s\''),
+                         'SELECT * FROM "t" WHERE "t"."id" = ? AND "t"."name" = ?')
+        self.assertEqual(fingerprint('SELECT *  FROM "t"\n WHERE "t"."id" = %s LIMIT 21'),
+                         'SELECT * FROM "t" WHERE "t"."id" = ? LIMIT ?')
+
+    def test_in_list(self):
+        self.assertEqual(fingerprint('SELECT * FROM "t" WHERE "id" IN (1, 2, 3)'),
+                         fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)'))
+
+    def test_names_with_digits(self):
+        self.assertEqual(fingerprint('SELECT "t1"."col2" FROM "t1"'), 'SELECT "t1"."col2" FROM "t1"')
+
+
+class QueryInspectorTestCase(Settings):  # python manage.py test blog.tests.test_querycheck.QueryInspectorTestCase
+
+    def test_no_problems(self):
+        with QueryInspector() as inspector:
+            self.client.get('/api/v1/users/', {'include': 'stats'})
+            self.client.get('/api/v1/', {'expand': 'author'})
+        self.assertEqual(inspector.problems(), [])
+        self.assertEqual(inspector.count, 2)
+
+    @mock.patch.object(UserViewSet, 'get_queryset', users_without_stats)
+    def test_repeated_with_location(self):
+        with QueryInspector() as inspector:
+            self.client.get('/api/v1/users/', {'include': 'stats'})
+        problems = inspector.problems()
+        self.assertEqual(len(problems), 1)
+        self.assertEqual(problems[0].kind, 'repeated')
+        self.assertEqual(problems[0].group.count, 5)
+        self.assertIn('blog_authorstats', problems[0].group.fingerprint)
+        location = problems[0].group.location
+        self.assertTrue(location.startswith('UserViewSet.list > UserSerializer.stats > blog/serializers.py:'),
+                        location)
+        self.assertTrue(location.endswith('in get_stats'), location)
+
+    def test_slow(self):
+        with QueryInspector(slow_ms=0) as inspector:
+            self.client.get('/api/v1/users/')
+        self.assertEqual([problem.kind for problem in inspector.problems()], ['slow'])
+
+    @override_settings(DEBUG=True)
+    @mock.patch.object(UserViewSet, 'get_queryset', users_without_stats)
+    def test_middleware_logs(self):
+        with self.assertLogs('blog.querycheck', 'WARNING') as logs:
+            self.client.get('/api/v1/users/', {'include': 'stats'})
+        self.assertIn('GET /api/v1/users/: repeated: 5 identical queries at UserViewSet.list', logs.output[0])
+
+    @mock.patch.object(UserViewSet, 'get_queryset', users_without_stats)
+    def test_middleware_off_without_debug(self):
+        with self.assertNoLogs('blog.querycheck'):
+            self.client.get('/api/v1/users/', {'include': 'stats'})
+
+
+class QueryBudgetTestCase(Settings):  # python manage.py test blog.tests.test_querycheck.QueryBudgetTestCase
+
+    @mock.patch.object(UserViewSet, 'get_queryset', users_without_stats)
+    def test_repeats_fail(self):
+        with self.assertRaisesMessage(AssertionError, 'UserSerializer.stats'):
+            with self.assertQueryBudget():
+                self.client.get('/api/v1/users/', {'include': 'stats'})
+        with self.assertQueryBudget(max_repeats=5):
+            self.client.get('/api/v1/users/', {'include': 'stats'})
+
+    def test_max_repeats(self):
+        with self.assertRaisesMessage(AssertionError, 'Query budget exceeded'):
+            with self.assertQueryBudget(max_repeats=1):
+                self.client.get('/api/v1/users/')
+                self.client.get('/api/v1/users/')
+        # 0 - не значение по умолчанию: не допускается ни одного выполнения запроса
+        with self.assertRaisesMessage(AssertionError, 'Query budget exceeded'):
+            with self.assertQueryBudget(max_repeats=0):
+                self.client.get('/api/v1/users/')
+
+    def test_max_queries(self):
+        with self.assertRaisesMessage(AssertionError, '2 queries executed, budget 1'):
+            with self.assertQueryBudget(max_queries=1):
+                self.client.get('/api/v1/users/')
+                self.client.get('/api/v1/')
+        with self.assertQueryBudget(max_queries=1):
+            self.client.get('/api/v1/users/')
+
+    @query_budget(max_queries=1)
+    def test_decorator(self):
+        self.client.get('/api/v1/', {'expand': 'author'})
@@ -0,0 +1,108 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from blog.models import Post
+from blog.parsers import FastJSONParser
+from blog.renderers import FastJSONRenderer
+
+
+class FastJSONTestCase(TestCase):  # python manage.py test blog.tests.test_renderers.FastJSONTestCase
+
+    data = {
+        'id': 1,
+        'title': 'Заголовок\u2028строка',
+        'created_at': datetime.datetime(2023, 4, 1, 10, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+        'date': datetime.date(2023, 4, 1),
+        'price': decimal.Decimal('1.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Обязательное поле.'),
+        'items': [{'a': None, 'b': True}],
+    }
+
+    def test_same_as_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_non_str_keys(self):
+        data = {'a': {1: 'a', None: 'b'}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(data), b'{"a":{"1":"a","null":"b"}}')
+
+    def test_big_int(self):
+        data = {'big': 2 ** 70, 'negative': -2 ** 64}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_nan(self):
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'a': None, 'items': [{'x': value}]})
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'a': None, 'items': [{'x': value}]})
+        # обычные null и числа не задевает
+        self.assertEqual(FastJSONRenderer().render({'a': None, 'x': 1.5}), b'{"a":null,"x":1.5}')
+
+    def test_indent(self):
+        content = FastJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(content, b'{\n  "a": [\n    1\n  ]\n}')
+
+    def test_fallback_without_orjson(self):
+        with mock.patch('blog.renderers.orjson', None), mock.patch('blog.parsers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": 1}')), {'a': 1})
+
+    def test_parse(self):
+        body = json.dumps({'title': 'Заголовок', 'items': [1, 2.5]}, ensure_ascii=False).encode()
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+
+class FastJSONApiTestCase(TestCase):  # python manage.py test blog.tests.test_renderers.FastJSONApiTestCase
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_post = Post.objects.create(author=cls.test_user, title='Заголовок', body='Текст поста')
+
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.test_user)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def test_response_matches_json_renderer(self):
+        for url in ('/api/v1/', '/api/v1/1/?expand=author', '/api/v1/users/'):
+            with self.subTest(url=url):
+                response = self.auth_client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_json_body(self):
+        response = self.auth_client.patch('/api/v1/1/', {'title': 'Новый заголовок'},
+                                          content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Новый заголовок')
+        response = self.auth_client.patch('/api/v1/1/', '{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
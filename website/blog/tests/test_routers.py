@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog import routers
+from blog.models import Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.test_post = Post.objects.create(author=cls.test_user, title='Post title', body='Body content...')
+
+        cls.client = Client()
+        cls.auth_client = Client()
+        cls.other_client = Client()
+        cls.auth_client.force_login(cls.test_user)
+        cls.other_client.force_login(cls.test_user2)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def replica_reads(self, client, method, url, **kwargs):
+        """ Ответ и число обращений к репликам во время запроса. """
+        with mock.patch('blog.routers.choose_replica', wraps=routers.choose_replica) as choose:
+            response = getattr(client, method)(url, **kwargs)
+        return response, choose.call_count
+
+
+@override_settings(BLOG_DB_REPLICAS=['replica_1'])
+class PrimaryReplicaRouterTestCase(Settings):  # python manage.py test blog.tests.test_routers.PrimaryReplicaRouterTestCase
+
+    def test_primary_by_default(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_replica_in_read_context(self):
+        token = routers._read_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Post), 'replica_1')
+            self.assertEqual(router.db_for_write(Post, instance=Post(pk=1)), 'default')
+        finally:
+            routers._read_replica.reset(token)
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(router.allow_migrate('replica_1', 'blog'))
+        self.assertTrue(router.allow_migrate('default', 'blog'))
+
+
+# реплика указывает на ту же тестовую базу, поэтому проверяем выбор базы, а не данные
+@override_settings(BLOG_DB_REPLICAS=['default'])
+class ReplicaReadMixinTestCase(Settings):  # python manage.py test blog.tests.test_routers.ReplicaReadMixinTestCase
+
+    def test_safe_requests_read_replica(self):
+        for url in ('/api/v1/', '/api/v1/1/', '/api/v1/users/', '/api/v1/users/1/stats/'):
+            with self.subTest(url=url):
+                response, reads = self.replica_reads(self.client, 'get', url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertGreater(reads, 0)
+
+    def test_authentication_reads_primary(self):
+        with mock.patch('blog.routers.choose_replica') as choose:
+            self.auth_client.get('/api/v1/cache-stats/')
+            self.auth_client.get('/api/v1/dj-rest-auth/user/')
+        choose.assert_not_called()
+
+    def test_writes_use_primary(self):
+        response, reads = self.replica_reads(self.auth_client, 'patch', '/api/v1/1/',
+                                             data={'title': 'New'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(reads, 0)
+
+    def test_read_your_writes(self):
+        self.auth_client.patch('/api/v1/1/', data={'title': 'New'}, content_type='application/json')
+        _, reads = self.replica_reads(self.auth_client, 'get', '/api/v1/1/')
+        self.assertEqual(reads, 0)
+        # остальные пользователи читают с реплики
+        _, reads = self.replica_reads(self.other_client, 'get', '/api/v1/1/', data={'fields': 'id'})
+        self.assertGreater(reads, 0)
+
+    def test_failed_write_does_not_pin(self):
+        self.other_client.patch('/api/v1/1/', data={'title': 'New'}, content_type='application/json')
+        _, reads = self.replica_reads(self.other_client, 'get', '/api/v1/1/')
+        self.assertGreater(reads, 0)
+
+    def test_pin_expires(self):
+        self.auth_client.patch('/api/v1/1/', data={'title': 'New'}, content_type='application/json')
+        caches[settings.BLOG_CACHE_ALIAS].delete(routers._pin_key(self.test_user))
+        _, reads = self.replica_reads(self.auth_client, 'get', '/api/v1/1/')
+        self.assertGreater(reads, 0)
+
+    def test_replica_response_not_cached_after_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.auth_client.patch('/api/v1/1/', data={'title': 'New'}, content_type='application/json')
+        for _ in range(2):
+            response = self.client.get('/api/v1/1/')
+            self.assertEqual(response['X-Cache'], 'BYPASS')
+            self.assertTrue(response['ETag'])
+
+        caches[settings.BLOG_CACHE_ALIAS].delete(routers._written_key('posts'))
+        self.assertEqual(self.client.get('/api/v1/1/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/v1/1/')['X-Cache'], 'HIT')
+
+    def test_context_reset_after_request(self):
+        self.client.get('/api/v1/')
+        self.assertFalse(routers.reading_from_replica())
@@ -0,0 +1,130 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, override_settings
+from rest_framework import status
+
+from blog import schema
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.schema_dir = Path(self.directory.name) / 'schema'
+        overrides = override_settings(BLOG_SCHEMA_DIR=self.schema_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        schema._store = None
+        self.client = Client()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+        schema._store = None
+
+
+class SchemaViewTestCase(Settings):  # python manage.py test blog.tests.test_schema.SchemaViewTestCase
+
+    def test_json(self):
+        response = self.client.get('/swagger.json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+        data = json.loads(response.content)
+        self.assertIn('/api/v1/{id}/', data['paths'])
+        # схема не привязана к адресу сервера
+        self.assertNotIn('host', data)
+        self.assertEqual(self.client.get('/swagger/', {'format': 'openapi'}).content, response.content)
+
+    def test_yaml(self):
+        response = self.client.get('/swagger.yaml')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/yaml; charset=utf-8')
+        self.assertIn(b'swagger:', response.content)
+        self.assertNotEqual(response['ETag'], self.client.get('/swagger.json')['ETag'])
+
+    def test_etag(self):
+        response = self.client.get('/swagger.json')
+        response = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_generated_once(self):
+        with mock.patch('blog.schema.generate_schema', wraps=schema.generate_schema) as generate:
+            for _ in range(3):
+                self.client.get('/swagger.json')
+                self.client.get('/swagger.yaml')
+            self.assertEqual(generate.call_count, 1)
+            # другой процесс читает сохраненные файлы
+            schema._store = None
+            self.client.get('/swagger.json')
+            self.assertEqual(generate.call_count, 1)
+        self.assertTrue((self.schema_dir / 'openapi.json').exists())
+
+    def test_stale_fingerprint(self):
+        call_command('generate_schema', stdout=StringIO())
+        (self.schema_dir / 'fingerprint').write_text('old')
+        with mock.patch('blog.schema.generate_schema', wraps=schema.generate_schema) as generate:
+            self.assertEqual(self.client.get('/swagger.json').status_code, status.HTTP_200_OK)
+            self.assertEqual(generate.call_count, 1)
+        self.assertEqual((self.schema_dir / 'fingerprint').read_text(), schema.schema_fingerprint())
+
+    def test_ui(self):
+        for path in ('/swagger/', '/redoc/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+
+class GenerateSchemaTestCase(Settings):  # python manage.py test blog.tests.test_schema.GenerateSchemaTestCase
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('generate_schema', *args, stdout=out)
+        return out.getvalue()
+
+    def test_check(self):
+        with self.assertRaises(CommandError):
+            self.call('--check')
+        self.assertIn('Схема сохранена', self.call())
+        self.assertIn('актуальна', self.call('--check'))
+        # актуальная схема не перестраивается без --force
+        self.assertIn('актуальна', self.call())
+        self.assertIn('Схема сохранена', self.call('--force'))
+
+    def test_fingerprint_changes_with_routes(self):
+        fingerprint = schema.schema_fingerprint()
+        schema.schema_fingerprint.cache_clear()
+        self.addCleanup(schema.schema_fingerprint.cache_clear)
+        self.assertEqual(schema.schema_fingerprint(), fingerprint)
+        schema.schema_fingerprint.cache_clear()
+        with override_settings(ROOT_URLCONF='blog.urls'):
+            self.assertNotEqual(schema.schema_fingerprint(), fingerprint)
+
+    def test_fingerprint_changes_with_models(self):
+        fingerprint = schema.schema_fingerprint()
+        self.addCleanup(schema.schema_fingerprint.cache_clear)
+        read_bytes = Path.read_bytes
+        # модель (например verbose_name поля) и фильтры меняют схему, хотя представления не меняются
+        for name in ('models.py', 'filters.py', 'pagination.py'):
+            def edited(path, name=name):
+                return read_bytes(path) + b'\n# edited' if path.name == name else read_bytes(path)
+
+            with self.subTest(name=name), mock.patch.object(Path, 'read_bytes', edited):
+                schema.schema_fingerprint.cache_clear()
+                self.assertNotEqual(schema.schema_fingerprint(), fingerprint)
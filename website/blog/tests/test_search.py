@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import Post
+from blog.search import BaseSearchBackend, SimpleSearchBackend, SQLiteFTS5Backend
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.admin = get_user_model().objects.create_superuser(username='admin', password='admin_password')
+        cls.in_body = Post.objects.create(author=cls.test_user, title='Про котов',
+                                          body='Django и другие фреймворки')
+        cls.in_title = Post.objects.create(author=cls.test_user, title='Django ORM', body='Запросы к базе')
+        cls.other = Post.objects.create(author=cls.test_user, title='Другое', body='Совсем другое')
+
+        cls.client = Client()
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class SearchViewTestCase(Settings):  # python manage.py test blog.tests.test_search.SearchViewTestCase
+
+    @staticmethod
+    def ids(response):
+        return [post['id'] for post in response.data]
+
+    def test_title_ranked_first(self):
+        response = self.client.get('/api/v1/search/', {'q': 'django'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ids(response), [self.in_title.id, self.in_body.id])
+        self.assertIn('excerpt', response.data[0])
+
+    def test_prefix_and_case(self):
+        response = self.client.get('/api/v1/search/', {'q': 'КОТ'})
+        self.assertEqual(self.ids(response), [self.in_body.id])
+
+    def test_query_syntax_is_escaped(self):
+        response = self.client.get('/api/v1/search/', {'q': 'django" OR "*'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_query_required(self):
+        response = self.client.get('/api/v1/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_size(self):
+        response = self.client.get('/api/v1/search/', {'q': 'django', 'page_size': 1})
+        self.assertEqual(self.ids(response), [self.in_title.id])
+
+    def test_index_updated_on_save_and_delete(self):
+        post = Post.objects.get(pk=self.other.id)
+        post.body = 'Теперь и про Django'
+        post.save()
+        response = self.client.get('/api/v1/search/', {'q': 'django'})
+        self.assertIn(self.other.id, self.ids(response))
+
+        Post.objects.get(pk=self.in_title.id).delete()
+        response = self.client.get('/api/v1/search/', {'q': 'django'})
+        self.assertNotIn(self.in_title.id, self.ids(response))
+
+    def test_admin_search(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get('/admin/blog/post/', {'q': 'фреймворки'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.in_body])
+        # совпадения отбираются подзапросом к индексу, а не списком id в параметрах
+        self.assertTrue(any('MATCH' in query['sql'] and 'FROM "blog_post"' in query['sql'] for query in queries))
+
+
+class SearchBackendTestCase(Settings):  # python manage.py test blog.tests.test_search.SearchBackendTestCase
+
+    def test_rebuild(self):
+        backend = SQLiteFTS5Backend()
+        backend.remove([self.in_title.id, self.in_body.id])
+        self.assertEqual(backend.search('django'), [])
+        backend.rebuild()
+        self.assertEqual(backend.search('django'), [self.in_title.id, self.in_body.id])
+
+    def test_simple_backend(self):
+        self.assertEqual(SimpleSearchBackend().search('django'), [self.in_title.id, self.in_body.id])
+        self.assertEqual(SimpleSearchBackend().search('django', limit=1), [self.in_title.id])
+
+    def test_filter(self):
+        posts = Post.objects.all()
+        expected = {self.in_title.id, self.in_body.id}
+        for backend in (SQLiteFTS5Backend(), SimpleSearchBackend()):
+            with self.subTest(backend=type(backend).__name__):
+                self.assertEqual(set(backend.filter(posts, 'django').values_list('pk', flat=True)), expected)
+                self.assertFalse(backend.filter(posts, '!!!').exists())
+                self.assertFalse(backend.filter(posts.exclude(pk__in=expected), 'django').exists())
+
+    def test_filter_limited_without_subquery(self):
+        class Backend(BaseSearchBackend):
+            def search(self, query, limit=None):
+                return SimpleSearchBackend().search(query, limit)
+
+        with override_settings(BLOG_SEARCH_MAX_RESULTS=1):
+            self.assertEqual(list(Backend().filter(Post.objects.all(), 'django')), [self.in_title])
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import AuthorStats, Post
+
+
+class SeedBlogTestCase(TestCase):  # python manage.py test blog.tests.test_seed.SeedBlogTestCase
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_blog', '--users', '3', '--posts', '50', '--password', 'pw', *args, stdout=out)
+        return out.getvalue()
+
+    def test_seed(self):
+        self.assertIn('пользователей: 3, постов: 50', self.seed())
+        users = get_user_model().objects.filter(username__startswith='seed_user_')
+        self.assertEqual(users.count(), 3)
+        self.assertTrue(users[0].check_password('pw'))
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(sum(AuthorStats.objects.values_list('post_count', flat=True)), 50)
+        bodies = [len(body) for body in Post.objects.values_list('body', flat=True)]
+        self.assertGreater(len(set(bodies)), 10)    # длина текста разная
+
+        response = Client().get('/api/v1/search/', {'q': Post.objects.first().body.split()[0]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data)
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = list(Post.objects.order_by('pk').values_list('title', 'body'))
+        self.seed('--clear')
+        self.assertEqual(get_user_model().objects.filter(username__startswith='seed_user_').count(), 3)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('title', 'body')), first)
@@ -1,9 +1,16 @@
 from django.conf import settings
-from django.test import TestCase
+from django.core.cache import caches
+from django.db.models.functions import Substr
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
+from blog.compiled import compile_serializer
 from blog.models import Post
-from blog.serializers import PostSerializer, UserSerializer
+from blog.serializers import PostListSerializer, PostSerializer, UserSerializer
 
 
 class Settings(TestCase):
@@ -31,9 +38,77 @@ class PostSerializerTestCase(Settings):     # python manage.py test blog.tests.t
         self.assertEqual(data, expected_data)
 
 
+class PostListSerializerTestCase(Settings):     # python manage.py test blog.tests.test_serializers.PostListSerializerTestCase
+    """ Тестируем PostListSerializer. """
+    def test_ok(self):
+        data = PostListSerializer(self.test_post).data
+        expected_data = {'id': 1, 'author': 1, 'title': 'Post title', 'excerpt': 'Body content...',
+                         'created_at': self.test_post.created_at.isoformat().replace("+00:00", "Z")
+                         }
+        self.assertEqual(data, expected_data)
+
+    @override_settings(BLOG_EXCERPT_LENGTH=4)
+    def test_excerpt_truncated(self):
+        data = PostListSerializer(self.test_post).data
+        self.assertEqual(data['excerpt'], 'Body')
+
+
 class UserSerializerTestCase(Settings):     # python manage.py test blog.tests.test_serializers.UserSerializerTestCase
     """ Тестируем PostSerializer. """
     def test_ok(self):
         data = UserSerializer(self.test_user).data
         expected_data = {'id': 1, 'username': 'test_user'}
         self.assertEqual(data, expected_data)
+
+
+class CompiledSerializerTestCase(Settings):     # python manage.py test blog.tests.test_serializers.CompiledSerializerTestCase
+    """ Сгенерированная сериализация (blog.compiled) дает то же, что сериализаторы. """
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.client = Client()
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc123')
+        for i in range(5):
+            Post.objects.create(author=cls.test_user2, title=f'Заголовок {i}', body='Текст поста ' * 30)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    def compiled_data(self, serializer, queryset):
+        compiled = compile_serializer(serializer)
+        return compiled.to_representation(queryset.values(*compiled.columns))
+
+    def test_same_data(self):
+        request = Request(APIRequestFactory().get('/', {'expand': 'author'}))
+        posts = Post.objects.annotate(excerpt=Substr('body', 1, settings.BLOG_EXCERPT_LENGTH)).order_by('id')
+        for serializer_class, context in ((PostSerializer, {}), (PostListSerializer, {}),
+                                          (PostListSerializer, {'request': request})):
+            with self.subTest(serializer=serializer_class.__name__, context=context):
+                self.assertEqual(self.compiled_data(serializer_class(context=context), posts),
+                                 serializer_class(posts, many=True, context=context).data)
+        users = get_user_model().objects.order_by('id')
+        self.assertEqual(self.compiled_data(UserSerializer(), users), UserSerializer(users, many=True).data)
+
+    def test_current_timezone(self):
+        posts = Post.objects.order_by('id')
+        with timezone.override('Europe/Moscow'):
+            data = self.compiled_data(PostSerializer(), posts)
+            self.assertEqual(data, PostSerializer(posts, many=True).data)
+        self.assertTrue(data[0]['created_at'].endswith('+03:00'))
+
+    def test_not_compiled(self):
+        request = Request(APIRequestFactory().get('/', {'include': 'stats'}))
+        self.assertIsNone(compile_serializer(UserSerializer(context={'request': request})))
+
+    def test_api_same_content(self):
+        for url in ('/api/v1/', '/api/v1/?expand=author&page_size=2', '/api/v1/?fields=id,body&ordering=title',
+                    '/api/v1/users/', '/api/v1/users/?include=stats', '/api/v1/async/?expand=author',
+                    '/api/v1/async/users/'):
+            contents = []
+            for compiled in (False, True):
+                caches[settings.BLOG_CACHE_ALIAS].clear()
+                with self.subTest(url=url, compiled=compiled), override_settings(BLOG_COMPILED_SERIALIZERS=compiled):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    contents.append(response.content)
+            self.assertEqual(contents[0], contents[1], url)
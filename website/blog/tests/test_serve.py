@@ -0,0 +1,68 @@
+import importlib
+import json
+import os
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase
+
+from website import settings_production
+
+
+class ServeTestCase(TestCase):  # python manage.py test blog.tests.test_serve.ServeTestCase
+
+    def config(self, *args):
+        out = StringIO()
+        call_command('serve', '--print-config', *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_defaults(self):
+        with mock.patch('multiprocessing.cpu_count', return_value=4):
+            config = self.config()
+        self.assertEqual(config['workers'], 9)
+        self.assertEqual(config['worker_class'], 'sync')
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['bind'], ['0.0.0.0:8000'])
+        self.assertEqual(config['max_requests_jitter'], config['max_requests'] // 10)
+
+    def test_options(self):
+        config = self.config('--workers', '3', '--threads', '4', '--no-preload', '--bind', '127.0.0.1:9000',
+                             '--pid', '/tmp/blog.pid')
+        self.assertEqual(config['workers'], 3)
+        self.assertEqual(config['worker_class'], 'gthread')
+        self.assertFalse(config['preload_app'])
+        self.assertEqual(config['bind'], ['127.0.0.1:9000'])
+        self.assertEqual(config['pidfile'], '/tmp/blog.pid')
+        self.assertEqual(self.config('--asgi')['worker_class'], 'uvicorn.workers.UvicornWorker')
+
+
+class ProductionSettingsTestCase(TestCase):  # python manage.py test blog.tests.test_serve.ProductionSettingsTestCase
+
+    def test_profile(self):
+        self.assertFalse(settings_production.DEBUG)
+        self.assertFalse(settings_production.BLOG_QUERYCHECK)
+        self.assertEqual(settings_production.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'],
+                         ['blog.renderers.FastJSONRenderer'])
+        # остальные настройки REST_FRAMEWORK не меняются
+        self.assertEqual(settings_production.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'],
+                         settings.REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'])
+
+    def test_shared_caches(self):
+        for name in ('BLOG_CACHE_ALIAS', 'BLOG_TOKEN_CACHE_ALIAS', 'BLOG_THROTTLE_CACHE_ALIAS'):
+            alias = getattr(settings_production, name)
+            self.assertEqual(settings_production.CACHES[alias]['BACKEND'], 'blog.filecache.LockedFileBasedCache')
+        self.addCleanup(importlib.reload, settings_production)
+        # кэши в памяти одного процесса в продакшене не запускаются
+        for name in ('BLOG_CACHE_ALIAS', 'BLOG_TOKEN_CACHE_ALIAS', 'BLOG_THROTTLE_CACHE_ALIAS'):
+            for value in ('', 'default'):
+                with self.subTest(name=name, alias=value), mock.patch.dict(os.environ, {name: value}):
+                    with self.assertRaises(ImproperlyConfigured):
+                        importlib.reload(settings_production)
+        # счетчикам частоты запросов нужен атомарный incr
+        backend = 'django.core.cache.backends.filebased.FileBasedCache'
+        with mock.patch.dict(os.environ, {'BLOG_SHARED_CACHE_BACKEND': backend}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'BLOG_THROTTLE_CACHE_ALIAS'):
+                importlib.reload(settings_production)
@@ -0,0 +1,105 @@
+import tempfile
+import threading
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from blog.backends.sqlite3.base import DatabaseWrapper, _write_queue
+
+
+class TunedSQLiteTestCase(TestCase):  # python manage.py test blog.tests.test_sqlite_backend
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = str(Path(directory.name) / 'tuned.sqlite3')
+
+    def wrapper(self, cleanup=True, **options):
+        options = {
+            'timeout': 0.2,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-1024',
+            **options,
+        }
+        settings_dict = {**connection.settings_dict, 'ENGINE': 'blog.backends.sqlite3',
+                         'NAME': self.name, 'OPTIONS': options}
+        wrapper = DatabaseWrapper(settings_dict, alias='tuned')
+        if cleanup:
+            self.addCleanup(wrapper.close)
+        return wrapper
+
+    @staticmethod
+    def begin(wrapper):
+        # так транзакцию начинает atomic()
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit()
+
+    @staticmethod
+    def pragma(wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        wrapper = self.wrapper()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)    # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -1024)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 200)
+        self.assertEqual(self.pragma(wrapper, 'foreign_keys'), 1)   # стандартные настройки Django сохраняются
+
+    def test_begin_immediate_takes_write_lock(self):
+        first = self.wrapper()
+        second = self.wrapper()
+        self.begin(first)   # BEGIN IMMEDIATE
+        try:
+            with self.assertRaisesMessage(OperationalError, 'locked'):
+                self.begin(second)
+        finally:
+            first.rollback()
+
+    def test_write_queue(self):
+        wrapper = self.wrapper(write_queue=True)
+        queue = _write_queue(self.name)
+        self.begin(wrapper)
+        self.assertTrue(queue.locked())
+        wrapper.commit()
+        self.assertFalse(queue.locked())
+
+        self.begin(wrapper)
+        wrapper.rollback()
+        self.assertFalse(queue.locked())
+
+        self.begin(wrapper)
+        wrapper.close()
+        self.assertFalse(queue.locked())
+
+    def test_write_queue_waits(self):
+        first = self.wrapper(write_queue=True, timeout=5)
+        self.begin(first)
+        started = threading.Event()
+        results = []
+
+        def second_writer():
+            second = self.wrapper(cleanup=False, write_queue=True, timeout=5)  # закрывается в своем потоке
+            second.ensure_connection()
+            started.set()
+            self.begin(second)    # ждет в очереди, пока первый не завершит транзакцию
+            results.append(True)
+            second.rollback()
+            second.close()
+
+        thread = threading.Thread(target=second_writer)
+        thread.start()
+        started.wait()
+        thread.join(0.1)
+        self.assertEqual(results, [])
+        first.commit()
+        thread.join()
+        self.assertEqual(results, [True])
+
+    def test_invalid_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper(transaction_mode='LAZY').ensure_connection()
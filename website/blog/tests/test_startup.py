@@ -0,0 +1,57 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from rest_framework import status
+
+from website import settings_api
+
+
+class ProfileStartupTestCase(TestCase):  # python manage.py test blog.tests.test_startup.ProfileStartupTestCase
+
+    def test_profiles(self):
+        out = StringIO()
+        call_command('profile_startup', '--profiles', 'website.settings,website.settings_api', '--repeat', '1',
+                     '--importtime', '3', '--json', stdout=out)
+        full, api = json.loads(out.getvalue())
+        self.assertEqual(full['settings'], 'website.settings')
+        self.assertIn('drf_yasg', full['apps'])
+        self.assertGreater(full['apps']['blog']['ready_ms'], 0)
+        self.assertEqual(len(full['imports']), 3)
+        self.assertGreater(full['rss_kb'], 0)
+        self.assertNotIn('drf_yasg', api['apps'])
+        self.assertLess(api['modules'], full['modules'])
+
+
+class ApiSettingsTestCase(TestCase):  # python manage.py test blog.tests.test_startup.ApiSettingsTestCase
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def test_installed_apps(self):
+        for app in ('drf_yasg', 'allauth.socialaccount', 'dj_rest_auth.registration', 'django.contrib.admin'):
+            self.assertNotIn(app, settings_api.INSTALLED_APPS)
+        self.assertIn('django.contrib.admin.apps.SimpleAdminConfig', settings_api.INSTALLED_APPS)
+        self.assertFalse(settings_api.DEBUG)
+
+    @override_settings(ROOT_URLCONF='website.urls_api')
+    def test_urls(self):
+        client = Client()
+        self.assertEqual(client.get('/api/v1/').status_code, status.HTTP_200_OK)
+        self.assertEqual(client.post('/api/v1/dj-rest-auth/login/', {'username': 'x', 'password': 'y'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        for path in ('/admin/', '/swagger/', '/redoc/', '/api/v1/dj-rest-auth/registration/'):
+            with self.subTest(path=path):
+                self.assertEqual(client.get(path).status_code, status.HTTP_404_NOT_FOUND)
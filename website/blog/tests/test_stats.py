@@ -0,0 +1,125 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from blog.models import AuthorStats, Post
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.posts = [Post.objects.create(author=cls.test_user, title=f'Post {i}', body='Body content...')
+                     for i in range(3)]
+
+        cls.client = Client()
+        cls.auth_client = Client()
+        cls.auth_client.force_login(cls.test_user)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+    def assertStats(self, user, post_count, last_post_at):
+        stats = AuthorStats.objects.filter(user=user).first()
+        self.assertEqual((stats.post_count, stats.last_post_at) if stats else (0, None), (post_count, last_post_at))
+
+
+class AuthorStatsTestCase(Settings):  # python manage.py test blog.tests.test_stats.AuthorStatsTestCase
+
+    def test_create(self):
+        self.assertStats(self.test_user, 3, self.posts[2].created_at)
+        self.assertStats(self.test_user2, 0, None)
+
+    def test_delete_last_post(self):
+        Post.objects.get(pk=self.posts[2].pk).delete()
+        self.assertStats(self.test_user, 2, self.posts[1].created_at)
+
+    def test_delete_older_post(self):
+        Post.objects.get(pk=self.posts[0].pk).delete()
+        self.assertStats(self.test_user, 2, self.posts[2].created_at)
+
+    def test_delete_all(self):
+        Post.objects.filter(author=self.test_user).delete()
+        self.assertStats(self.test_user, 0, None)
+
+    def test_change_author(self):
+        post = Post.objects.get(pk=self.posts[2].pk)
+        post.author = self.test_user2
+        post.save()
+        self.assertStats(self.test_user, 2, self.posts[1].created_at)
+        self.assertStats(self.test_user2, 1, self.posts[2].created_at)
+
+    def test_api_create_and_delete(self):
+        response = self.auth_client.post('/api/v1/', {'author': self.test_user.id, 'title': 'New', 'body': 'New'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStats(self.test_user, 4, Post.objects.get(pk=response.data['id']).created_at)
+
+        response = self.auth_client.delete(f'/api/v1/{response.data["id"]}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertStats(self.test_user, 3, self.posts[2].created_at)
+
+    def test_bulk_create_and_delete(self):
+        items = [{'author': self.test_user.id, 'title': f'Bulk {i}', 'body': 'bulk'} for i in range(5)]
+        response = self.auth_client.post('/api/v1/bulk/', json.dumps(items), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStats(self.test_user, 8, Post.objects.latest('created_at', 'id').created_at)
+
+        ids = [post['id'] for post in response.data]
+        response = self.auth_client.delete('/api/v1/bulk/', json.dumps(ids), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertStats(self.test_user, 3, self.posts[2].created_at)
+        self.assertFalse(Post.objects.filter(pk__in=ids).exists())
+
+    def test_rebuild(self):
+        AuthorStats.objects.update(post_count=100, last_post_at=None)
+        AuthorStats.objects.create(user=self.test_user2, post_count=5)
+        out = StringIO()
+        call_command('rebuild_author_stats', stdout=out)
+        self.assertIn('для 1 авторов', out.getvalue())
+        self.assertStats(self.test_user, 3, self.posts[2].created_at)
+        self.assertStats(self.test_user2, 0, None)
+
+
+class UserStatsApiTestCase(Settings):  # python manage.py test blog.tests.test_stats.UserStatsApiTestCase
+
+    def test_stats_action(self):
+        response = self.client.get(f'/api/v1/users/{self.test_user.id}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['post_count'], 3)
+        self.assertIsNotNone(response.data['last_post_at'])
+
+        response = self.client.get(f'/api/v1/users/{self.test_user2.id}/stats/')
+        self.assertEqual(response.data, {'post_count': 0, 'last_post_at': None})
+
+    def test_stats_action_not_found(self):
+        response = self.client.get('/api/v1/users/999/stats/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_without_include(self):
+        response = self.client.get('/api/v1/users/')
+        self.assertNotIn('stats', response.data[0])
+
+    def test_list_include_stats(self):
+        for i in range(5):
+            get_user_model().objects.create_user(username=f'extra_{i}', password='abc123')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/users/', {'include': 'stats'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = {user['id']: user['stats'] for user in response.data}
+        self.assertEqual(stats[self.test_user.id]['post_count'], 3)
+        self.assertEqual(stats[self.test_user2.id], {'post_count': 0, 'last_post_at': None})
@@ -0,0 +1,205 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from blog import tasks
+from blog.models import Job, Post
+from blog.search import get_search_backend
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=3)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise ConnectionError('SMTP недоступен')
+
+
+class Settings(TestCase):
+    backend = 'memory'
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        overrides = override_settings(BLOG_TASKS_BACKEND=self.backend, BLOG_TASKS_RETRY_DELAY=10)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.queue = tasks.get_backend()
+        if self.backend == 'memory':
+            self.queue.clear()
+        calls.clear()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+
+
+class MemoryBackendTestCase(Settings):  # python manage.py test blog.tests.test_tasks.MemoryBackendTestCase
+
+    def test_delay(self):
+        record.delay('a')
+        self.assertEqual(calls, [])
+        self.assertEqual(self.queue.run_pending(), 1)
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(self.queue.jobs, [])
+        # прямой вызов выполняет задачу сразу
+        record('b')
+        self.assertEqual(calls, ['a', 'b'])
+
+    def test_retry_backoff(self):
+        flaky.delay(2)
+        now = timezone.now()
+        with self.assertLogs('blog.tasks', 'ERROR'):
+            self.assertEqual(self.queue.run_pending(now), 1)
+        job, = self.queue.jobs
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertEqual(job.run_at, now + timedelta(seconds=10))
+        self.assertIn('ConnectionError', job.last_error)
+        # до времени повтора задание не выполняется
+        self.assertEqual(self.queue.run_pending(now + timedelta(seconds=9)), 0)
+        with self.assertLogs('blog.tasks', 'ERROR'):
+            self.queue.run_pending(now + timedelta(seconds=10))
+        self.assertEqual(job.run_at, now + timedelta(seconds=30))
+        self.queue.run_pending(now + timedelta(seconds=30))
+        self.assertEqual(self.queue.jobs, [])
+        self.assertEqual(len(calls), 3)
+
+    def test_failed_after_max_attempts(self):
+        flaky.delay(5)
+        now = timezone.now()
+        with self.assertLogs('blog.tasks', 'ERROR') as logs:
+            for seconds in (0, 10, 30, 70):
+                self.queue.run_pending(now + timedelta(seconds=seconds))
+        self.assertEqual(len(logs.records), 3)
+        job, = self.queue.jobs
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertEqual(len(calls), 3)
+
+
+class DatabaseBackendTestCase(Settings):  # python manage.py test blog.tests.test_tasks.DatabaseBackendTestCase
+    backend = 'database'
+
+    def run_tasks(self):
+        out = StringIO()
+        call_command('run_tasks', '--once', '--concurrency', '1', stdout=out)
+        return out.getvalue()
+
+    def test_worker(self):
+        for value in range(3):
+            record.delay(value)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 3)
+        self.assertIn('Выполнено заданий: 3, с ошибкой: 0', self.run_tasks())
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_retry(self):
+        flaky.delay(1)
+        with self.assertLogs('blog.tasks', 'ERROR'):
+            self.assertIn('с ошибкой: 1', self.run_tasks())
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        # повтор еще не наступил
+        self.assertIn('Выполнено заданий: 0', self.run_tasks())
+        Job.objects.update(run_at=timezone.now())
+        self.assertIn('Выполнено заданий: 1', self.run_tasks())
+        self.assertFalse(Job.objects.exists())
+
+    def test_slow_job_does_not_block_pool(self):
+        class Backend:
+            # одно долгое задание и четыре быстрых; долгое ждет, пока выполнятся быстрые
+            def __init__(self):
+                self.jobs = ['slow', 1, 2, 3, 4]
+                self.finished = []
+                self.released = threading.Event()
+
+            def claim(self, limit):
+                claimed, self.jobs = self.jobs[:limit], self.jobs[limit:]
+                return claimed
+
+            def run(self, job):
+                if job == 'slow':
+                    job = ('slow', self.released.wait(5))
+                self.finished.append(job)
+                if len(self.finished) == 4:
+                    self.released.set()
+                return True
+
+        backend = Backend()
+        with mock.patch('blog.management.commands.run_tasks.DatabaseBackend', return_value=backend):
+            out = StringIO()
+            call_command('run_tasks', '--once', '--concurrency', '2', '--poll', '0.01', stdout=out)
+        self.assertEqual(backend.finished, [1, 2, 3, 4, ('slow', True)])
+        self.assertIn('Выполнено заданий: 5', out.getvalue())
+
+    def test_claim_once(self):
+        record.delay('a')
+        job, = self.queue.claim(10)
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+        self.assertEqual(self.queue.claim(10), [])
+        # обработчик, взявший задание, не ответил за BLOG_TASKS_TIMEOUT
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=settings.BLOG_TASKS_TIMEOUT + 1))
+        job, = self.queue.claim(10)
+        self.assertEqual(job.attempts, 2)
+
+
+@override_settings(EMAIL_BACKEND='blog.mail.QueuedEmailBackend',
+                   BLOG_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class DeferredSideEffectsTestCase(Settings):  # python manage.py test blog.tests.test_tasks.DeferredSideEffectsTestCase
+
+    def test_registration_email(self):
+        response = Client().post('/api/v1/dj-rest-auth/registration/', {
+            'username': 'newuser', 'email': 'newuser@example.com',
+            'password1': 'Pass-word-123', 'password2': 'Pass-word-123',
+        })
+        # обязательное подтверждение почты: dj-rest-auth отвечает 204 без токена
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.queue.run_pending(), 1)
+        message, = mail.outbox
+        self.assertEqual(message.to, ['newuser@example.com'])
+
+    def test_attachments(self):
+        message = mail.EmailMultiAlternatives('Тема', 'Текст', to=['a@example.com'],
+                                              alternatives=[('<p>Текст</p>', 'text/html')])
+        message.attach('data.bin', b'\x00\xff', 'application/octet-stream')
+        message.attach('note.txt', 'заметка', 'text/plain')
+        message.send()
+        self.queue.run_pending()
+        sent, = mail.outbox
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+        self.assertEqual(sent.attachments, [('data.bin', b'\x00\xff', 'application/octet-stream'),
+                                            ('note.txt', 'заметка', 'text/plain')])
+
+    def test_search_index(self):
+        user = User.objects.create_user(username='author', password='password')
+        post = Post.objects.create(title='Отложенный индекс', body='текст', author=user)
+        self.assertEqual(get_search_backend().search('отложенный'), [])
+        self.queue.run_pending()
+        self.assertEqual(get_search_backend().search('отложенный'), [post.pk])
+        pk = post.pk
+        post.delete()
+        self.assertEqual(get_search_backend().search('отложенный'), [pk])
+        self.queue.run_pending()
+        self.assertEqual(get_search_backend().search('отложенный'), [])
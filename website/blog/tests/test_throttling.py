@@ -0,0 +1,208 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, AsyncClient, Client, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from blog import throttling
+from blog.models import Post
+from blog.throttling import LocalThrottleStore, SharedThrottleStore, SlidingWindowThrottle
+
+
+def rates(**scopes):
+    """ Настройки REST_FRAMEWORK с заданными частотами, остальные области - без ограничения. """
+    return {**settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'read': None, 'write': None, 'auth': None, **scopes}}
+
+
+def at(seconds):
+    """ Текущее время для ограничителя частоты. """
+    return mock.patch.object(SlidingWindowThrottle, 'timer', return_value=seconds)
+
+
+class Settings(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        settings.SECRET_KEY = "some_secret_key!"
+
+        cls.test_user = get_user_model().objects.create_user(username='test_user', password='abc123')
+        cls.test_user2 = get_user_model().objects.create_user(username='test_user_2', password='abc1234')
+        cls.post = Post.objects.create(author=cls.test_user, title='Post', body='Body content...')
+        cls.token = Token.objects.create(user=cls.test_user)
+
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()
+        caches['default'].clear()
+        throttling._stores.clear()
+        self.client = Client()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        settings.SECRET_KEY = None
+        throttling._stores.clear()
+
+
+class ThrottleStoreTestCase(Settings):  # python manage.py test blog.tests.test_throttling.ThrottleStoreTestCase
+
+    def assertWindows(self, store):
+        self.assertEqual(store.hit('a', 10, 60), (0, 1))
+        self.assertEqual(store.hit('a', 10, 60), (0, 2))
+        self.assertEqual(store.hit('b', 10, 60), (0, 1))
+        # текущее окно становится предыдущим
+        self.assertEqual(store.hit('a', 11, 60), (2, 1))
+        # после пропущенного окна предыдущего нет
+        self.assertEqual(store.hit('a', 13, 60), (0, 1))
+
+    def test_local(self):
+        self.assertWindows(LocalThrottleStore(max_entries=10))
+
+    def test_shared(self):
+        self.assertWindows(SharedThrottleStore('default', max_entries=10))
+        # счетчики в кэше общие для всех процессов
+        self.assertEqual(SharedThrottleStore('default', max_entries=10).hit('b', 10, 60), (0, 2))
+
+    def test_local_eviction(self):
+        store = LocalThrottleStore(max_entries=2)
+        store.hit('a', 1, 60)
+        store.hit('b', 1, 60)
+        store.hit('a', 1, 60)
+        store.hit('c', 1, 60)
+        # вытесняется давно не использованный ключ b
+        self.assertEqual(list(store._data), ['a', 'c'])
+        self.assertEqual(store.hit('b', 1, 60), (0, 1))
+
+    @override_settings(BLOG_THROTTLE_CACHE_ALIAS='default')
+    def test_get_store(self):
+        self.assertIsInstance(throttling.get_store(), SharedThrottleStore)
+        self.assertIs(throttling.get_store(), throttling.get_store())
+        with override_settings(BLOG_THROTTLE_CACHE_ALIAS=None):
+            self.assertIsInstance(throttling.get_store(), LocalThrottleStore)
+
+
+class SlidingWindowTestCase(Settings):  # python manage.py test blog.tests.test_throttling.SlidingWindowTestCase
+
+    def throttle(self, previous, current, offset):
+        with override_settings(REST_FRAMEWORK=rates(read='10/min')):
+            throttle = throttling.ReadThrottle()
+        throttle.previous, throttle.current, throttle.offset = previous, current, offset
+        return throttle
+
+    def test_estimate(self):
+        self.assertEqual(self.throttle(10, 5, 30).estimate(), 10)
+        self.assertEqual(self.throttle(10, 5, 0).estimate(), 15)
+        self.assertEqual(self.throttle(10, 5, 60).estimate(), 5)
+
+    def test_wait(self):
+        # через 6 секунд вклад предыдущего окна 10 * 0.4 + 6 = 10
+        self.assertAlmostEqual(self.throttle(10, 6, 30).wait(), 6)
+        # текущее окно перебрано: 30 секунд до конца окна и еще половина следующего
+        self.assertAlmostEqual(self.throttle(0, 20, 30).wait(), 60)
+
+    @override_settings(REST_FRAMEWORK=rates(read='2/min'))
+    def test_window_boundary(self):
+        with at(50):
+            for _ in range(2):
+                self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # в начале следующего окна запросы предыдущего еще учитываются
+        with at(65):
+            self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        with at(170):
+            self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+
+
+class ThrottleApiTestCase(Settings):  # python manage.py test blog.tests.test_throttling.ThrottleApiTestCase
+
+    def assertThrottled(self, response):
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    @override_settings(REST_FRAMEWORK=rates(read='3/min'))
+    def test_read(self):
+        with at(0):
+            for _ in range(3):
+                self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+            self.assertThrottled(self.client.get('/api/v1/'))
+            # у токена свой счетчик, у анонимного клиента - по IP
+            headers = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+            self.assertEqual(self.client.get('/api/v1/', **headers).status_code, status.HTTP_200_OK)
+            self.assertThrottled(self.client.get('/api/v1/', REMOTE_ADDR='127.0.0.1'))
+            self.assertEqual(self.client.get('/api/v1/', REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_200_OK)
+
+    @override_settings(REST_FRAMEWORK=rates(write='2/min'))
+    def test_write_per_user(self):
+        with at(0):
+            self.client.login(username='test_user', password='abc123')
+            for i in range(2):
+                response = self.client.patch(f'/api/v1/{self.post.pk}/', {'title': f'Title {i}'},
+                                             content_type='application/json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertThrottled(self.client.patch(f'/api/v1/{self.post.pk}/', {'title': 'Title'},
+                                                   content_type='application/json'))
+            # чтение ограничивается отдельно
+            self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+
+            other = Client()
+            other.login(username='test_user_2', password='abc1234')
+            response = other.post('/api/v1/', {'author': self.test_user2.pk, 'title': 'Post 2', 'body': 'Body'},
+                                  content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(REST_FRAMEWORK=rates(auth='2/min'))
+    def test_auth(self):
+        data = {'username': 'test_user', 'password': 'wrong'}
+        with at(0):
+            for _ in range(2):
+                response = self.client.post('/api/v1/dj-rest-auth/login/', data)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertThrottled(self.client.post('/api/v1/dj-rest-auth/login/', data))
+            # остальной API не затронут
+            self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+
+    @override_settings(REST_FRAMEWORK=rates(auth='2/min'))
+    def test_forwarded_for_ignored(self):
+        # без прокси перед приложением X-Forwarded-For подставляет сам клиент
+        data = {'username': 'test_user', 'password': 'wrong'}
+        with at(0):
+            for number in range(2):
+                response = self.client.post('/api/v1/dj-rest-auth/login/', data,
+                                            HTTP_X_FORWARDED_FOR=f'10.0.0.{number}')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertThrottled(self.client.post('/api/v1/dj-rest-auth/login/', data,
+                                                  HTTP_X_FORWARDED_FOR='10.0.0.99'))
+
+    @override_settings(REST_FRAMEWORK={**rates(auth='1/min'), 'NUM_PROXIES': 1})
+    def test_forwarded_for_behind_proxy(self):
+        # за одним прокси клиент - последний адрес X-Forwarded-For, подставленные перед ним не учитываются
+        data = {'username': 'test_user', 'password': 'wrong'}
+        with at(0):
+            response = self.client.post('/api/v1/dj-rest-auth/login/', data, HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.1')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertThrottled(self.client.post('/api/v1/dj-rest-auth/login/', data,
+                                                  HTTP_X_FORWARDED_FOR='2.2.2.2, 10.0.0.1'))
+            response = self.client.post('/api/v1/dj-rest-auth/login/', data, HTTP_X_FORWARDED_FOR='10.0.0.2')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REST_FRAMEWORK=rates(read='2/min'), BLOG_THROTTLE_CACHE_ALIAS='default')
+    def test_shared_store(self):
+        with at(0):
+            for _ in range(2):
+                self.assertEqual(self.client.get('/api/v1/').status_code, status.HTTP_200_OK)
+            # новый процесс видит те же счетчики
+            throttling._stores.clear()
+            self.assertThrottled(self.client.get('/api/v1/'))
+
+    @override_settings(REST_FRAMEWORK=rates(read='2/min'))
+    async def test_async_views(self):
+        client = AsyncClient()
+        with at(0):
+            for _ in range(2):
+                self.assertEqual((await client.get('/api/v1/async/')).status_code, status.HTTP_200_OK)
+            response = await client.get('/api/v1/async/')
+            self.assertThrottled(response)
+            self.assertIn('detail', response.json())
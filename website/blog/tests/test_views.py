@@ -11,14 +11,18 @@ IsAuthorOrReadOnly и IsStaffOrReadOnly.
 import logging
 
 from django.conf import settings
-from django.test import TestCase, Client
+from django.core.cache import caches
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.models import ObjectDoesNotExist
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
 
 from blog.models import Post
-from blog.serializers import PostSerializer, UserSerializer
+from blog.serializers import PostListSerializer, PostSerializer, UserSerializer
+from blog.tests.utils import QueryCountMixin, query_budget
 
 
 class Settings(TestCase):
@@ -44,6 +48,9 @@ class Settings(TestCase):
 
         logging.getLogger('django.request').setLevel(logging.ERROR)
 
+    def setUp(self) -> None:
+        caches[settings.BLOG_CACHE_ALIAS].clear()     # ответы API кэшируются между тестами
+
     @classmethod
     def tearDownClass(cls) -> None:
         super().tearDownClass()
@@ -54,14 +61,14 @@ class PostViewSetTestCase(Settings):  # python manage.py test blog.tests.test_vi
 
     def test_api_get_many_posts_unauth(self):
         response = self.client.get('/api/v1/')
-        serializer = PostSerializer([self.test_post], many=True)
-        self.assertEqual(response.data, serializer.data)
+        serializer = PostListSerializer([self.test_post], many=True)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_api_get_many_posts_auth(self):
         response = self.auth_client.get('/api/v1/')
-        serializer = PostSerializer([self.test_post], many=True)
-        self.assertEqual(response.data, serializer.data)
+        serializer = PostListSerializer([self.test_post], many=True)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_api_get_many_posts_invalid_request(self):
@@ -165,6 +172,148 @@ class PostViewSetTestCase(Settings):  # python manage.py test blog.tests.test_vi
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class PostExpandAuthorTestCase(QueryCountMixin, Settings):  # python manage.py test blog.tests.test_views.PostExpandAuthorTestCase
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        authors = [get_user_model().objects.create_user(username=f'author_{i}') for i in range(20)]
+        for i, author in enumerate(authors * 3):
+            Post.objects.create(author=author, title=f'Post {i}', body='Body content...')
+
+    def test_author_id_by_default(self):
+        response = self.client.get('/api/v1/1/')
+        self.assertEqual(response.data['author'], self.test_user.id)
+
+    def test_expand_author(self):
+        response = self.client.get('/api/v1/1/', {'expand': 'author'})
+        self.assertEqual(response.data['author'], UserSerializer(self.test_user).data)
+
+    def test_expand_author_list_queries(self):
+        self.assertListQueries('/api/v1/', 1, expand='author')
+
+    def test_list_queries(self):
+        self.assertListQueries('/api/v1/', 1)
+
+    def test_expand_ignored_on_write(self):
+        response = self.auth_client.post('/api/v1/?expand=author',
+                                         data={'author': self.test_user.id, 'title': 'Some', 'body': 'Some too'},
+                                         content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author'], self.test_user.id)
+
+    def test_username_change_invalidates_cache(self):
+        self.client.get('/api/v1/1/', {'expand': 'author'})
+        self.test_user.username = 'renamed'
+        self.test_user.save()
+        response = self.client.get('/api/v1/1/', {'expand': 'author'})
+        self.assertEqual(response.data['author']['username'], 'renamed')
+
+
+class PostSparseFieldsTestCase(Settings):  # python manage.py test blog.tests.test_views.PostSparseFieldsTestCase
+
+    def test_list_without_body(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'author', 'title', 'excerpt', 'created_at'})
+        self.assertIn('SUBSTR("blog_post"."body"', queries[0]['sql'])
+        self.assertEqual(queries[0]['sql'].count('"blog_post"."body"'), 1)     # только внутри SUBSTR
+
+    def test_list_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/', {'fields': 'id,title'})
+        self.assertEqual(response.data['results'], [{'id': 1, 'title': 'Post title'}])
+        self.assertNotIn('SUBSTR', queries[0]['sql'].upper())
+        self.assertNotIn('"blog_post"."author_id"', queries[0]['sql'])
+
+    def test_list_full_body(self):
+        response = self.client.get('/api/v1/', {'fields': 'id,body'})
+        self.assertEqual(response.data['results'], [{'id': 1, 'body': 'Body content...'}])
+
+    def test_retrieve_fields(self):
+        response = self.client.get('/api/v1/1/', {'fields': 'title,created_at'})
+        self.assertEqual(set(response.data), {'title', 'created_at'})
+
+    def test_fields_with_expand(self):
+        response = self.client.get('/api/v1/1/', {'fields': 'id,author', 'expand': 'author'})
+        self.assertEqual(response.data, {'id': 1, 'author': UserSerializer(self.test_user).data})
+        response = self.client.get('/api/v1/1/', {'fields': 'id', 'expand': 'author'})
+        self.assertEqual(response.data, {'id': 1})
+
+    def test_fields_ignored_on_write(self):
+        response = self.auth_client.patch('/api/v1/1/?fields=id', data={'title': 'Post title mod'},
+                                          content_type='application/json')
+        self.assertEqual(response.data, PostSerializer(Post.objects.get(pk=1)).data)
+        self.assertGreater(Post.objects.get(pk=1).updated_at, self.test_post.updated_at)
+
+
+class PostFastWriteTestCase(Settings):  # python manage.py test blog.tests.test_views.PostFastWriteTestCase
+
+    def write_queries(self, client, method, url, expected, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, content_type='application/json', **kwargs)
+        sql = [query['sql'] for query in queries]
+        self.assertEqual(len(sql), expected, '\n'.join(sql))
+        return response, sql
+
+    def test_patch_single_update(self):
+        # сессия, пользователь, SAVEPOINT, UPDATE ... RETURNING, поисковый индекс (DELETE + INSERT), RELEASE
+        response, sql = self.write_queries(self.auth_client, 'patch', '/api/v1/1/', 7, data={'title': 'Fast'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, PostSerializer(Post.objects.get(pk=1)).data)
+        self.assertEqual(response.data['title'], 'Fast')
+        self.assertFalse([query for query in sql if query.startswith('SELECT') and '"blog_post"' in query])
+        self.assertTrue(any(query.startswith('UPDATE "blog_post"') and '"author_id" = ' in query for query in sql))
+
+    def test_patch_without_text_skips_reindex(self):
+        # сессия, пользователь, проверка нового автора, SAVEPOINT, UPDATE ... RETURNING, RELEASE
+        response, _ = self.write_queries(self.auth_client, 'patch', '/api/v1/1/', 6,
+                                         data={'author': self.test_user.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_delete_single_delete(self):
+        # сессия, пользователь, SAVEPOINT, DELETE ... RETURNING,
+        # счетчики автора (2 UPDATE), поисковый индекс, RELEASE
+        response, sql = self.write_queries(self.auth_client, 'delete', '/api/v1/1/', 8)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=1).exists())
+        self.assertFalse([query for query in sql if query.startswith('SELECT') and '"blog_post"' in query])
+
+    def test_put(self):
+        response = self.auth_client.put('/api/v1/1/', content_type='application/json',
+                                        data={'author': self.test_user.id, 'title': 'Put', 'body': 'Put body'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, PostSerializer(Post.objects.get(pk=1)).data)
+
+    def test_not_found(self):
+        response = self.auth_client.patch('/api/v1/999/', data={'title': 'x'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.auth_client.delete('/api/v1/999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.auth_client.delete('/api/v1/abc/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_not_author_before_validation(self):
+        response = self.not_author.patch('/api/v1/1/', data={'title': 'x' * 1000}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.not_author.patch('/api/v1/999/', data={'title': 'x' * 1000}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.auth_client.patch('/api/v1/1/', data={'title': 'x' * 1000}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_author_unchanged(self):
+        response = self.not_author.delete('/api/v1/1/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Post.objects.filter(pk=1).exists())
+
+    @override_settings(BLOG_FAST_WRITES=False)
+    def test_regular_path(self):
+        response = self.not_author.patch('/api/v1/1/', data={'title': 'x'}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.auth_client.patch('/api/v1/1/', data={'title': 'Slow'}, content_type='application/json')
+        self.assertEqual(response.data['title'], 'Slow')
+
+
 class UserViewSetTestCase(Settings):  # python manage.py test blog.tests.test_views.UserViewSetTestCase
 
     def test_api_get_many_users_unauth(self):
@@ -277,3 +426,43 @@ class UserViewSetTestCase(Settings):  # python manage.py test blog.tests.test_vi
         expected_data = {'username': [ErrorDetail(string='Обязательное поле.', code='required')]}
         self.assertEqual(response.data, expected_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QueryBudgetTestCase(QueryCountMixin, Settings):  # python manage.py test blog.tests.test_views.QueryBudgetTestCase
+    """
+    Сколько SQL-запросов выполняют основные запросы к API. Повтор одного запроса (N+1)
+    роняет тест с указанием поля сериализатора, см. blog.querycheck.
+    """
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        authors = [get_user_model().objects.create_user(username=f'author_{i}') for i in range(10)]
+        for i, author in enumerate(authors * 2):
+            Post.objects.create(author=author, title=f'Post {i}', body='Body content...')
+
+    @query_budget(max_queries=1)
+    def test_post_list(self):
+        self.client.get('/api/v1/', {'expand': 'author'})
+
+    @query_budget(max_queries=1)
+    def test_post_detail(self):
+        self.client.get('/api/v1/1/', {'expand': 'author'})
+
+    @query_budget(max_queries=1)
+    def test_user_list(self):
+        self.client.get('/api/v1/users/', {'include': 'stats'})
+
+    @query_budget(max_queries=2)
+    def test_user_stats(self):
+        self.client.get('/api/v1/users/1/stats/')
+
+    def test_post_writes(self):
+        # сессия и пользователь, затем запись поста, счетчиков автора и поискового индекса
+        with self.assertQueryBudget(max_queries=9):
+            response = self.auth_client.post('/api/v1/', data={'author': self.test_user.id, 'title': 'New',
+                                                               'body': '!'})
+        with self.assertQueryBudget(max_queries=7):
+            self.auth_client.patch(f'/api/v1/{response.data["id"]}/', data={'title': 'Changed'},
+                                   content_type='application/json')
+        with self.assertQueryBudget(max_queries=8):
+            self.auth_client.delete(f'/api/v1/{response.data["id"]}/')
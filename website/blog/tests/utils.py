@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client
+
+from blog.querycheck import QueryInspector
+
+
+class QueryCountMixin:
+    """
+    Проверки SQL-запросов теста.
+
+    assertListQueries - число запросов на страницу списка не должно расти вместе
+    с размером страницы, иначе где-то в сериализаторе появился N+1.
+
+    assertQueryBudget - бюджет блока: общее число запросов, сколько раз может выполниться
+    один и тот же запрос (max_repeats=1 запрещает повторы) и медленные запросы:
+
+        with self.assertQueryBudget(max_queries=2):
+            client.get('/api/v1/', {'expand': 'author'})
+
+    При превышении тест падает с отчетом blog.querycheck: запрос и где он выполнен.
+    Декоратор query_budget делает то же для всего теста.
+    """
+    page_sizes = (1, 10, 50)
+
+    def assertListQueries(self, url, expected, page_sizes=None, client=None, **params):
+        client = client or Client()
+        for page_size in page_sizes or self.page_sizes:
+            caches[settings.BLOG_CACHE_ALIAS].clear()   # закэшированный ответ не обращается к базе
+            with self.subTest(page_size=page_size), self.assertNumQueries(expected):
+                client.get(url, {'page_size': page_size, **params})
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, max_repeats=None, slow_ms=None):
+        if max_repeats is None:
+            max_repeats = settings.BLOG_QUERYCHECK_REPEAT_THRESHOLD - 1
+        with QueryInspector(repeat_threshold=max_repeats + 1, slow_ms=slow_ms) as inspector:
+            yield inspector
+        report = inspector.report()
+        if report:
+            self.fail(f'Query budget exceeded:\n{report}')
+        if max_queries is not None and inspector.count > max_queries:
+            queries = '\n'.join(f'{group.count} x {group.sql}  ({group.location})'
+                                for group in inspector.groups.values())
+            self.fail(f'{inspector.count} queries executed, budget {max_queries}:\n{queries}')
+
+
+def query_budget(max_queries=None, max_repeats=None, slow_ms=None):
+    """ Декоратор теста с QueryCountMixin: бюджет на весь тест. """
+    def decorator(test):
+        @wraps(test)
+        def wrapper(self, *args, **kwargs):
+            with self.assertQueryBudget(max_queries, max_repeats, slow_ms):
+                return test(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,189 @@
+"""
+Ограничение частоты запросов скользящим окном.
+
+На каждый ключ (токен, пользователь или IP в своей области: read, write, auth) хранятся
+два счетчика: запросы текущего и предыдущего окна длиной duration. Частота оценивается как
+previous * (доля предыдущего окна, попадающая в последние duration секунд) + current,
+поэтому память на ключ постоянна, а границы окон не дают удвоенного всплеска.
+Отклоненные запросы тоже считаются: клиент, который продолжает слать запросы чаще лимита,
+остается ограничен.
+
+Хранилища: LocalThrottleStore - в памяти процесса, не больше BLOG_THROTTLE_MAX_ENTRIES
+ключей (давно не использованные вытесняются); SharedThrottleStore - в общем кэше Django
+BLOG_THROTTLE_CACHE_ALIAS для нескольких процессов: один incr на запрос, счетчик
+предыдущего окна читается один раз при смене окна.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import permissions
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalThrottleStore:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()     # ключ -> [номер окна, предыдущее окно, текущее окно]
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, duration):
+        """ Учитывает запрос в окне номер window, возвращает счетчики (предыдущее окно, текущее). """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [window, 0, 0]
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+            else:
+                self._data.move_to_end(key)
+            if entry[0] != window:
+                entry[1] = entry[2] if entry[0] == window - 1 else 0
+                entry[0], entry[2] = window, 0
+            entry[2] += 1
+            return entry[1], entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SharedThrottleStore:
+    def __init__(self, alias, max_entries):
+        self.alias = alias
+        self.max_entries = max_entries
+        self._previous = OrderedDict()     # ключ -> (номер окна, счетчик предыдущего окна)
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, duration):
+        cache = caches[self.alias]
+        current_key = f'{key}:{window}'
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # первый запрос окна: счетчик живет два окна, чтобы стать "предыдущим"
+            if cache.add(current_key, 1, timeout=2 * duration):
+                current = 1
+            else:
+                current = cache.incr(current_key)
+        return self._previous_count(cache, key, window), current
+
+    def _previous_count(self, cache, key, window):
+        with self._lock:
+            cached = self._previous.get(key)
+        if cached is not None and cached[0] == window:
+            return cached[1]
+        previous = cache.get(f'{key}:{window - 1}', 0)
+        with self._lock:
+            self._previous[key] = (window, previous)
+            self._previous.move_to_end(key)
+            while len(self._previous) > self.max_entries:
+                self._previous.popitem(last=False)
+        return previous
+
+    def clear(self):
+        with self._lock:
+            self._previous.clear()
+
+
+_stores = {}
+
+
+def get_store():
+    alias = settings.BLOG_THROTTLE_CACHE_ALIAS
+    store = _stores.get(alias)
+    if store is None:
+        if alias:
+            store = SharedThrottleStore(alias, settings.BLOG_THROTTLE_MAX_ENTRIES)
+        else:
+            store = LocalThrottleStore(settings.BLOG_THROTTLE_MAX_ENTRIES)
+        store = _stores.setdefault(alias, store)
+    return store
+
+
+def is_auth_view(view):
+    """ Вход, выход, регистрация и сброс пароля dj-rest-auth. """
+    return type(view).__module__.startswith('dj_rest_auth')
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Базовый класс: частота задается в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope]
+    в формате DRF ('100/min'), None - без ограничения.
+    """
+    cache_format = 'blog:throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # частоты читаются при каждом запросе, а не при импорте, как в SimpleRateThrottle
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def applies(self, request, view):
+        return True
+
+    def get_cache_key(self, request, view):
+        if not self.applies(request, view):
+            return None
+        if isinstance(request.auth, Token):
+            # сам токен в ключ не кладем, как и в кэше токенов
+            ident = 'token:' + hashlib.sha256(request.auth.key.encode()).hexdigest()[:32]
+        elif request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = 'ip:' + self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        window, offset = divmod(self.timer(), self.duration)
+        self.offset = offset
+        self.previous, self.current = get_store().hit(key, int(window), self.duration)
+        return self.estimate() <= self.num_requests
+
+    def estimate(self):
+        return self.previous * (1 - self.offset / self.duration) + self.current
+
+    def wait(self):
+        """ Через сколько секунд оценка частоты опустится до лимита. """
+        duration, limit = self.duration, self.num_requests
+        if self.current <= limit and self.previous:
+            # вклад предыдущего окна уменьшается линейно
+            needed = duration * (1 - (limit - self.current) / self.previous) - self.offset
+            return max(0.0, needed)
+        # текущее окно уже перебрано: ждем, пока оно станет предыдущим и его вклад уменьшится
+        return duration - self.offset + duration * (1 - limit / max(self.current, 1))
+
+
+class ReadThrottle(SlidingWindowThrottle):
+    scope = 'read'
+
+    def applies(self, request, view):
+        return request.method in permissions.SAFE_METHODS and not is_auth_view(view)
+
+
+class WriteThrottle(SlidingWindowThrottle):
+    scope = 'write'
+
+    def applies(self, request, view):
+        return request.method not in permissions.SAFE_METHODS and not is_auth_view(view)
+
+
+class AuthThrottle(SlidingWindowThrottle):
+    """ Подбор паролей и массовая регистрация: ключ - IP, даже если клиент уже вошел. """
+    scope = 'auth'
+
+    def applies(self, request, view):
+        return request.method not in permissions.SAFE_METHODS and is_auth_view(view)
+
+    def get_cache_key(self, request, view):
+        if not self.applies(request, view):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': 'ip:' + self.get_ident(request)}
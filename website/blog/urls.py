@@ -1,9 +1,22 @@
+from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from .views import UserViewSet, PostViewSet
+from .async_views import AsyncPostDetailView, AsyncPostListView, AsyncUserDetailView, AsyncUserListView
+from .views import CacheStatsView, UserViewSet, PostViewSet
 
 # строим автоматические маршруты для наборов представлений
 router = SimpleRouter()
 router.register('users', UserViewSet, basename='users')
 router.register('', PostViewSet, basename='posts')
-urlpatterns = router.urls
+
+# асинхронное чтение (ASGI), до маршрутов PostViewSet: иначе 'async' разберется как id поста
+async_urlpatterns = [
+    path('async/', AsyncPostListView.as_view(), name='async-posts-list'),
+    path('async/<int:pk>/', AsyncPostDetailView.as_view(), name='async-posts-detail'),
+    path('async/users/', AsyncUserListView.as_view(), name='async-users-list'),
+    path('async/users/<int:pk>/', AsyncUserDetailView.as_view(), name='async-users-detail'),
+]
+
+urlpatterns = async_urlpatterns + [
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+] + router.urls
@@ -1,10 +1,34 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import generics, viewsets
+from django.db import router, transaction
+from django.db.models.functions import Substr
+from django.http import StreamingHttpResponse
+from rest_framework import filters, generics, permissions, status, viewsets
+from rest_framework.decorators import action
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
-from .models import Post
+from .authentication import token_cache_stats
+from .cache import CachedResponseMixin, etag_matches, response_stats
+from .compiled import CompiledListMixin
+from .conditional import PreconditionFailed, if_match_versions, post_etag
+from .filters import PostFilterBackend, parse_moment
+from .models import AuthorStats, Post
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
 from .permissions import IsAuthorOrReadOnly, IsStaffOrReadOnly
-from .serializers import PostSerializer, UserSerializer
+from .routers import ReplicaReadMixin
+from .search import get_search_backend
+from .serializers import (
+    AuthorStatsSerializer, PostExportSerializer, PostListSerializer, PostSerializer, UserSerializer,
+    expanded_fields, included_fields,
+)
+from .signals import posts_deleted, posts_saved
 
 
 # class PostList(generics.ListCreateAPIView):
@@ -19,13 +43,319 @@ from .serializers import PostSerializer, UserSerializer
 
 
 # Переписываем через наборы представлений
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ReplicaReadMixin, CachedResponseMixin, CompiledListMixin, viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
+    cache_resource = 'posts'
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (PostFilterBackend, filters.OrderingFilter)
+    ordering_fields = ('created_at', 'updated_at', 'title')
+    ordering = ('-created_at',)
 
+    # счетчики автора (blog.stats) меняются в той же транзакции, что и пост
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
 
-class UserViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(self._retrieve, request, *args, **kwargs)
+
+    def _retrieve(self, request, *args, **kwargs):
+        expanded = 'author' in expanded_fields(request)
+        if 'If-None-Match' in request.headers and not expanded:
+            # ETag зависит только от id и updated_at: сверяем его, не читая пост целиком
+            updated_at = Post.objects.filter(pk=self._post_pk()).values_list('updated_at', flat=True).first()
+            if updated_at is not None:
+                etag = post_etag(self._post_pk(), updated_at)
+                if etag_matches(request, etag):
+                    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        post = self.get_object()
+        data = self.get_serializer(post).data
+        return Response(data, headers={'ETag': post_etag(post.pk, post.updated_at, data if expanded else None)})
+
+    def get_object(self):
+        post = super().get_object()
+        if self.request.method not in permissions.SAFE_METHODS:
+            # без BLOG_FAST_WRITES версия сверяется с прочитанным постом, а не в условии записи
+            versions = if_match_versions(self.request, post.pk)
+            if versions is not None and post.updated_at not in versions:
+                raise PreconditionFailed()
+            self.post = post
+        return post
+
+    # Быстрый путь изменения и удаления (BLOG_FAST_WRITES): права автора и версия из If-Match
+    # проверяются прямо в условии UPDATE/DELETE ... WHERE id = ? AND author_id = ? [AND updated_at = ?],
+    # без чтения поста и его автора. Если строка не затронута, отдельным запросом выясняем,
+    # что ответить: 404 (поста нет), 403 (пост чужой) или 412 (пост уже изменен).
+
+    def update(self, request, *args, **kwargs):
+        if not settings.BLOG_FAST_WRITES:
+            response = super().update(request, *args, **kwargs)
+            response['ETag'] = post_etag(self.post.pk, self.post.updated_at)
+            return response
+
+        serializer = self.get_serializer(data=request.data, partial=kwargs.pop('partial', False))
+        if not serializer.is_valid():
+            self._check_owner(request)      # 404 и 403 важнее ошибок в данных
+            raise ValidationError(serializer.errors)
+        values = dict(serializer.validated_data, updated_at=timezone.now())
+
+        with transaction.atomic():
+            posts = self._owned_posts(request).update_returning(**values)
+            if not posts:
+                self._not_written(request)
+            post = posts[0]
+            post._loaded_author_id = request.user.pk    # автор до изменения, для счетчиков
+            posts_saved([post], reindex=bool({'title', 'body'} & set(values)))
+        return Response(self.get_serializer(post).data, headers={'ETag': post_etag(post.pk, post.updated_at)})
+
+    def destroy(self, request, *args, **kwargs):
+        if not settings.BLOG_FAST_WRITES:
+            return super().destroy(request, *args, **kwargs)
+
+        with transaction.atomic():
+            posts = self._owned_posts(request).delete_returning()
+            if not posts:
+                self._not_written(request)
+            posts_deleted(posts)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _post_pk(self):
+        try:
+            return int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise NotFound()
+
+    def _owned_posts(self, request):
+        """ Пост из адреса, если он принадлежит пользователю и его версия совпадает с If-Match. """
+        pk = self._post_pk()
+        queryset = Post.objects.filter(pk=pk, author_id=request.user.pk)
+        versions = if_match_versions(request, pk)
+        if versions == []:
+            self._not_written(request)     # ни один ETag не подходит, писать нечего
+        if versions is not None:
+            queryset = queryset.filter(updated_at__in=versions)
+        return queryset
+
+    def _not_written(self, request):
+        """ Ответ на запись, не затронувшую ни одной строки. """
+        self._check_owner(request)
+        if if_match_versions(request, self._post_pk()) is not None:
+            raise PreconditionFailed()
+        raise NotFound()
+
+    def _check_owner(self, request):
+        """ 404, если поста нет, 403, если у пользователя нет прав на него. """
+        pk = self._post_pk()
+        author_id = Post.objects.filter(pk=pk).values_list('author_id', flat=True).first()
+        if author_id is None:
+            raise NotFound()
+        self.check_object_permissions(request, Post(pk=pk, author_id=author_id))
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'search'):
+            return PostListSerializer
+        if self.action == 'export':
+            return PostExportSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+
+        # выбираем из базы только те колонки, которые попадут в ответ
+        fields = self.get_serializer_class().selected_fields(self.request)
+        if 'author' in fields and 'author' in expanded_fields(self.request):
+            queryset = queryset.select_related('author')
+        if 'excerpt' in fields:
+            queryset = queryset.annotate(excerpt=Substr('body', 1, settings.BLOG_EXCERPT_LENGTH))
+        columns = fields & {field.name for field in Post._meta.concrete_fields}
+        if self.action == 'retrieve':
+            columns.add('updated_at')   # для ETag
+        # поля сортировки нужны для курсора страниц
+        key_columns = {field.lstrip('-') for field in self.paginator.get_key_ordering(self.request, queryset, self)}
+        return queryset.only(*key_columns, *columns)
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Полнотекстовый поиск по заголовку и тексту: ?q=слова запроса
+        Посты отсортированы по релевантности, количество ограничено ?page_size=
+        """
+        return self.cached_response(self._search, request)
+
+    def _search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['Обязательный параметр.']})
+
+        pks = get_search_backend().search(query, limit=self.paginator.get_page_size(request))
+        posts = self.get_queryset().in_bulk(pks)
+        serializer = self.get_serializer([posts[pk] for pk in pks if pk in posts], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'],
+            parser_classes=api_settings.DEFAULT_PARSER_CLASSES + [NDJSONParser])
+    def bulk(self, request):
+        """
+        Массовые операции с постами, тело запроса - JSON-массив или NDJSON.
+        POST создает посты, PATCH изменяет (в каждом объекте обязателен id),
+        DELETE удаляет (массив id). Запрос выполняется в одной транзакции:
+        при ошибке хотя бы в одном объекте не меняется ничего,
+        а в ответе перечисляются ошибки по номерам объектов.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Ожидается список объектов.']})
+        if len(items) > settings.BLOG_BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {settings.BLOG_BULK_MAX_ITEMS} объектов в одном запросе.'
+            ]})
+
+        with transaction.atomic():
+            if request.method == 'POST':
+                return self._bulk_create(items)
+            if request.method == 'PATCH':
+                return self._bulk_update(request, items)
+            return self._bulk_delete(request, items)
+
+    @staticmethod
+    def _bulk_error_response(errors):
+        if isinstance(errors, list):
+            errors = dict(enumerate(errors))
+        return Response(
+            {'errors': [{'index': index, 'errors': error} for index, error in sorted(errors.items()) if error]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def _bulk_get_posts(self, request, items):
+        """ Посты по id из объектов запроса, с проверкой прав автора на каждый. """
+        errors = {}
+        ids = []
+        for index, item in enumerate(items):
+            pk = item.get('id') if isinstance(item, dict) else item
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                errors[index] = {'id': ['Ожидается id поста.']}
+            elif pk in ids:
+                errors[index] = {'id': ['Пост указан в запросе повторно.']}
+            ids.append(pk)
+
+        posts = Post.objects.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        for index, pk in enumerate(ids):
+            if index not in errors and pk not in posts:
+                errors[index] = {'id': ['Пост не найден.']}
+        if errors:
+            return None, errors
+
+        instances = [posts[pk] for pk in ids]
+        for post in instances:
+            self.check_object_permissions(request, post)
+        return instances, None
+
+    def _bulk_create(self, items):
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return self._bulk_error_response(serializer.errors)
+        posts = serializer.save()
+        posts_saved(posts, created=True)     # bulk_create не посылает сигналы
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _bulk_update(self, request, items):
+        instances, errors = self._bulk_get_posts(request, items)
+        if errors:
+            return self._bulk_error_response(errors)
+        serializer = self.get_serializer(instances, data=items, many=True, partial=True)
+        if not serializer.is_valid():
+            return self._bulk_error_response(serializer.errors)
+        serializer.save()
+        posts_saved(instances)
+        return Response(serializer.data)
+
+    def _bulk_delete(self, request, items):
+        instances, errors = self._bulk_get_posts(request, items)
+        if errors:
+            return self._bulk_error_response(errors)
+        # удаляем одним DELETE без сигналов на каждый пост (у Post нет зависимых моделей),
+        # а побочные эффекты выполняем для всех постов сразу
+        Post.objects.filter(pk__in=[post.pk for post in instances])._raw_delete(router.db_for_write(Post))
+        posts_deleted(instances)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Потоковая выгрузка всех постов: ?format=ndjson (по умолчанию) или ?format=csv.
+        Посты отсортированы по updated_at, поэтому updated_at последней строки
+        можно передать в ?updated_since= при следующей выгрузке и получить только изменения.
+        Память не зависит от числа постов: строки читаются из базы и сериализуются пачками.
+        """
+        # база выбирается сейчас: строки читаются уже после выхода из представления
+        queryset = self.get_queryset().order_by('updated_at', 'id').using(router.db_for_read(Post))
+        updated_since = request.query_params.get('updated_since')
+        if updated_since is not None:
+            try:
+                queryset = queryset.filter(updated_at__gt=parse_moment(updated_since))
+            except ValueError:
+                raise ValidationError({'updated_since': ['Неверный формат даты и времени.']})
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(self._export_chunks(queryset, settings.BLOG_EXPORT_CHUNK_SIZE)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="posts.{renderer.format}"'
+        return response
+
+    def _export_chunks(self, queryset, chunk_size):
+        chunk = []
+        for post in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(post)
+            if len(chunk) == chunk_size:
+                yield self.get_serializer(chunk, many=True).data
+                chunk = []
+        if chunk:
+            yield self.get_serializer(chunk, many=True).data
+
+
+class UserViewSet(ReplicaReadMixin, CompiledListMixin, viewsets.ModelViewSet):
     permission_classes = (IsStaffOrReadOnly,)
-    queryset = get_user_model().objects.all()
+    # порядок задан явно: без ORDER BY база может читать строки через любой индекс (например по username)
+    queryset = get_user_model().objects.order_by('id')
     serializer_class = UserSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # счетчики постов (?include=stats) берем тем же запросом, а не отдельным на каждого пользователя
+        if 'stats' in included_fields(self.request):
+            queryset = queryset.select_related('post_stats')
+        return queryset
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """
+        Число постов пользователя и дата последнего поста.
+        """
+        user = self.get_object()
+        stats = AuthorStats.objects.filter(user=user).first() or AuthorStats(user=user)
+        return Response(AuthorStatsSerializer(stats).data)
+
+
+class CacheStatsView(APIView):
+    """
+    Попадания в кэши текущего процесса: ответов API и токенов (только для администраторов).
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({'responses': response_stats.as_dict(), 'tokens': token_cache_stats()})
@@ -56,11 +56,14 @@ INSTALLED_APPS = [
 
 
 # настройки почты для подтверждения при регистрации пользователя через django-allauth
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'    # выводить письма в консоль
+# письма ставятся в очередь фоновых задач (blog.mail), отправляет их BLOG_EMAIL_BACKEND
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+BLOG_EMAIL_BACKEND = getenv('BLOG_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')    # в консоль
 SITE_ID = 1     # django-allauth использует фреймворк Django "sites", задаем настройки для него
 
 
 MIDDLEWARE = [
+    'blog.metrics.MetricsMiddleware',   # первым, чтобы время ответа включало остальные слои
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,6 +71,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.querycheck.QueryCheckMiddleware',     # работает только при DEBUG, см. BLOG_QUERYCHECK
 ]
 
 ROOT_URLCONF = 'website.urls'
@@ -94,12 +98,99 @@ WSGI_APPLICATION = 'website.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# По умолчанию - SQLite в файле db.sqlite3. Для продакшена: BLOG_DB_ENGINE=postgresql
+# (нужен драйвер psycopg2) и BLOG_DB_NAME, BLOG_DB_USER, BLOG_DB_PASSWORD, BLOG_DB_HOST, BLOG_DB_PORT.
+# Соединения держатся открытыми BLOG_DB_CONN_MAX_AGE секунд и проверяются перед повторным
+# использованием. Если перед базой стоит пул соединений PgBouncer (режим transaction),
+# задайте BLOG_DB_POOLER=1: серверные курсоры (iterator() в выгрузке постов) с ним не работают.
+BLOG_DB_ENGINE = getenv('BLOG_DB_ENGINE', 'sqlite3')
+# SQLite под одновременную запись (blog.backends.sqlite3): WAL, PRAGMA, BEGIN IMMEDIATE
+# и очередь пишущих транзакций внутри процесса. Сравнение со стандартным режимом:
+# python manage.py bench_sqlite_writes
+BLOG_DB_SQLITE_TUNED = getenv('BLOG_DB_SQLITE_TUNED', '0') == '1'
+
+
+def _database(**options):
+    if BLOG_DB_ENGINE == 'sqlite3':
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / getenv('BLOG_DB_NAME', 'db.sqlite3'),
+        }
+        if BLOG_DB_SQLITE_TUNED:
+            config['ENGINE'] = 'blog.backends.sqlite3'
+            config['OPTIONS'] = {
+                'timeout': int(getenv('BLOG_DB_SQLITE_BUSY_TIMEOUT', 20)),     # busy_timeout, секунды
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join([
+                    'PRAGMA journal_mode=WAL',
+                    'PRAGMA synchronous=NORMAL',
+                    f"PRAGMA mmap_size={int(getenv('BLOG_DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+                    f"PRAGMA cache_size=-{int(getenv('BLOG_DB_SQLITE_CACHE_SIZE', 64 * 1024))}",  # КиБ
+                    'PRAGMA temp_store=MEMORY',
+                ]),
+                'write_queue': getenv('BLOG_DB_SQLITE_WRITE_QUEUE', '1') == '1',
+            }
+    else:
+        config = {
+            'ENGINE': f'django.db.backends.{BLOG_DB_ENGINE}',
+            'NAME': getenv('BLOG_DB_NAME', 'blog'),
+            'USER': getenv('BLOG_DB_USER', ''),
+            'PASSWORD': getenv('BLOG_DB_PASSWORD', ''),
+            'HOST': getenv('BLOG_DB_HOST', ''),
+            'PORT': getenv('BLOG_DB_PORT', ''),
+            'DISABLE_SERVER_SIDE_CURSORS': getenv('BLOG_DB_POOLER', '0') == '1',
+        }
+    persistent = BLOG_DB_ENGINE != 'sqlite3' or BLOG_DB_SQLITE_TUNED
+    config['CONN_MAX_AGE'] = int(getenv('BLOG_DB_CONN_MAX_AGE', 60 if persistent else 0))
+    config['CONN_HEALTH_CHECKS'] = getenv('BLOG_DB_CONN_HEALTH_CHECKS', '1') == '1'
+    config.update(options)
+    return config
+
+
 DATABASES = {
+    'default': _database(),
+}
+# реплики для чтения (blog.routers): через запятую адреса host[:port], для SQLite - имена файлов
+# (локальная проверка, копии основной базы делает команда copy_sqlite_replicas).
+# В тестах реплики - зеркала основной тестовой базы
+for _number, _replica in enumerate(filter(None, map(str.strip, getenv('BLOG_DB_REPLICAS', '').split(','))), 1):
+    if BLOG_DB_ENGINE == 'sqlite3':
+        _location = {'NAME': BASE_DIR / _replica}
+    else:
+        _location = dict(zip(('HOST', 'PORT'), _replica.split(':')))
+    DATABASES[f'replica_{_number}'] = _database(**_location, TEST={'MIRROR': 'default'})
+BLOG_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# сколько секунд после записи пользователь читает из основной базы, а ответы с реплик не кэшируются
+BLOG_DB_REPLICA_LAG = int(getenv('BLOG_DB_REPLICA_LAG', 5))
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # кэш ответов API (blog.cache), LocMemCache при переполнении вытесняет давно не читанные записи
+    'blog': {
+        'BACKEND': getenv('BLOG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('BLOG_CACHE_LOCATION', 'blog'),
+        'TIMEOUT': int(getenv('BLOG_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(getenv('BLOG_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
 }
+BLOG_CACHE_ALIAS = 'blog'
+# кэш токенов (blog.authentication.CachedTokenAuthentication): в памяти процесса (запись живет
+# BLOG_TOKEN_CACHE_LOCAL_TIMEOUT секунд) и, если задан алиас, еще и в общем для всех процессов кэше
+# (BLOG_TOKEN_CACHE_TIMEOUT секунд) - тогда выход и блокировка пользователя сразу видны всем процессам,
+# иначе - не позже чем через BLOG_TOKEN_CACHE_LOCAL_TIMEOUT секунд
+BLOG_TOKEN_CACHE_TIMEOUT = int(getenv('BLOG_TOKEN_CACHE_TIMEOUT', 60))
+BLOG_TOKEN_CACHE_LOCAL_TIMEOUT = int(getenv('BLOG_TOKEN_CACHE_LOCAL_TIMEOUT', 5))
+BLOG_TOKEN_CACHE_MAX_ENTRIES = int(getenv('BLOG_TOKEN_CACHE_MAX_ENTRIES', 10000))
+BLOG_TOKEN_CACHE_ALIAS = getenv('BLOG_TOKEN_CACHE_ALIAS') or None
 
 
 # Password validation
@@ -150,6 +241,89 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         # 'rest_framework.authentication.BasicAuthentication',    # по умолчанию
-        'rest_framework.authentication.TokenAuthentication'     # переключаем на токены
+        'blog.authentication.CachedTokenAuthentication'     # переключаем на токены (с кэшем)
+    ],
+    # JSON на orjson, если пакет установлен (blog.renderers.FastJSONRenderer, blog.parsers.FastJSONParser)
+    'DEFAULT_RENDERER_CLASSES': [
+        'blog.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'blog.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
+    # ограничение частоты запросов скользящим окном (blog.throttling): чтение, запись и вход/регистрация,
+    # пустое значение переменной окружения - без ограничения
+    'DEFAULT_THROTTLE_CLASSES': [
+        'blog.throttling.ReadThrottle',
+        'blog.throttling.WriteThrottle',
+        'blog.throttling.AuthThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': getenv('BLOG_THROTTLE_READ_RATE', '1200/min') or None,
+        'write': getenv('BLOG_THROTTLE_WRITE_RATE', '120/min') or None,
+        'auth': getenv('BLOG_THROTTLE_AUTH_RATE', '20/min') or None,
+    },
+    # сколько прокси (nginx, балансировщик) стоит перед приложением: IP клиента для ограничения
+    # частоты берется из X-Forwarded-For только за ними, при 0 - адрес соединения (REMOTE_ADDR),
+    # иначе клиент обходил бы лимиты, подставляя в заголовок любой адрес
+    'NUM_PROXIES': int(getenv('BLOG_NUM_PROXIES', 0)),
+}
+# счетчики частоты запросов: в памяти процесса (не больше BLOG_THROTTLE_MAX_ENTRIES ключей)
+# или, если задан алиас кэша (например на Redis), общие для всех процессов
+BLOG_THROTTLE_MAX_ENTRIES = int(getenv('BLOG_THROTTLE_MAX_ENTRIES', 100000))
+BLOG_THROTTLE_CACHE_ALIAS = getenv('BLOG_THROTTLE_CACHE_ALIAS') or None
+
+# постраничный вывод постов по ключу (blog.pagination.KeysetPagination),
+# клиент может менять размер страницы параметром ?page_size= не больше BLOG_MAX_PAGE_SIZE
+BLOG_PAGE_SIZE = int(getenv('BLOG_PAGE_SIZE', 20))
+BLOG_MAX_PAGE_SIZE = int(getenv('BLOG_MAX_PAGE_SIZE', 100))
+# поиск в админке через бэкенд поиска без подзапроса к индексу (blog.search): не больше стольких постов
+BLOG_SEARCH_MAX_RESULTS = int(getenv('BLOG_SEARCH_MAX_RESULTS', 1000))
+# длина начала поста (excerpt), которое отдается в списке вместо полного текста
+BLOG_EXCERPT_LENGTH = int(getenv('BLOG_EXCERPT_LENGTH', 200))
+# массовые операции с постами (api/v1/bulk/): максимум объектов в запросе и размер пачки INSERT/UPDATE
+BLOG_BULK_MAX_ITEMS = int(getenv('BLOG_BULK_MAX_ITEMS', 5000))
+BLOG_BULK_BATCH_SIZE = int(getenv('BLOG_BULK_BATCH_SIZE', 500))
+# изменение и удаление поста одним условным UPDATE/DELETE вместо чтения поста и проверки прав
+BLOG_FAST_WRITES = getenv('BLOG_FAST_WRITES', '1') == '1'
+# списки постов и пользователей из строк .values() сгенерированной функцией вместо сериализаторов (blog.compiled)
+BLOG_COMPILED_SERIALIZERS = getenv('BLOG_COMPILED_SERIALIZERS', '1') == '1'
+# потоковая выгрузка постов (api/v1/export/): сколько строк читать из базы и сериализовать за раз
+BLOG_EXPORT_CHUNK_SIZE = int(getenv('BLOG_EXPORT_CHUNK_SIZE', 2000))
+# метрики запросов (blog.metrics, /metrics): доля измеряемых запросов от 0 до 1,
+# заголовок Server-Timing в измеренных ответах и токен сборщика Prometheus (Authorization: Bearer)
+BLOG_METRICS_SAMPLE_RATE = float(getenv('BLOG_METRICS_SAMPLE_RATE', 1))
+BLOG_METRICS_SERVER_TIMING = getenv('BLOG_METRICS_SERVER_TIMING', '1') == '1'
+BLOG_METRICS_TOKEN = getenv('BLOG_METRICS_TOKEN') or None
+# каталог снимков метрик процессов: с ним /metrics складывает метрики всех процессов gunicorn,
+# без него отдает метрики одного процесса; как часто процесс обновляет свой снимок (секунды)
+BLOG_METRICS_DIR = getenv('BLOG_METRICS_DIR') or None
+BLOG_METRICS_FLUSH_INTERVAL = float(getenv('BLOG_METRICS_FLUSH_INTERVAL', 1))
+# поиск N+1 и медленных SQL-запросов (blog.querycheck) на сервере разработки, замечания пишутся в лог:
+# сколько одинаковых запросов на один HTTP-запрос считать N+1 и какой запрос считать медленным (мс)
+BLOG_QUERYCHECK = getenv('BLOG_QUERYCHECK', '1') == '1'
+BLOG_QUERYCHECK_REPEAT_THRESHOLD = int(getenv('BLOG_QUERYCHECK_REPEAT_THRESHOLD', 3))
+BLOG_QUERYCHECK_SLOW_MS = float(getenv('BLOG_QUERYCHECK_SLOW_MS', 100))
+# готовая схема OpenAPI для /swagger/ и /redoc/ (blog.schema, python manage.py generate_schema)
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'website.urls.api_info',
 }
+BLOG_SCHEMA_DIR = BASE_DIR / getenv('BLOG_SCHEMA_DIR', 'schema')
+# сервер приложения python manage.py serve (gunicorn): число процессов (0 - 2 * число ядер + 1),
+# потоков в процессе, запросов до перезапуска процесса и таймаут запроса (секунды)
+BLOG_SERVE_WORKERS = int(getenv('BLOG_SERVE_WORKERS', 0))
+BLOG_SERVE_THREADS = int(getenv('BLOG_SERVE_THREADS', 1))
+BLOG_SERVE_MAX_REQUESTS = int(getenv('BLOG_SERVE_MAX_REQUESTS', 10000))
+BLOG_SERVE_TIMEOUT = int(getenv('BLOG_SERVE_TIMEOUT', 30))
+# очередь фоновых задач (blog.tasks): immediate - выполнять сразу, database - таблица заданий,
+# которую разбирает python manage.py run_tasks, memory - список в памяти (тесты).
+# Попыток на задание, задержка первого повтора (секунды, дальше удваивается), через сколько секунд
+# выполняющееся задание считается брошенным, пауза опроса пустой очереди и потоков обработчика
+BLOG_TASKS_BACKEND = getenv('BLOG_TASKS_BACKEND', 'immediate')
+BLOG_TASKS_MAX_ATTEMPTS = int(getenv('BLOG_TASKS_MAX_ATTEMPTS', 5))
+BLOG_TASKS_RETRY_DELAY = float(getenv('BLOG_TASKS_RETRY_DELAY', 10))
+BLOG_TASKS_TIMEOUT = int(getenv('BLOG_TASKS_TIMEOUT', 300))
+BLOG_TASKS_POLL_INTERVAL = float(getenv('BLOG_TASKS_POLL_INTERVAL', 1))
+BLOG_TASKS_CONCURRENCY = int(getenv('BLOG_TASKS_CONCURRENCY', 4))
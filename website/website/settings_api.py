@@ -0,0 +1,22 @@
+"""
+Настройки процесса только для API: python manage.py serve --settings=website.settings_api
+
+Те же, что website.settings_production, но без приложений и маршрутов, которые API
+не нужны и только замедляют запуск каждого процесса: документации (drf_yasg),
+регистрации и входа через соцсети (dj_rest_auth.registration, allauth.socialaccount)
+и страниц админки. Адреса /admin/, /swagger/, /redoc/ и api/v1/dj-rest-auth/registration/
+балансировщик направляет в процессы с website.settings_production, запустить и сравнить
+оба профиля можно командой python manage.py profile_startup.
+"""
+from .settings_production import *  # noqa: F401,F403
+from .settings_production import INSTALLED_APPS
+
+# модели админки (журнал действий ссылается на пользователей) остаются, но без поиска
+# модулей admin.py при запуске; allauth.account остается ради адресов почты пользователей
+API_EXCLUDED_APPS = ('allauth.socialaccount', 'dj_rest_auth.registration', 'drf_yasg')
+INSTALLED_APPS = [
+    'django.contrib.admin.apps.SimpleAdminConfig' if app == 'django.contrib.admin' else app
+    for app in INSTALLED_APPS if app not in API_EXCLUDED_APPS
+]
+
+ROOT_URLCONF = 'website.urls_api'
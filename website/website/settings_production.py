@@ -0,0 +1,72 @@
+"""
+Настройки для продакшена: python manage.py serve --settings=website.settings_production
+(или DJANGO_SETTINGS_MODULE=website.settings_production).
+
+Все настройки website.settings, кроме режима отладки: без DEBUG Django не сохраняет
+каждый SQL-запрос в connection.queries, не работает проверка запросов blog.querycheck,
+а API отдает только JSON, без HTML-страниц BrowsableAPIRenderer.
+Кэш ответов, кэш токенов и счетчики частоты запросов в нескольких процессах gunicorn
+обязаны быть общими (BLOG_CACHE_ALIAS, BLOG_TOKEN_CACHE_ALIAS, BLOG_THROTTLE_CACHE_ALIAS).
+Метрики процессов складываются через каталог BLOG_METRICS_DIR.
+Письма и обновление поискового индекса уходят в таблицу заданий, их выполняет
+python manage.py run_tasks.
+"""
+from os import getenv
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES, REST_FRAMEWORK
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host.strip() for host in getenv('BLOG_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': [
+        'blog.renderers.FastJSONRenderer',
+    ],
+}
+
+BLOG_QUERYCHECK = False
+
+# общий для процессов кэш: по умолчанию файлы на диске с атомарными add и incr (blog.filecache,
+# процессы одного сервера), для нескольких серверов - Redis или memcached
+# (BLOG_SHARED_CACHE_BACKEND и BLOG_SHARED_CACHE_LOCATION)
+CACHES = {
+    **CACHES,
+    'shared': {
+        'BACKEND': getenv('BLOG_SHARED_CACHE_BACKEND', 'blog.filecache.LockedFileBasedCache'),
+        'LOCATION': getenv('BLOG_SHARED_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'TIMEOUT': int(getenv('BLOG_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(getenv('BLOG_SHARED_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+# кэш ответов с версиями и отметками записи для реплик, кэш токенов и счетчики частоты запросов:
+# в кэше одного процесса каждый процесс gunicorn отдавал бы устаревшие ответы, пускал бы
+# заблокированных пользователей и считал бы лимиты отдельно
+BLOG_CACHE_ALIAS = getenv('BLOG_CACHE_ALIAS', 'shared')
+BLOG_TOKEN_CACHE_ALIAS = getenv('BLOG_TOKEN_CACHE_ALIAS', 'shared')
+BLOG_THROTTLE_CACHE_ALIAS = getenv('BLOG_THROTTLE_CACHE_ALIAS', 'shared')
+for _name in ('BLOG_CACHE_ALIAS', 'BLOG_TOKEN_CACHE_ALIAS', 'BLOG_THROTTLE_CACHE_ALIAS'):
+    _backend = CACHES.get(globals()[_name] or '', {}).get('BACKEND', '')
+    if not _backend or _backend.endswith(('.LocMemCache', '.DummyCache')):
+        raise ImproperlyConfigured(f'{_name} должен указывать на общий для процессов кэш '
+                                   '(не LocMemCache и не DummyCache)')
+# incr в FileBasedCache и DatabaseCache - это get и set: одновременные запросы терялись бы
+if CACHES[BLOG_THROTTLE_CACHE_ALIAS]['BACKEND'].endswith(('.filebased.FileBasedCache', '.db.DatabaseCache')):
+    raise ImproperlyConfigured('BLOG_THROTTLE_CACHE_ALIAS: счетчикам частоты запросов нужен атомарный incr '
+                               '(blog.filecache.LockedFileBasedCache, Redis или memcached)')
+
+BLOG_TASKS_BACKEND = getenv('BLOG_TASKS_BACKEND', 'database')
+
+# /metrics по всем процессам gunicorn, а не по одному случайному
+BLOG_METRICS_DIR = getenv('BLOG_METRICS_DIR', str(BASE_DIR / 'metrics'))
+
+# статические файлы админки и swagger: без веб-сервера перед приложением (образ Docker)
+# их отдает само приложение, python manage.py serve --static, прямо из приложений Django;
+# за веб-сервером (nginx) их собирает в STATIC_ROOT python manage.py collectstatic
+STATIC_ROOT = BASE_DIR / getenv('BLOG_STATIC_ROOT', 'static')
@@ -14,22 +14,25 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework import permissions
-from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API Блога",
-        default_version="v1",
-        description="Простой блог на Django и Django Rest Framework",
-        # terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="darkus007@yandex.ru"),
-        # license=openapi.License(name="BSD License"),
-    ), public=True, permission_classes=[permissions.AllowAny, ],
+from blog.metrics import MetricsView
+from blog.schema import get_precomputed_schema_view
+
+api_info = openapi.Info(
+    title="API Блога",
+    default_version="v1",
+    description="Простой блог на Django и Django Rest Framework",
+    # terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="darkus007@yandex.ru"),
+    # license=openapi.License(name="BSD License"),
 )
 
+# схема строится один раз (python manage.py generate_schema) и отдается из файла, см. blog.schema
+schema_view = get_precomputed_schema_view(info=api_info, permission_classes=[permissions.AllowAny, ])
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -40,6 +43,9 @@ urlpatterns = [
     path('api/v1/dj-rest-auth/registration/', include('dj_rest_auth.registration.urls')),
 
     # Добавляем документацию
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+
+    path('metrics', MetricsView.as_view(), name='metrics'),     # адрес по умолчанию для Prometheus
 ]
@@ -0,0 +1,14 @@
+"""
+Маршруты процесса только для API (website.settings_api): без админки, регистрации
+и документации, их обслуживают процессы с полным набором маршрутов (website.urls).
+"""
+from django.urls import path, include
+
+from blog.metrics import MetricsView
+
+urlpatterns = [
+    path('api/v1/', include('blog.urls')),
+    path('api/v1/dj-rest-auth/', include('dj_rest_auth.urls')),     # вход, выход, пользователь, пароль
+
+    path('metrics', MetricsView.as_view(), name='metrics'),     # адрес по умолчанию для Prometheus
+]